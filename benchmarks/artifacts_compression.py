@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2017] [B2W Digital]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Artifacts compression benchmark.
+
+Compares the dump and load time and the file size of the engine artifacts
+codecs and compression settings on typical artifacts (numpy arrays, pandas
+DataFrames and plain python dicts).
+
+usage:
+
+    python benchmarks/artifacts_compression.py --size 1000000 --repeat 3
+"""
+
+from __future__ import print_function
+
+import os
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+from marvin_python_toolbox.engine_base.serializers import get_codec
+
+
+CANDIDATES = [
+    ('joblib', {'compress': 0}),
+    ('joblib', {'compress': 3}),
+    ('joblib', {'compress': 'lz4'}),
+    ('joblib', {'compress': 'zstd:3'}),
+    ('pickle', {}),
+    ('numpy', {}),
+    ('parquet', {}),
+]
+
+
+def make_artifacts(size):
+    artifacts = {
+        'ndarray': np.random.RandomState(0).normal(size=size),
+        'dict': dict(('key_{}'.format(i), [i, str(i), i / 3.0]) for i in range(size // 10)),
+    }
+
+    try:
+        import pandas
+        artifacts['dataframe'] = pandas.DataFrame({
+            'a': np.arange(size),
+            'b': np.random.RandomState(1).randint(0, 100, size=size),
+            'c': np.random.RandomState(2).choice(['x', 'y', 'z'], size=size),
+        })
+    except ImportError:
+        pass
+
+    return artifacts
+
+
+def supports(codec_name, artifact_name):
+    if codec_name == 'numpy':
+        return artifact_name == 'ndarray'
+    if codec_name == 'parquet':
+        return artifact_name == 'dataframe'
+    return True
+
+
+def measure(codec, obj, path, repeat):
+    dump_time = load_time = float('inf')
+
+    for _ in range(repeat):
+        started_at = time.time()
+        codec.dump(obj, path)
+        dump_time = min(dump_time, time.time() - started_at)
+
+        started_at = time.time()
+        codec.load(path)
+        load_time = min(load_time, time.time() - started_at)
+
+    return dump_time, load_time, os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the artifacts codecs and compression settings.')
+    parser.add_argument('--size', type=int, default=1000000, help='Number of elements of each artifact')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs of each measure, the best one is reported')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='marvin-benchmark-')
+
+    print("{:<10} {:<30} {:>10} {:>10} {:>12}".format('artifact', 'codec', 'dump (s)', 'load (s)', 'size (KB)'))
+
+    try:
+        for artifact_name, obj in sorted(make_artifacts(args.size).items()):
+            for codec_name, options in CANDIDATES:
+                if not supports(codec_name, artifact_name):
+                    continue
+
+                description = '{} {}'.format(codec_name, options or '')
+                try:
+                    result = measure(get_codec(codec_name, **options), obj, os.path.join(directory, artifact_name), args.repeat)
+                except (ImportError, ValueError) as e:
+                    print("{:<10} {:<30} skipped: {}".format(artifact_name, description, e))
+                    continue
+
+                dump_time, load_time, size = result
+                print("{:<10} {:<30} {:>10.4f} {:>10.4f} {:>12.1f}".format(
+                    artifact_name, description, dump_time, load_time, size / 1024.0))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
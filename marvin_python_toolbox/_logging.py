@@ -18,14 +18,46 @@
 """Custom logging module.
 
 This module is responsible to manage log messages and log file.
+
+The console and file handlers are created once per namespace and attached to
+the namespace logger, the loggers returned by get_logger reach them by
+propagation. With queue logging enabled (enable_queue_logging or the
+LOG_QUEUE environment variable) the records are handed to a background
+thread that owns those handlers, so the threads logging never block on
+terminal or disk writes.
+
+Setting the LOG_FORMAT environment variable to json writes one JSON object
+per line, with the STRUCTURED_FIELDS given in the `extra` of the record:
+
+    logger.info("Step finished", extra={'step': 'Predictor', 'duration': 0.002})
+    # {"time": 1500000000.0, "level": "INFO", "logger": "...", "message": "Step finished", "step": "Predictor", "duration": 0.002}
 """
 
 import os
 import os.path
 import logging
+import threading
+
+from six.moves import queue
+
+try:
+    from logging.handlers import QueueHandler, QueueListener
+except ImportError:  # pragma: no cover
+    # python 2 logs in the calling thread
+    QueueHandler = QueueListener = None
 
 DEFAULT_LOG_LEVEL = logging.WARNING
 DEFAULT_LOG_DIR = '/tmp'
+DEFAULT_NAMESPACE = 'marvin_python_toolbox'
+DEFAULT_LOG_FORMAT = 'text'
+LOG_FORMATS = ('text', 'json')
+
+# record attributes written by the json format when present
+STRUCTURED_FIELDS = ('action', 'step', 'rpc', 'status', 'request_id', 'messages', 'duration')
+
+_lock = threading.Lock()
+_configured_namespaces = set()
+_queued_namespaces = set()
 
 
 class Logger(logging.getLoggerClass()):
@@ -46,26 +78,98 @@ class Logger(logging.getLoggerClass()):
 logging.setLoggerClass(Logger)
 
 
-def get_logger(name, namespace='marvin_python_toolbox',
-               log_level=DEFAULT_LOG_LEVEL, log_dir=DEFAULT_LOG_DIR):
-    """Build a logger that outputs to a file and to the console,"""
+if QueueHandler is not None:
+    class _BackgroundHandler(QueueHandler):
+        """Queue handler feeding a QueueListener that owns the given handlers.
 
-    log_level = (os.getenv('{}_LOG_LEVEL'.format(namespace.upper())) or
-                 os.getenv('LOG_LEVEL', log_level))
-    log_dir = (os.getenv('{}_LOG_DIR'.format(namespace.upper())) or
-               os.getenv('LOG_DIR', log_dir))
+        The listener thread does not exist in forked processes, so a new
+        listener is started by the first record logged after a fork.
+        """
 
-    logger = logging.getLogger('{}.{}'.format(namespace, name))
-    logger.setLevel(log_level)
+        def __init__(self, handlers):
+            QueueHandler.__init__(self, queue.Queue(-1))
+            self.handlers = handlers
+            self._start_listener()
+
+        def _start_listener(self):
+            self.pid = os.getpid()
+            self.queue = queue.Queue(-1)
+            self.listener = QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+            self.listener.start()
+
+        def enqueue(self, record):
+            # emit holds the handler lock, so only one thread restarts the listener
+            if self.pid != os.getpid():
+                self._start_listener()
+
+            self.queue.put_nowait(record)
+
+        def close(self):
+            # logging.shutdown closes it before the handlers it owns, the pending records are written first
+            if self.listener is not None and self.pid == os.getpid():
+                self.listener.stop()
+                self.listener = None
+
+            QueueHandler.close(self)
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as a JSON object in a single line."""
+
+    def format(self, record):
+        # imported here, the codec module logs with this module
+        from .common import json_codec
+
+        data = {
+            'time': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = value
+
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+
+        return json_codec.dumps(data)
+
+
+def _env(namespace, name, default=None):
+    return os.getenv('{}_{}'.format(namespace.upper(), name)) or os.getenv(name, default)
+
+
+def _queue_handlers(namespace_logger):
+    handlers = list(namespace_logger.handlers)
+    for handler in handlers:
+        namespace_logger.removeHandler(handler)
 
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    namespace_logger.addHandler(_BackgroundHandler(handlers))
+
+
+def _configure_namespace(namespace, log_dir, log_format):
+    """Attach the console and file handlers to the namespace logger, once."""
+    if namespace in _configured_namespaces:
+        return
+
+    if log_format not in LOG_FORMATS:
+        raise ValueError('InvalidLogFormat', log_format)
+
+    namespace_logger = logging.getLogger(namespace)
+
+    if log_format == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
     # Create a console stream handler
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(log_level)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    namespace_logger.addHandler(console_handler)
 
     try:
         log_path = os.path.abspath(log_dir)
@@ -79,11 +183,57 @@ def get_logger(name, namespace='marvin_python_toolbox',
 
         # Create a file handler
         file_handler = logging.FileHandler(file_path)
-        file_handler.setLevel(log_level)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        namespace_logger.addHandler(file_handler)
     except OSError as e:
-        logger.error('Could not create log file {file}: {error}'.format(
+        namespace_logger.error('Could not create log file {file}: {error}'.format(
             file=file_path, error=e.strerror))
 
+    if namespace in _queued_namespaces:
+        _queue_handlers(namespace_logger)
+
+    _configured_namespaces.add(namespace)
+
+
+def enable_queue_logging(namespace=DEFAULT_NAMESPACE):
+    """Write the records of the namespace loggers from a background thread.
+
+    Returns False when not supported (python 2), the records keep being
+    written by the calling thread.
+    """
+    if QueueHandler is None:  # pragma: no cover
+        return False
+
+    with _lock:
+        if namespace not in _queued_namespaces:
+            _queued_namespaces.add(namespace)
+
+            if namespace in _configured_namespaces:
+                _queue_handlers(logging.getLogger(namespace))
+
+    return True
+
+
+def get_logger(name, namespace=DEFAULT_NAMESPACE,
+               log_level=DEFAULT_LOG_LEVEL, log_dir=DEFAULT_LOG_DIR, log_format=DEFAULT_LOG_FORMAT):
+    """Build a logger that outputs to a file and to the console,
+
+    The handlers are shared by all the loggers of the namespace, calling it
+    again for the same name only updates the logger level. The log_dir and
+    log_format of the first call of each namespace are used.
+    """
+
+    log_level = _env(namespace, 'LOG_LEVEL', log_level)
+    log_dir = _env(namespace, 'LOG_DIR', log_dir)
+    log_format = _env(namespace, 'LOG_FORMAT', log_format).lower()
+
+    if _env(namespace, 'LOG_QUEUE', '').lower() in ('1', 'true', 'yes'):
+        enable_queue_logging(namespace)
+
+    logger = logging.getLogger('{}.{}'.format(namespace, name))
+    logger.setLevel(log_level)
+
+    with _lock:
+        _configure_namespace(namespace, log_dir, log_format)
+
     return logger
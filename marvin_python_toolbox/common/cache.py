@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2017] [B2W Digital]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Cache Module.
+
+Thread safe in memory caches used by the engine servers.
+"""
+import time
+import threading
+from collections import OrderedDict
+
+
+__all__ = ['LRUCache', 'MISSING']
+
+# returned by LRUCache.get for absent or expired keys, None is a valid cached value
+MISSING = object()
+
+
+class LRUCache(object):
+    """
+    Thread safe least recently used cache holding up to max_size entries,
+    each one expiring ttl seconds after being set (None never expires).
+
+    usage:
+
+        cache = LRUCache(max_size=1000, ttl=300)
+        cache.set('key', 1)
+        cache.get('key')
+        # 1
+        cache.stats()
+        # {'size': 1, 'hits': 1, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
+    Each clear starts a new generation, a value computed before a clear is
+    not stored when set with the generation read before computing it:
+
+        generation = cache.generation
+        cache.set('key', compute(), generation=generation)
+    """
+
+    def __init__(self, max_size, ttl=None):
+        if max_size < 1:
+            raise ValueError('InvalidCacheSize', max_size)
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.generation = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[1] is not None and entry[1] <= time.time():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return MISSING
+
+            # moves the key to the most recently used end
+            del self._entries[key]
+            self._entries[key] = entry
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, generation=None):
+        expires_at = time.time() + self.ttl if self.ttl else None
+
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+
+            self._entries.pop(key, None)
+            self._entries[key] = (value, expires_at)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
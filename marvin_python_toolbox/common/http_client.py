@@ -21,7 +21,7 @@
 import requests
 import math
 
-from .utils import to_json
+from . import json_codec
 
 # Use six to create code compatible with Python 2 and 3.
 # See http://pythonhosted.org/six/
@@ -77,11 +77,11 @@ class HttpClient(object):
         """
         status = response.status_code
         if response.ok:
-            data = response.json()
+            data = json_codec.loads(response.content)
             return HttpResponse(ok=response.ok, status=status, errors=None, data=data)
         else:
             try:
-                errors = response.json()
+                errors = json_codec.loads(response.content)
             except ValueError:
                 errors = response.content
             return HttpResponse(ok=response.ok, status=status, errors=errors, data=None)
@@ -111,19 +111,19 @@ class HttpClient(object):
     def post(self, path, data=None):
         """Encapsulates POST requests"""
         data = data or {}
-        response = requests.post(self.url(path), data=to_json(data), headers=self.request_header())
+        response = requests.post(self.url(path), data=json_codec.dumpb(data), headers=self.request_header())
         return self.parse_response(response)
 
     def put(self, path, data=None):
         """Encapsulates PUT requests"""
         data = data or {}
-        response = requests.put(self.url(path), data=to_json(data), headers=self.request_header())
+        response = requests.put(self.url(path), data=json_codec.dumpb(data), headers=self.request_header())
         return self.parse_response(response)
 
     def delete(self, path, data=None):
         """Encapsulates DELETE requests"""
         data = data or {}
-        response = requests.delete(self.url(path), data=to_json(data), headers=self.request_header())
+        response = requests.delete(self.url(path), data=json_codec.dumpb(data), headers=self.request_header())
         return self.parse_response(response)
 
 
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2017] [B2W Digital]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""JSON Codec Module.
+
+JSON encoding used by the engine servers and clients, backed by the fastest
+library installed: orjson, ujson or the standard library json, in that order.
+
+All backends handle datetimes, UUIDs, numpy values and objects with an `id`
+attribute, orjson does it natively and the other backends through the
+`default` function. orjson and ujson write compact JSON (no whitespaces after
+the separators), the standard library keeps its default format.
+
+The backends differ on values outside of the JSON spec:
+
+- NaN and Infinity are written as null by orjson, while ujson and the
+  standard library write the NaN and Infinity literals. orjson also refuses
+  to load these literals.
+- Integers beyond 64 bits can't be written by orjson, objects holding them
+  are written by the standard library instead (compact, as orjson would).
+  orjson loads them as floats, losing precision.
+"""
+import json
+import uuid
+import datetime
+from collections import OrderedDict
+
+from .._logging import get_logger
+
+
+__all__ = ['BACKEND', 'dumps', 'dumpb', 'loads', 'default']
+logger = get_logger('json_codec')
+
+
+def default(obj):
+    """Convert the objects not supported by the JSON backend."""
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+
+    # numpy
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if hasattr(obj, 'item'):
+        return obj.item()
+
+    try:
+        return obj.id
+    except Exception:
+        raise TypeError('{obj} is not JSON serializable'.format(obj=repr(obj)))
+
+
+def _stdlib_dumps(obj, sort_keys=False):
+    return json.dumps(obj, default=default, sort_keys=sort_keys)
+
+
+def _stdlib_dumpb(obj, sort_keys=False):
+    return _stdlib_dumps(obj, sort_keys=sort_keys).encode('utf-8')
+
+
+def _stdlib_loads(data):
+    if isinstance(data, bytes):
+        data = data.decode('utf-8')
+    return json.loads(data)
+
+
+# (dumps, dumpb, loads) of each installed backend, the first one is used
+_BACKENDS = OrderedDict()
+
+try:
+    import orjson
+
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def _orjson_dumpb(obj, sort_keys=False):
+        option = _ORJSON_OPTIONS | orjson.OPT_SORT_KEYS if sort_keys else _ORJSON_OPTIONS
+        try:
+            return orjson.dumps(obj, default=default, option=option)
+        except orjson.JSONEncodeError:
+            # eg. integers beyond 64 bits, the objects json can't encode either raise TypeError again
+            return json.dumps(obj, default=default, sort_keys=sort_keys, separators=(',', ':')).encode('utf-8')
+
+    def _orjson_dumps(obj, sort_keys=False):
+        return _orjson_dumpb(obj, sort_keys=sort_keys).decode('utf-8')
+
+    _BACKENDS['orjson'] = (_orjson_dumps, _orjson_dumpb, orjson.loads)
+except ImportError:
+    pass
+
+try:
+    import ujson
+
+    def _ujson_dumps(obj, sort_keys=False):
+        return ujson.dumps(obj, default=default, sort_keys=sort_keys, escape_forward_slashes=False)
+
+    def _ujson_dumpb(obj, sort_keys=False):
+        return _ujson_dumps(obj, sort_keys=sort_keys).encode('utf-8')
+
+    _BACKENDS['ujson'] = (_ujson_dumps, _ujson_dumpb, ujson.loads)
+except ImportError:
+    pass
+
+_BACKENDS['json'] = (_stdlib_dumps, _stdlib_dumpb, _stdlib_loads)
+
+BACKEND = next(iter(_BACKENDS))
+dumps, dumpb, loads = _BACKENDS[BACKEND]
+
+logger.debug("Using the {} JSON backend".format(BACKEND))
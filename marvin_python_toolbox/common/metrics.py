@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2017] [B2W Digital]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Metrics Module.
+
+Lightweight thread safe metrics used to instrument the engine servers.
+"""
+import bisect
+import threading
+
+
+__all__ = ['Counter', 'Histogram']
+
+
+class Counter(object):
+    """
+    Thread safe counter split by label.
+
+    usage:
+
+        shed = Counter()
+        shed.inc('queue_full')
+        shed.snapshot()
+        # {'queue_full': 1}
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label='total', amount=1):
+        with self._lock:
+            self._values[label] = self._values.get(label, 0) + amount
+
+    def value(self, label='total'):
+        return self._values.get(label, 0)
+
+    @property
+    def total(self):
+        with self._lock:
+            return sum(self._values.values())
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    def reset(self):
+        with self._lock:
+            self._values = {}
+
+
+class Histogram(object):
+    """
+    Thread safe histogram with fixed bucket upper bounds.
+
+    usage:
+
+        latency = Histogram(buckets=[0.001, 0.01, 0.1])
+        latency.observe(0.004)
+        latency.snapshot()
+        # {'count': 1, 'sum': 0.004, 'buckets': [(0.001, 0), (0.01, 1), (0.1, 0), ('+Inf', 0)]}
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._count = 0
+        self._sum = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += value
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def sum(self):
+        return self._sum
+
+    def quantile(self, q):
+        """Return the upper bound of the bucket holding the q-th quantile."""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+
+        if not total:
+            return None
+
+        rank = q * total
+        accumulated = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            accumulated += count
+            if accumulated >= rank:
+                return bound
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+            sum_ = self._sum
+
+        return {
+            'count': total,
+            'sum': sum_,
+            'buckets': list(zip(self.buckets + ('+Inf',), counts)),
+        }
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._count = 0
+            self._sum = 0
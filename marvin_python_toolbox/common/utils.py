@@ -20,10 +20,9 @@
 """
 import os
 import re
+import copy
 import datetime
 import time
-import json
-import simplejson
 import uuid
 import hashlib
 import jsonschema
@@ -35,6 +34,7 @@ from slugify import slugify
 from .._compatibility import xrange, text_type, quote
 from .._logging import get_logger
 from .exceptions import InvalidJsonException
+from . import json_codec
 
 
 logger = get_logger('utils')
@@ -113,69 +113,116 @@ def chunks(lst, size):
         yield lst[i:i + size]
 
 
-def _to_json_default(obj):
-    """Helper to convert non default objects to json.
+def _read_only(*args, **kwargs):
+    raise TypeError('ReadOnlyObject')
+
+
+class ReadOnlyDict(dict):
+    """Dict that can not be changed, copy.copy, copy.deepcopy and dict(...)
+    return plain mutable dicts.
 
     Usage:
-        simplejson.dumps(data, default=_to_json_default)
+
+        params = freeze({'threshold': 0.5})
+        params['threshold'] = 0.7
+        # TypeError: ReadOnlyObject
+        params = dict(params, threshold=0.7)
     """
-    # Datetime
-    if isinstance(obj, datetime.datetime):
-        return obj.isoformat()
 
-    # UUID
-    if isinstance(obj, uuid.UUID):
-        return str(obj)
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
 
-    # numpy
-    if hasattr(obj, 'item'):
-        return obj.item()
+    def __copy__(self):
+        return dict(self)
 
-    # # Enum
-    # if hasattr(obj, 'value'):
-    #     return obj.value
+    def __deepcopy__(self, memo):
+        return dict((key, copy.deepcopy(value, memo)) for key, value in self.items())
+
+    def __reduce__(self):
+        return (ReadOnlyDict, (dict(self),))
+
+
+class ReadOnlyList(list):
+    """List that can not be changed, the list counterpart of ReadOnlyDict."""
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = reverse = sort = _read_only
+    # python 2 slice assignments
+    __setslice__ = __delslice__ = _read_only
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return [copy.deepcopy(value, memo) for value in self]
+
+    def __reduce__(self):
+        return (ReadOnlyList, (list(self),))
 
-    try:
-        return obj.id
-    except Exception:
-        raise TypeError('{obj} is not JSON serializable'.format(obj=repr(obj)))
+
+def freeze(value):
+    """Return a read only copy of the dicts and lists nested in value,
+    so a value shared by many callers can not be changed by any of them."""
+    if isinstance(value, dict):
+        return ReadOnlyDict((key, freeze(item)) for key, item in value.items())
+
+    if isinstance(value, list):
+        return ReadOnlyList(freeze(item) for item in value)
+
+    return value
 
 
 datetime_regex = re.compile('(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})')
 uuid_regex = re.compile('^[0-9a-f]{8}(-[0-9a-f]{4}){3}-[0-9a-f]{12}$')
 
 
+def _from_json_value(value):
+    """Converts a string, where datetime and UUID objects were converted
+    into strings by `to_json`, into a python object.
+    """
+    # cheap length and separator checks, so most strings never reach the regexes
+    if len(value) >= 19 and value[4] == '-' and value[10] == 'T':
+        dt_result = datetime_regex.match(value)
+        if dt_result:
+            year, month, day, hour, minute, second = map(
+                lambda x: int(x), dt_result.groups())
+            return datetime.datetime(year, month, day, hour, minute, second)
+
+    elif len(value) == 36 and value[8] == '-':
+        if uuid_regex.match(value):
+            return uuid.UUID(value)
+
+    return value
+
+
 def _from_json_object_hook(obj):
-    """Converts a json string, where datetime and UUID objects were converted
-    into strings using the '_to_json_default', into a python object.
+    """Converts the datetime and UUID strings of the decoded objects (and of
+    the objects nested in them) into python objects.
 
     Usage:
-        simplejson.loads(data, object_hook=_from_json_object_hook)
+        _from_json_object_hook(json_codec.loads(data))
     """
-
-    for key, value in obj.items():
-        # Check for datetime objects
-        if isinstance(value, str):
-            dt_result = datetime_regex.match(value)
-            if dt_result:
-                year, month, day, hour, minute, second = map(
-                    lambda x: int(x), dt_result.groups())
-                obj[key] = datetime.datetime(
-                    year, month, day, hour, minute, second)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if isinstance(value, text_type):
+                obj[key] = _from_json_value(value)
             else:
-                dt_result = uuid_regex.match(value)
-                if dt_result:
-                    obj[key] = uuid.UUID(value)
+                _from_json_object_hook(value)
+
+    elif isinstance(obj, list):
+        for value in obj:
+            _from_json_object_hook(value)
+
     return obj
 
 
 def to_json(data):
     """Convert non default objects to json."""
-    return json.dumps(data, default=_to_json_default)
+    return json_codec.dumps(data)
 
 
 def from_json(json_str):
-    return simplejson.loads(json_str, object_hook=_from_json_object_hook)
+    return _from_json_object_hook(json_codec.loads(json_str))
 
 
 def validate_json(data, schema):
@@ -19,5 +19,6 @@ from .engine_base_action import EngineBaseAction, EngineBaseOnlineAction, Engine
 from .engine_base_prediction import EngineBasePrediction
 from .engine_base_data_handler import EngineBaseDataHandler
 from .engine_base_training import EngineBaseTraining
+from .parallel import ParallelStep
 from .stubs import actions_pb2, actions_pb2_grpc
-from .serializers import KerasSerializer
\ No newline at end of file
+from .serializers import KerasSerializer, ArtifactCodec, register_codec
\ No newline at end of file
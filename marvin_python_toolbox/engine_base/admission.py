@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2017] [B2W Digital]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+import grpc
+
+from .._logging import get_logger
+from ..common.metrics import Counter, Histogram
+
+
+__all__ = ['AdmissionController']
+logger = get_logger('engine_base_admission')
+
+QUEUE_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# weight of the last execution in the service time moving average
+SERVICE_TIME_DECAY = 0.1
+
+
+class AdmissionController(object):
+    """
+    Bounded queue in front of the online action executions.
+
+    At most `concurrency` requests execute at once and up to max_queue_depth
+    more wait for a free slot. Requests are shed when the queue is full, when
+    the expected wait (queue position times the average execution time)
+    already exceeds max_queue_time seconds, or when they waited that long
+    without getting a slot. Shedding a few requests early keeps the latency of
+    the admitted ones bounded during traffic bursts.
+    """
+
+    def __init__(self, concurrency, max_queue_depth, max_queue_time=0, stats_interval=60):
+        self.concurrency = concurrency
+        self.max_queue_depth = max_queue_depth
+        self.max_queue_time = max_queue_time
+        self.stats_interval = stats_interval
+
+        self.admissions = Counter()
+        self.shed = Counter()
+        self.queue_time_histogram = Histogram(buckets=QUEUE_TIME_BUCKETS)
+
+        self._running = 0
+        self._waiting = 0
+        self._service_time = 0
+        self._condition = threading.Condition()
+        self._last_report = time.time()
+
+    def _expected_wait(self):
+        return (self._waiting + 1) * self._service_time / self.concurrency
+
+    def _acquire(self):
+        started_at = time.time()
+
+        with self._condition:
+            if self._running >= self.concurrency:
+                if self._waiting >= self.max_queue_depth:
+                    return 'queue_full'
+
+                if self.max_queue_time and self._expected_wait() > self.max_queue_time:
+                    return 'queue_time'
+
+                self._waiting += 1
+                try:
+                    while self._running >= self.concurrency:
+                        remaining = started_at + self.max_queue_time - time.time() if self.max_queue_time else None
+
+                        if remaining is not None and remaining <= 0:
+                            return 'queue_time'
+
+                        self._condition.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+            self._running += 1
+
+        self.queue_time_histogram.observe(time.time() - started_at)
+        return None
+
+    def _release(self, service_time):
+        with self._condition:
+            self._running -= 1
+            self._service_time += SERVICE_TIME_DECAY * (service_time - self._service_time)
+            self._condition.notify()
+
+    @contextmanager
+    def admitted(self, context=None):
+        """
+        Hold an execution slot while the block runs. Shed requests end the
+        call with the RESOURCE_EXHAUSTED status, or raise
+        ValueError('RequestShed', reason) without a context.
+        """
+        reason = self._acquire()
+        self._report_stats()
+
+        if reason is not None:
+            self.shed.inc(reason)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Request shed by {}".format(reason))
+
+            if context is None:
+                raise ValueError('RequestShed', reason)
+            context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, "Request shed by {}".format(reason))
+
+        self.admissions.inc()
+        started_at = time.time()
+        try:
+            yield
+        finally:
+            self._release(time.time() - started_at)
+
+    def stats(self):
+        return {
+            'admitted': self.admissions.total,
+            'shed': self.shed.snapshot(),
+            'running': self._running,
+            'waiting': self._waiting,
+            'queue_time': self.queue_time_histogram.snapshot(),
+        }
+
+    def _report_stats(self):
+        if self.stats_interval and time.time() - self._last_report >= self.stats_interval:
+            self._last_report = time.time()
+            logger.info("Admission control stats: {}".format(self.stats()))
@@ -0,0 +1,292 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2017] [B2W Digital]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Asyncio gRPC server for the engine actions.
+
+Alternative to the thread per RPC server of _prepare_remote_server, built on
+grpc.aio (grpcio>=1.32, python 3 only) and keeping the same proto contract.
+Actions can define `async def execute(...)` to overlap I/O waits (feature
+stores, other services), plain execute methods run in a thread pool so they
+never block the event loop.
+
+usage:
+
+    server = AioServer(action, port=7070, workers=4, rpc_workers=100)
+    server.start()
+    ...
+    server.stop(0)
+"""
+
+import time
+import asyncio
+import threading
+from concurrent import futures
+
+from grpc import aio
+
+from .stubs.actions_pb2 import OnlineActionBatchResponse, BatchActionResponse, BatchActionProgress
+from .stubs import actions_pb2_grpc
+from .engine_base_action import EngineBaseOnlineAction
+from .cancellation import CancellationToken, cancellation_status
+from ..common.cache import MISSING
+from .._logging import get_logger
+
+
+__all__ = ['AioServer', 'AsyncOnlineActionServicer', 'AsyncBatchActionServicer', 'is_async_pipeline']
+logger = get_logger('engine_base_aio')
+
+
+def is_async_pipeline(action):
+    return any(asyncio.iscoroutinefunction(step.execute) for step in action._pipeline_steps())
+
+
+class _AsyncActionServicer(object):
+    def __init__(self, action, executor):
+        self.action = action
+        self.executor = executor
+        self.steps = action._compile_pipeline()
+        self.is_async = is_async_pipeline(action)
+
+    async def _run_sync(self, fn, *args, **kwargs):
+        return await asyncio.get_event_loop().run_in_executor(self.executor, lambda: fn(*args, **kwargs))
+
+    async def _execute_step(self, step, *args, **kwargs):
+        started_at = time.time()
+        try:
+            if asyncio.iscoroutinefunction(step.execute):
+                return await step.execute(*args, **kwargs)
+            return await self._run_sync(step.execute, *args, **kwargs)
+        finally:
+            step._execute_latency.observe(time.time() - started_at)
+
+    async def _aborting_cancelled(self, context, execution):
+        """Await the execution ending the call with the CANCELLED or DEADLINE_EXCEEDED status when it is abandoned."""
+        try:
+            return await execution
+        except ValueError as e:
+            status = cancellation_status(e)
+            if status is None:
+                raise
+
+            logger.warning("Execution of {} abandoned: {}".format(e.args[1], e.args[0]))
+            await context.abort(status, "{} {}".format(e.args[0], e.args[1]))
+
+    async def _remote_reload(self, request, context):
+        return await self._run_sync(self.action._remote_reload, request, context)
+
+    async def _health_check(self, request, context):
+        return await self._run_sync(self.action._health_check, request, context)
+
+
+class AsyncOnlineActionServicer(_AsyncActionServicer):
+    """OnlineActionHandler servicer, pipelines without async steps use the regular handlers in the thread pool."""
+
+    async def _pipeline_execute(self, input_message, params, cancellation, request_id):
+        for step in self.steps:
+            cancellation.raise_if_cancelled(step.action_name)
+
+            started_at = time.time()
+            cache_key, message = step._cache_lookup(step._step_cache, input_message, params)
+            if message is MISSING:
+                message = await self._execute_step(step, input_message, params, cancellation=cancellation)
+
+                step._cache_store(step._step_cache, cache_key, message)
+
+            self.action._log_step(step, started_at, request_id)
+            input_message = message
+        return input_message
+
+    async def _remote_execute(self, request, context):
+        cancellation = CancellationToken.from_context(context)
+        request_id = self.action._request_id(context)
+
+        with self.action._access_logged('execute', request_id):
+            return await self._aborting_cancelled(context, self._execute_request(request, cancellation, request_id))
+
+    async def _execute_request(self, request, cancellation, request_id):
+        if not self.is_async:
+            return await self._run_sync(self.action._execute_request, request, cancellation=cancellation, request_id=request_id)
+
+        input_message = self.action._parse_request_message(request)
+        params = self.action._parse_params(request.params)
+
+        cache_key, message = self.action._prediction_cache_lookup(input_message, params)
+
+        if message is MISSING:
+            message = await self._pipeline_execute(input_message, params, cancellation, request_id)
+
+            self.action._cache_store(self.action._prediction_cache, cache_key, message)
+
+        return self.action._build_response(message, request.content_type)
+
+    async def _remote_execute_stream(self, request_iterator, context):
+        cancellation = CancellationToken.from_context(context)
+
+        count = 0
+        async for request in request_iterator:
+            request_id = self.action._request_id(context, index=count)
+
+            with self.action._access_logged('execute_stream', request_id):
+                response = await self._aborting_cancelled(context, self._execute_request(request, cancellation, request_id))
+            yield response
+            count += 1
+
+    async def _remote_execute_batch(self, request, context):
+        cancellation = CancellationToken.from_context(context)
+        request_id = self.action._request_id(context)
+
+        with self.action._access_logged('execute_batch', request_id, messages=len(request.messages)):
+            return await self._aborting_cancelled(context, self._execute_batch_request(request, cancellation, request_id))
+
+    async def _execute_batch_request(self, request, cancellation, request_id):
+        if not self.is_async:
+            return await self._run_sync(self.action._execute_batch_request, request, cancellation=cancellation, request_id=request_id)
+
+        params = self.action._parse_params(request.params)
+
+        messages = await asyncio.gather(*[
+            self._pipeline_execute(self.action._parse_message(message), params, cancellation, request_id) for message in request.messages])
+
+        return OnlineActionBatchResponse(messages=[self.action._serialize_message(message) for message in messages])
+
+
+class AsyncBatchActionServicer(_AsyncActionServicer):
+    """BatchActionHandler servicer, pipelines without async steps use the regular handlers in the thread pool."""
+
+    async def _remote_execute(self, request, context):
+        params = self.action._parse_params(request.params)
+        cancellation = CancellationToken.from_context(context)
+
+        await self._aborting_cancelled(context, self._execute_with_progress(params, None, cancellation))
+
+        return BatchActionResponse(message="Done")
+
+    async def _pipeline_execute(self, params, cancellation):
+        for step in self.steps:
+            cancellation.raise_if_cancelled(step.action_name)
+            step._emit_progress("started")
+            await self._execute_step(step, params, cancellation=cancellation)
+            step._emit_progress("finished", progress=1.0)
+
+        await self._run_sync(self.action._flush_pending_saves)
+        self.action._release_local_saved_objects()
+
+    async def _execute_with_progress(self, params, listener, cancellation):
+        if not self.is_async:
+            return await self._run_sync(self.action._execute_with_progress, params=params, listener=listener, cancellation=cancellation)
+
+        self.action._set_progress_listener(listener)
+        try:
+            await self._pipeline_execute(params, cancellation)
+        finally:
+            self.action._set_progress_listener(None)
+
+    async def _remote_execute_stream(self, request, context):
+        params = self.action._parse_params(request.params)
+        cancellation = CancellationToken.from_context(context)
+
+        loop = asyncio.get_event_loop()
+        events = asyncio.Queue()
+
+        def listener(event):
+            cancellation.raise_if_cancelled(event.action)
+            # sync steps report from the executor threads
+            loop.call_soon_threadsafe(events.put_nowait, event)
+
+        async def run():
+            try:
+                await self._execute_with_progress(params, listener, cancellation)
+            finally:
+                loop.call_soon_threadsafe(events.put_nowait, None)
+
+        execution = asyncio.ensure_future(run())
+        try:
+            event = await events.get()
+            while event is not None:
+                yield event
+                event = await events.get()
+
+            await self._aborting_cancelled(context, execution)
+        finally:
+            cancellation.cancel()
+
+        yield BatchActionProgress(action=self.action.action_name, event="done", progress=1.0, message="Done")
+
+
+class AioServer(object):
+    """
+    grpc.aio server running its event loop in a background thread, with the
+    start and stop methods of a regular gRPC server.
+    """
+
+    def __init__(self, action, port, workers, rpc_workers):
+        self.action = action
+        self.port = port
+        self.rpc_workers = rpc_workers
+        self.executor = futures.ThreadPoolExecutor(max_workers=workers)
+
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    def _create_server(self):
+        server = aio.server(maximum_concurrent_rpcs=self.rpc_workers)
+
+        if isinstance(self.action, EngineBaseOnlineAction):
+            actions_pb2_grpc.add_OnlineActionHandlerServicer_to_server(AsyncOnlineActionServicer(self.action, self.executor), server)
+        else:
+            actions_pb2_grpc.add_BatchActionHandlerServicer_to_server(AsyncBatchActionServicer(self.action, self.executor), server)
+
+        self.port = server.add_insecure_port('[::]:{}'.format(self.port))
+        return server
+
+    def _run(self, started):
+        asyncio.set_event_loop(self._loop)
+
+        try:
+            self._server = self._create_server()
+            self._loop.run_until_complete(self._server.start())
+        except BaseException as e:
+            started.error = e
+            return
+        finally:
+            started.set()
+
+        self._loop.run_forever()
+
+    def start(self):
+        self._loop = asyncio.new_event_loop()
+        started = threading.Event()
+        started.error = None
+
+        self._thread = threading.Thread(target=self._run, args=(started,), name='marvin-aio-server')
+        self._thread.daemon = True
+        self._thread.start()
+        started.wait()
+
+        if started.error is not None:
+            raise started.error
+
+        logger.info("Asyncio gRPC server started in port {}".format(self.port))
+
+    def stop(self, grace):
+        asyncio.run_coroutine_threadsafe(self._server.stop(grace), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self.executor.shutdown(wait=False)
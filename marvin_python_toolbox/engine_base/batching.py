@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2017] [B2W Digital]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+import time
+import threading
+from collections import OrderedDict
+
+from .._compatibility import six
+from .._logging import get_logger
+from ..common import json_codec
+from ..common.metrics import Histogram
+
+
+__all__ = ['MicroBatcher']
+logger = get_logger('engine_base_batching')
+
+QUEUE_LATENCY_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class _PendingRequest(object):
+    __slots__ = ('input_message', 'params', 'key', 'enqueued_at', 'done', 'result', 'error')
+
+    def __init__(self, input_message, params, key):
+        self.input_message = input_message
+        self.params = params
+        self.key = key
+        self.enqueued_at = time.time()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher(object):
+    """
+    Collects concurrent online requests and executes them as a single batch.
+
+    Requests are queued until max_batch_size messages are waiting or the oldest
+    one has waited max_batch_wait seconds, then they are sent together through
+    the action _pipeline_execute_batch (requests with different params are never
+    mixed in the same batch). While a batch is running new requests keep
+    queueing, so the batch size grows with the load.
+    """
+
+    def __init__(self, action, max_batch_size=32, max_batch_wait=0.002, stats_interval=60):
+        self.action = action
+        self.max_batch_size = max_batch_size
+        self.max_batch_wait = max_batch_wait
+        self.stats_interval = stats_interval
+
+        self.batch_size_histogram = Histogram(buckets=self._batch_size_buckets(max_batch_size))
+        self.queue_latency_histogram = Histogram(buckets=QUEUE_LATENCY_BUCKETS)
+
+        self._queue = six.moves.queue.Queue()
+        self._running = True
+        self._last_report = time.time()
+        self._thread = threading.Thread(target=self._run, name='marvin-micro-batcher')
+        self._thread.daemon = True
+        self._thread.start()
+
+    @staticmethod
+    def _batch_size_buckets(max_batch_size):
+        buckets = [1]
+        while buckets[-1] < max_batch_size:
+            buckets.append(min(buckets[-1] * 2, max_batch_size))
+        return buckets
+
+    def submit(self, input_message, params, key=None):
+        """Queue the message and block until the result of its batch is available."""
+        if key is None:
+            key = json_codec.dumps(params, sort_keys=True)
+
+        request = _PendingRequest(input_message, params, key)
+        self._queue.put(request)
+        request.done.wait()
+
+        if request.error is not None:
+            six.reraise(*request.error)
+
+        return request.result
+
+    def stats(self):
+        return {
+            'batch_size': self.batch_size_histogram.snapshot(),
+            'queue_latency': self.queue_latency_histogram.snapshot(),
+        }
+
+    def close(self):
+        self._running = False
+        self._thread.join()
+
+    def _run(self):
+        while self._running:
+            batch = self._collect()
+
+            if batch:
+                self._execute(batch)
+
+            if self.stats_interval and time.time() - self._last_report >= self.stats_interval:
+                self._last_report = time.time()
+                logger.info("Micro batching stats for {}: {}".format(self.action.action_name, self.stats()))
+
+    def _collect(self):
+        try:
+            first = self._queue.get(timeout=0.1)
+        except six.moves.queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = first.enqueued_at + self.max_batch_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.time()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except six.moves.queue.Empty:
+                break
+
+        return batch
+
+    def _execute(self, batch):
+        started_at = time.time()
+        groups = OrderedDict()
+
+        for request in batch:
+            self.queue_latency_histogram.observe(started_at - request.enqueued_at)
+            groups.setdefault(request.key, []).append(request)
+
+        for requests in groups.values():
+            self.batch_size_histogram.observe(len(requests))
+            try:
+                results = self.action._pipeline_execute_batch(
+                    input_messages=[request.input_message for request in requests], params=requests[0].params)
+
+                for request, result in zip(requests, results):
+                    request.result = result
+
+            except Exception:
+                logger.exception("Error executing batch of {} messages".format(len(requests)))
+                error = sys.exc_info()
+                for request in requests:
+                    request.error = error
+
+            finally:
+                for request in requests:
+                    request.done.set()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2017] [B2W Digital]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Cancellation of abandoned engine action executions.
+
+A CancellationToken is created for each gRPC call from its context and
+given to the execute methods as the `cancellation` keyword argument. It is
+cancelled when the caller cancels the call or goes away, and expires with
+the call deadline. The pipeline checks it before each step, long steps can
+check it themselves:
+
+    def execute(self, input_message, params, **kwargs):
+        cancellation = kwargs.get('cancellation')
+        for chunk in chunks:
+            if cancellation:
+                cancellation.raise_if_cancelled(self.action_name)
+            ...
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+
+import grpc
+
+from .._logging import get_logger
+
+
+__all__ = ['CancellationToken', 'cancellation_status', 'aborting_cancelled']
+logger = get_logger('engine_base_cancellation')
+
+_CANCELLATION_STATUS = {
+    'ExecutionCancelled': grpc.StatusCode.CANCELLED,
+    'DeadlineExceeded': grpc.StatusCode.DEADLINE_EXCEEDED,
+}
+
+
+class CancellationToken(object):
+    def __init__(self, deadline=None):
+        self.deadline = deadline
+        self._cancelled = threading.Event()
+
+    @classmethod
+    def from_context(cls, context):
+        """Return a token bound to the gRPC (or grpc.aio) context, None without a context."""
+        if context is None:
+            return None
+
+        time_remaining = context.time_remaining()
+        token = cls(deadline=time.time() + time_remaining if time_remaining is not None else None)
+
+        if hasattr(context, 'add_callback'):
+            context.add_callback(token.cancel)
+        else:
+            context.add_done_callback(lambda _: token.cancel())
+
+        return token
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def expired(self):
+        return self.deadline is not None and time.time() >= self.deadline
+
+    def time_remaining(self):
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.time(), 0)
+
+    def raise_if_cancelled(self, action_name=None):
+        if self.cancelled:
+            raise ValueError('ExecutionCancelled', action_name)
+        if self.expired:
+            raise ValueError('DeadlineExceeded', action_name)
+
+
+def cancellation_status(error):
+    """Return the gRPC status code of a cancellation error, None for any other error."""
+    if isinstance(error, ValueError) and error.args:
+        return _CANCELLATION_STATUS.get(error.args[0])
+    return None
+
+
+@contextmanager
+def aborting_cancelled(context):
+    """End the call with the CANCELLED or DEADLINE_EXCEEDED status when the execution is abandoned."""
+    try:
+        yield
+    except ValueError as e:
+        status = cancellation_status(e)
+        if status is None or context is None:
+            raise
+
+        logger.warning("Execution of {} abandoned: {}".format(e.args[1], e.args[0]))
+        context.abort(status, "{} {}".format(e.args[0], e.args[1]))
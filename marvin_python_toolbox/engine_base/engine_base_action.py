@@ -17,22 +17,55 @@
 
 from __future__ import unicode_literals
 import os
+import sys
+import time
+import uuid
+import random
+import logging
+import threading
 
 from abc import ABCMeta, abstractmethod
-import joblib as serializer
+from contextlib import contextmanager
+from collections import OrderedDict
 from concurrent import futures
 import grpc
 import json
 
-from .stubs.actions_pb2 import BatchActionResponse, OnlineActionResponse, ReloadResponse, HealthCheckResponse
+from .stubs.actions_pb2 import BatchActionResponse, BatchActionProgress, OnlineActionResponse, OnlineActionBatchResponse, ReloadResponse, HealthCheckResponse
 from .stubs import actions_pb2_grpc
-
+from .batching import MicroBatcher
+from .admission import AdmissionController
+from .payloads import decode_payload, encode_payload
+from .cancellation import CancellationToken, aborting_cancelled
+from .persistence import get_background_writer, create_artifacts_version, publish_artifacts_version, discard_artifacts_version
+from .persistence import CURRENT_VERSION
+from .serializers.artifact_codecs import get_codec, read_manifest, write_manifest, parse_compression, replacing_file
+
+from ..common import json_codec
+from ..common.cache import LRUCache, MISSING
+from ..common.metrics import Histogram
+from ..common.utils import generate_key, freeze
 from .._compatibility import six
 from .._logging import get_logger
 
 
 __all__ = ['EngineBaseAction', 'EngineBaseBatchAction', 'EngineBaseOnlineAction']
 logger = get_logger('engine_base_action')
+# one line per sampled online request, see access_log_sample_rate
+access_logger = get_logger('engine_base_access')
+
+# gRPC metadata key of the request id given by the clients, written in the logs of the request
+REQUEST_ID_METADATA = 'x-request-id'
+
+STEP_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 60, 300, 1800)
+
+# compressed: joblib compressed with artifacts_compression (zlib 3 by default),
+#             smaller files but fully decompressed in memory on load.
+# mmap: uncompressed, numpy arrays are memory mapped in read only mode on load.
+ARTIFACTS_FORMATS = ('compressed', 'mmap')
+
+# codecs bound to the artifacts by default, artifacts not listed use joblib
+DEFAULT_ARTIFACTS_CODECS = {'metrics': 'json'}
 
 
 class EngineBaseAction():
@@ -42,8 +75,21 @@ class EngineBaseAction():
     _persistence_mode = None
     _default_root_path = None
     _previous_step = None
+    # the steps executed by _pipeline_execute, see _compile_pipeline
+    _compiled_steps = None
     _is_remote_calling = False
     _local_saved_objects = {}
+    _artifacts_format = 'compressed'
+    _artifacts_compression = 3
+    _artifacts_codecs = {}
+    # writes the artifacts in background, flushed at the end of each execution. The saved
+    # objects are written as they are, so they must not be changed after their assignment
+    _async_persistence = False
+    # versions of the artifacts kept in <root>/<engine>/<version>, 0 keeps a single not versioned copy.
+    # Each batch pipeline execution writes one version, saves made out of an execution write one each
+    _artifacts_versions = 0
+    # version written by the running pipeline, see _artifacts_version_run
+    _artifacts_version_path = None
 
     def __init__(self, **kwargs):
         self.action_name = self.__class__.__name__
@@ -51,33 +97,84 @@ class EngineBaseAction():
         self._persistence_mode = self._get_arg(kwargs=kwargs, arg='persistence_mode', default_value='memory')
         self._default_root_path = self._get_arg(kwargs=kwargs, arg='default_root_path', default_value=os.path.join(os.environ['MARVIN_DATA_PATH'], '.artifacts'))
         self._is_remote_calling = self._get_arg(kwargs=kwargs, arg='is_remote_calling', default_value=False)
+        self._local_saved_objects = {}
+        self._load_lock = threading.Lock()
+        self._execute_latency = Histogram(buckets=STEP_LATENCY_BUCKETS)
+        self._artifacts_format = self._get_setting(kwargs=kwargs, setting='artifacts_format', default_value='compressed')
+
+        if self._artifacts_format not in ARTIFACTS_FORMATS:
+            logger.error("Artifacts format must be one of {}".format(ARTIFACTS_FORMATS))
+            raise ValueError('InvalidArtifactsFormat', self._artifacts_format)
+
+        self._artifacts_compression = parse_compression(self._get_setting(kwargs=kwargs, setting='artifacts_compression', default_value=self._artifacts_compression))
+
+        artifacts_codecs = dict(DEFAULT_ARTIFACTS_CODECS)
+        artifacts_codecs.update(self._artifacts_codecs)
+        artifacts_codecs.update(self._get_setting(kwargs=kwargs, setting='artifacts_codecs', default_value=None) or {})
+        self._artifacts_codecs = dict((artifact.replace('_', ''), codec) for artifact, codec in artifacts_codecs.items())
+
+        self._async_persistence = self._get_setting(kwargs=kwargs, setting='async_persistence', default_value=self._async_persistence)
+        self._artifacts_versions = self._get_setting(kwargs=kwargs, setting='artifacts_versions', default_value=self._artifacts_versions)
+
         logger.debug("Starting {} engine action with {} persistence mode...".format(self.__class__.__name__, self._persistence_mode))
 
     def _get_arg(self, kwargs, arg, default_value=None):
         return kwargs.get(arg, default_value)
 
-    def _get_object_file_path(self, object_reference):
+    def _get_setting(self, kwargs, setting, default_value=None):
+        """Return the setting from the kwargs or, when not informed, from the engine params."""
+        if setting in kwargs:
+            return kwargs[setting]
+
+        if isinstance(self._params, dict):
+            return self._params.get(setting, default_value)
+
+        return default_value
+
+    def _get_artifacts_directory(self):
         engine_name = self.__module__.split('.')[0].replace('marvin_', '').replace('_engine', '')
         directory = os.path.join(self._default_root_path, engine_name)
 
         if not os.path.exists(directory):
             os.makedirs(directory)
 
+        return directory
+
+    def _get_object_file_path(self, object_reference):
+        directory = self._get_artifacts_directory()
+
+        if self._artifacts_versions:
+            directory = self._artifacts_version_path or os.path.join(directory, CURRENT_VERSION)
+
         return os.path.join(directory, "{}".format(object_reference.replace('_', '')))
 
+    def _get_artifact_codec(self, object_file_path):
+        binding = self._artifacts_codecs.get(object_file_path.split(os.sep)[-1])
+
+        if binding is None:
+            if self._artifacts_format == 'mmap':
+                return get_codec('joblib', compress=0, mmap_mode='r')
+            return get_codec('joblib', compress=self._artifacts_compression)
+
+        if isinstance(binding, dict):
+            options = dict(binding)
+            return get_codec(options.pop('codec'), **options)
+
+        return get_codec(binding)
+
     def _serializer_dump(self, obj, object_file_path):
-        if object_file_path.split(os.sep)[-1] == 'metrics':
-            with open(object_file_path, 'w') as f:
-                json.dump(obj, f, sort_keys=True, indent=4, separators=(',', ': '))
-        else:
-            serializer.dump(obj, object_file_path, protocol=2, compress=3)
+        codec = self._get_artifact_codec(object_file_path)
+
+        # written aside and renamed, so readers never find a partially written file. The manifest is
+        # replaced once the dump succeeded and before the artifact, so the new artifact is never read
+        # with the codec of the previous one
+        with replacing_file(object_file_path) as tmp_file_path:
+            codec.dump(obj, tmp_file_path)
+            write_manifest(object_file_path, codec)
 
     def _serializer_load(self, object_file_path):
-        if object_file_path.split(os.sep)[-1] == 'metrics':
-            with open(object_file_path, 'r') as f:
-                return json.load(f)
-        else:
-            return serializer.load(object_file_path)
+        codec = read_manifest(object_file_path) or self._get_artifact_codec(object_file_path)
+        return codec.load(object_file_path)
 
     def _save_obj(self, object_reference, obj):
         if not self._is_remote_calling:
@@ -89,20 +186,104 @@ class EngineBaseAction():
 
         if self._persistence_mode == 'local':
             object_file_path = self._get_object_file_path(object_reference)
-            logger.info("Saving object to {}".format(object_file_path))
-            self._serializer_dump(obj, object_file_path)
-            logger.info("Object {} saved!".format(object_reference))
+
+            if self._async_persistence and self._get_artifact_codec(object_file_path).background_writes:
+                logger.info("Saving object to {} in background".format(object_file_path))
+                # objects are assigned only once, so the original is written without copying it
+                get_background_writer().submit(object_file_path, self._persist_obj, object_reference, obj)
+            else:
+                if self._artifacts_versions and not self._artifacts_version_path:
+                    # the new version must start from the artifacts saved in background before
+                    get_background_writer().flush()
+
+                logger.info("Saving object to {}".format(object_file_path))
+                self._persist_obj(object_reference, obj)
+                logger.info("Object {} saved!".format(object_reference))
+
             self._local_saved_objects[object_reference] = object_file_path
 
+    def _persist_obj(self, object_reference, obj):
+        if not self._artifacts_versions or self._artifacts_version_path:
+            self._serializer_dump(obj, self._get_object_file_path(object_reference))
+            return
+
+        # saves made out of a pipeline execution create a new version with the other artifacts of the current one
+        version_path = create_artifacts_version(self._get_artifacts_directory())
+        self._serializer_dump(obj, os.path.join(version_path, object_reference.replace('_', '')))
+        publish_artifacts_version(version_path, versions_to_keep=self._artifacts_versions)
+
+    def _flush_pending_saves(self):
+        """Wait for the background writes of the objects saved by this action and its previous steps."""
+        if self._previous_step:
+            self._previous_step._flush_pending_saves()
+
+        writer = get_background_writer()
+        for object_file_path in self._local_saved_objects.values():
+            writer.flush(object_file_path)
+
+    @contextmanager
+    def _artifacts_version_run(self):
+        """
+        Write the artifacts saved by the pipeline steps in a single new
+        version, published once the execution ends and all of them are
+        written, or discarded when the execution fails.
+        """
+        if not self._artifacts_versions or self._persistence_mode != 'local':
+            yield
+            return
+
+        directory = self._get_artifacts_directory()
+        steps = [step for step in self._pipeline_steps()
+                 if step._artifacts_versions and step._get_artifacts_directory() == directory]
+
+        # the new version starts from the current artifacts, including the ones being written
+        get_background_writer().flush()
+        version_path = create_artifacts_version(directory)
+
+        for step in steps:
+            step._artifacts_version_path = version_path
+
+        try:
+            yield
+            self._flush_pending_saves()
+            publish_artifacts_version(version_path, versions_to_keep=self._artifacts_versions)
+        except BaseException:
+            try:
+                self._flush_pending_saves()
+            except Exception:
+                pass  # already logged by the background writer
+            discard_artifacts_version(version_path)
+            raise
+        finally:
+            for step in steps:
+                step._artifacts_version_path = None
+
+    def _read_obj(self, object_reference):
+        object_file_path = self._get_object_file_path(object_reference)
+        # the file may still be being written by the background writer
+        get_background_writer().flush(object_file_path)
+        logger.info("Loading object from {}".format(object_file_path))
+        obj = self._serializer_load(object_file_path)
+        logger.info("Object {} loaded!".format(object_reference))
+        return obj
+
     def _load_obj(self, object_reference, force=False):
         if (getattr(self, object_reference, None) is None and self._persistence_mode == 'local') or force:
-            object_file_path = self._get_object_file_path(object_reference)
-            logger.info("Loading object from {}".format(object_file_path))
-            setattr(self, object_reference, self._serializer_load(object_file_path))
-            logger.info("Object {} loaded!".format(object_reference))
+            # concurrent requests of a not loaded object wait for a single load
+            with self._load_lock:
+                if (getattr(self, object_reference, None) is None and self._persistence_mode == 'local') or force:
+                    setattr(self, object_reference, self._read_obj(object_reference))
 
         return getattr(self, object_reference)
 
+    def _get_object_reference(self, artifact):
+        """Return the attribute of an artifact name as listed in engine.metadata (eg. initialdataset -> _initial_dataset)."""
+        for name in dir(self):
+            if name.startswith('_') and not name.startswith('__') and name.replace('_', '') == artifact:
+                return name
+
+        return '_{}'.format(artifact)
+
     def _release_local_saved_objects(self):
         for object_reference in self._local_saved_objects.keys():
             logger.info("Removing object {} from memory..".format(object_reference))
@@ -113,7 +294,9 @@ class EngineBaseAction():
     @classmethod
     def retrieve_obj(self, object_file_path):
         logger.info("Retrieve object from {}".format(object_file_path))
-        return serializer.load(object_file_path)
+        get_background_writer().flush(object_file_path)
+        codec = read_manifest(object_file_path) or get_codec('joblib')
+        return codec.load(object_file_path)
 
     def _remote_reload(self, request, context):
         protocol = request.protocol
@@ -124,8 +307,15 @@ class EngineBaseAction():
         message = "Reloaded"
 
         if artifacts:
-            for artifact in artifacts.split(","):
-                self._load_obj(object_reference=artifact, force=True)
+            # the new objects are fully loaded aside while the requests keep using
+            # the current ones, then all of them are swapped at once
+            loaded_objects = [(artifact, self._read_obj(artifact)) for artifact in artifacts.split(",")]
+
+            with self._load_lock:
+                for artifact, obj in loaded_objects:
+                    setattr(self, artifact, obj)
+
+            self._clear_caches()
 
         else:
             message = "Nothing to reload"
@@ -135,6 +325,52 @@ class EngineBaseAction():
         logger.info("Return final results to the client!")
         return response_message
 
+    def _clear_caches(self):
+        """Drop the results computed with the previous artifacts, called after each reload of this action artifacts."""
+        pass
+
+    def _compile_pipeline(self):
+        """
+        Flatten the _previous_step chain in the list of steps executed in a
+        loop by _pipeline_execute, called once when the server is created.
+        Not compiled pipelines walk the chain on each execution.
+        """
+        self._compiled_steps = None
+        self._compiled_steps = self._pipeline_steps()
+        return self._compiled_steps
+
+    def _pipeline_steps(self):
+        if self._compiled_steps is not None:
+            return self._compiled_steps
+
+        steps = []
+        step = self
+        while step is not None:
+            steps.append(step)
+            step = step._previous_step
+
+        steps.reverse()
+        return steps
+
+    def _timed(self, method, *args, **kwargs):
+        started_at = time.time()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            self._execute_latency.observe(time.time() - started_at)
+
+    def _pipeline_stats(self):
+        """Return the execute latency histogram of each step in the pipeline."""
+        return OrderedDict((step.action_name, step._execute_latency.snapshot()) for step in self._pipeline_steps())
+
+    def _parse_params(self, raw_params):
+        return json_codec.loads(raw_params) if raw_params else self._params
+
+    @staticmethod
+    def _execute_kwargs(cancellation):
+        # the token is only given to calls that can be cancelled, dry runs and warm ups keep the plain calls
+        return {'cancellation': cancellation} if cancellation is not None else {}
+
     def _health_check(self, request, context):
         logger.info("Received message from client with protocol health check [{}] artifacts...".format(request.artifacts))
         try:
@@ -152,25 +388,68 @@ class EngineBaseAction():
 class EngineBaseBatchAction(EngineBaseAction):
     __metaclass__ = ABCMeta
 
+    _progress_listener = None
+
     @abstractmethod
     def execute(self, params, **kwargs):
         pass
 
-    def _pipeline_execute(self, params):
+    def report_progress(self, progress=0.0, message="", metrics=None):
+        """
+        Send the execute progress (from 0 to 1), a message and partial
+        metrics to the callers of _remote_execute_stream. Does nothing when
+        the action is not executed by a stream, raises
+        ValueError('ExecutionCancelled', action_name) when the caller
+        cancelled the stream.
+        """
+        self._emit_progress("progress", progress=progress, message=message, metrics=metrics)
+
+    def _emit_progress(self, event, progress=0.0, message="", metrics=None):
+        if self._progress_listener is not None:
+            self._progress_listener(BatchActionProgress(action=self.action_name, event=event, progress=progress, message=message,
+                                                        metrics=json_codec.dumps(metrics) if metrics else ""))
+
+    def _set_progress_listener(self, listener):
+        self._progress_listener = listener
+
         if self._previous_step:
-            self._previous_step._pipeline_execute(params)
+            self._previous_step._set_progress_listener(listener)
+
+    def _pipeline_execute(self, params, cancellation=None):
+        for step in self._pipeline_steps():
+            if cancellation is not None:
+                cancellation.raise_if_cancelled(step.action_name)
 
-        logger.info("Start of the {} execute method!".format(self.action_name))
-        self.execute(params)
-        logger.info("Finish of the {} execute method!".format(self.action_name))
+            logger.info("Start of the {} execute method!".format(step.action_name))
+            step._emit_progress("started")
+            started_at = time.time()
+            step._timed(step.execute, params, **self._execute_kwargs(cancellation))
+            step._emit_progress("finished", progress=1.0)
+            logger.info("Finish of the {} execute method in {:.3f}s!".format(step.action_name, time.time() - started_at))
+
+    def _execute_with_progress(self, params, listener, cancellation=None):
+        self._set_progress_listener(listener)
+
+        try:
+            with self._artifacts_version_run():
+                self._pipeline_execute(params=params, **self._execute_kwargs(cancellation))
+                self._flush_pending_saves()
+
+            self._release_local_saved_objects()
+        finally:
+            self._set_progress_listener(None)
 
     def _remote_execute(self, request, context):
         logger.info("Received message from client and sending to engine action...")
-        logger.debug("Received Params: {}".format(request.params))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Received Params: {}".format(request.params))
 
-        params = json.loads(request.params) if request.params else self._params
+        params = self._parse_params(request.params)
+        cancellation = CancellationToken.from_context(context)
 
-        self._pipeline_execute(params=params)
+        with aborting_cancelled(context), self._artifacts_version_run():
+            self._pipeline_execute(params=params, **self._execute_kwargs(cancellation))
+            self._flush_pending_saves()
 
         self._release_local_saved_objects()
 
@@ -180,7 +459,56 @@ class EngineBaseBatchAction(EngineBaseAction):
         logger.info("Return final results to the client!")
         return response_message
 
+    def _remote_execute_stream(self, request, context):
+        """
+        Execute the pipeline like _remote_execute sending the started,
+        progress and finished events of each step while it runs, and a last
+        done event. Cancelling the stream or reaching its deadline makes the
+        next report_progress call of the running step raise
+        ValueError('ExecutionCancelled', ...) or ValueError('DeadlineExceeded', ...).
+        """
+        logger.info("Received streaming message from client and sending to engine action...")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Received Params: {}".format(request.params))
+
+        params = self._parse_params(request.params)
+
+        events = six.moves.queue.Queue()
+        cancellation = CancellationToken.from_context(context) or CancellationToken()
+        errors = []
+
+        def listener(event):
+            cancellation.raise_if_cancelled(event.action)
+            events.put(event)
+
+        def run():
+            try:
+                self._execute_with_progress(params=params, listener=listener, cancellation=cancellation)
+            except Exception:
+                logger.exception("Error executing {} pipeline".format(self.action_name))
+                errors.append(sys.exc_info())
+            finally:
+                events.put(None)
+
+        thread = threading.Thread(target=run, name='marvin-{}-stream'.format(self.action_name))
+        thread.daemon = True
+        thread.start()
+
+        for event in iter(events.get, None):
+            yield event
+
+        thread.join()
+
+        if errors:
+            with aborting_cancelled(context):
+                six.reraise(*errors[0])
+
+        logger.info("Return final results to the client!")
+        yield BatchActionProgress(action=self.action_name, event="done", progress=1.0, message="Done")
+
     def _prepare_remote_server(self, port, workers, rpc_workers):
+        self._compile_pipeline()
+
         server = grpc.server(thread_pool=futures.ThreadPoolExecutor(max_workers=workers), maximum_concurrent_rpcs=rpc_workers)
         actions_pb2_grpc.add_BatchActionHandlerServicer_to_server(self, server)
         server.add_insecure_port('[::]:{}'.format(port))
@@ -190,40 +518,390 @@ class EngineBaseBatchAction(EngineBaseAction):
 class EngineBaseOnlineAction(EngineBaseAction):
     __metaclass__ = ABCMeta
 
+    _batcher = None
+    _admission = None
+    # seconds between the logs of the pipeline steps latencies, 0 disables them
+    _pipeline_stats_interval = 60
+    # results kept by the prediction cache, 0 disables it
+    _prediction_cache_size = 0
+    # seconds a cached result is valid, None keeps it until evicted or reloaded
+    _prediction_cache_ttl = None
+    # results of this step execute kept by input message, for deterministic steps (eg. a preparator), 0 disables it
+    _step_cache_size = 0
+    # seconds a step result is valid, None keeps it until evicted
+    _step_cache_ttl = None
+    # parsed request params kept by their raw string and shared read only by the requests, 0 disables it
+    _params_cache_size = 0
+    # fraction of the requests written to the access log, 0 disables it
+    _access_log_sample_rate = 0.0
+
+    def __init__(self, **kwargs):
+        super(EngineBaseOnlineAction, self).__init__(**kwargs)
+        self._last_stats_report = time.time()
+
+        self._prediction_cache_size = self._get_setting(kwargs=kwargs, setting='prediction_cache_size', default_value=self._prediction_cache_size)
+        self._prediction_cache_ttl = self._get_setting(kwargs=kwargs, setting='prediction_cache_ttl', default_value=self._prediction_cache_ttl)
+        self._prediction_cache = LRUCache(max_size=self._prediction_cache_size, ttl=self._prediction_cache_ttl) if self._prediction_cache_size else None
+
+        # step caches are declared by each action class, the params are shared by all the steps
+        self._step_cache_size = self._get_arg(kwargs=kwargs, arg='step_cache_size', default_value=self._step_cache_size)
+        self._step_cache_ttl = self._get_arg(kwargs=kwargs, arg='step_cache_ttl', default_value=self._step_cache_ttl)
+        self._step_cache = LRUCache(max_size=self._step_cache_size, ttl=self._step_cache_ttl) if self._step_cache_size else None
+
+        # the engine executor sends the same params on every request, so they are parsed once and shared read only
+        self._params_cache_size = self._get_setting(kwargs=kwargs, setting='params_cache_size', default_value=self._params_cache_size)
+        self._params_cache = LRUCache(max_size=self._params_cache_size) if self._params_cache_size else None
+
+        self._access_log_sample_rate = float(self._get_setting(kwargs=kwargs, setting='access_log_sample_rate', default_value=self._access_log_sample_rate))
+
     @abstractmethod
     def execute(self, input_message, params, **kwargs):
         pass
 
-    def _pipeline_execute(self, input_message, params):
-        if self._previous_step:
-            input_message = self._previous_step._pipeline_execute(input_message, params)
+    def execute_batch(self, input_messages, params, **kwargs):
+        """
+        Return a list with one result for each one of the input messages.
+        Override this method to process all messages at once (eg. a single
+        vectorized model predict call), by default execute is called for
+        each message.
+        """
+        return [self.execute(input_message, params, **kwargs) for input_message in input_messages]
+
+    def _pipeline_execute(self, input_message, params, cancellation=None, request_id=None):
+        for step in self._pipeline_steps():
+            if cancellation is not None:
+                cancellation.raise_if_cancelled(step.action_name)
+
+            started_at = time.time()
+            input_message = step._execute_step(input_message, params, cancellation)
+
+            self._log_step(step, started_at, request_id)
+
+        self._report_pipeline_stats()
+        return input_message
+
+    def _pipeline_execute_batch(self, input_messages, params, cancellation=None, request_id=None):
+        for step in self._pipeline_steps():
+            if cancellation is not None:
+                cancellation.raise_if_cancelled(step.action_name)
+
+            started_at = time.time()
+            input_messages = step._execute_batch_step(input_messages, params, cancellation)
+
+            self._log_step(step, started_at, request_id, messages=len(input_messages))
+
+        self._report_pipeline_stats()
+        return input_messages
+
+    def _log_step(self, step, started_at, request_id, messages=1):
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+
+        duration = time.time() - started_at
+        logger.debug("Finish of the {} step of request {} in {:.3f}s!".format(step.action_name, request_id, duration),
+                     extra={'action': self.action_name, 'step': step.action_name, 'request_id': request_id, 'messages': messages,
+                            'duration': duration})
+
+    def _report_pipeline_stats(self):
+        if self._pipeline_stats_interval and time.time() - self._last_stats_report >= self._pipeline_stats_interval:
+            self._last_stats_report = time.time()
+            logger.info("Pipeline stats for {}: {}".format(self.action_name, dict(self._pipeline_stats())))
+
+    def _execute_step(self, input_message, params, cancellation=None):
+        cache_key, message = self._cache_lookup(self._step_cache, input_message, params)
+        if message is not MISSING:
+            return message
+
+        message = self._timed(self.execute, input_message, params, **self._execute_kwargs(cancellation))
+
+        self._cache_store(self._step_cache, cache_key, message)
+
+        return message
+
+    def _execute_batch_step(self, input_messages, params, cancellation=None):
+        lookups = [self._cache_lookup(self._step_cache, input_message, params) for input_message in input_messages]
+        missing = [index for index, (_, message) in enumerate(lookups) if message is MISSING]
+        missing_messages = [input_messages[index] for index in missing]
+
+        messages = list(self._timed(self.execute_batch, missing_messages, params, **self._execute_kwargs(cancellation))) if missing_messages else []
+
+        if len(messages) != len(missing_messages):
+            logger.error("Action {} returned {} results for {} messages".format(self.action_name, len(messages), len(missing_messages)))
+            raise ValueError('BatchSizeMismatch', self.action_name, len(missing_messages), len(messages))
+
+        results = [message for _, message in lookups]
+        for index, message in zip(missing, messages):
+            results[index] = message
+
+            self._cache_store(self._step_cache, lookups[index][0], message)
+
+        return results
+
+    def _warm_up(self, artifacts=None, messages=None, iterations=0, params=None):
+        """
+        Load the artifacts and execute the pipeline with the first messages, so
+        the deserialization and first call costs are not paid by the first real
+        requests. Failures are logged and the remaining loads happen on demand.
+        """
+        params = self._params if params is None else params
+
+        for artifact in artifacts or []:
+            try:
+                self._load_obj(object_reference=self._get_object_reference(artifact))
+            except Exception as e:
+                logger.warning("Artifact {} not loaded in warm up, it will be loaded on first use: {}".format(artifact, e))
+
+        messages = list(messages or [])
+        if not messages:
+            return
+
+        started_at = time.time()
+        for iteration in range(iterations):
+            try:
+                self._pipeline_execute(input_message=messages[iteration % len(messages)], params=params)
+            except Exception:
+                logger.exception("Error executing warm up message {}".format(iteration % len(messages)))
 
-        logger.info("Start of the {} execute method!".format(self.action_name))
-        return self.execute(input_message, params)
-        logger.info("Finish of the {} execute method!".format(self.action_name))
+        logger.info("{} warm up messages executed in {:.3f}s".format(iterations, time.time() - started_at))
+
+    @staticmethod
+    def _cache_lookup(cache, input_message, params):
+        """
+        Return the cache key of the message and its cached result, MISSING
+        when not cached. The key is None when the cache is disabled or the
+        message has no canonical JSON form (eg. numpy payloads), otherwise it
+        also holds the cache generation, see _cache_store.
+        """
+        if cache is None:
+            return None, MISSING
+
+        # read before the lookup, a reload clearing the cache while the result is computed changes it
+        generation = cache.generation
+
+        # the strict standard library encoder, so numpy arrays or datetimes never share the key of their JSON form
+        try:
+            cache_key = generate_key(json.dumps([input_message, params], sort_keys=True, separators=(',', ':')))
+        except (TypeError, ValueError):
+            return None, MISSING
+
+        return (cache_key, generation), cache.get(cache_key)
+
+    @staticmethod
+    def _cache_store(cache, cache_key, message):
+        """
+        Store the result of a _cache_lookup miss, unless the cache was cleared
+        since the lookup (the result may come from the reloaded artifacts).
+        """
+        if cache_key is not None:
+            key, generation = cache_key
+            cache.set(key, message, generation=generation)
+
+    def _prediction_cache_lookup(self, input_message, params):
+        return self._cache_lookup(self._prediction_cache, input_message, params)
+
+    def _cache_stats(self):
+        """Return the stats of the prediction cache and of the cache of each step in the pipeline."""
+        stats = self._previous_step._cache_stats() if self._previous_step else {}
+
+        if self._step_cache is not None:
+            stats[self.action_name] = self._step_cache.stats()
+        if self._prediction_cache is not None:
+            stats['prediction'] = self._prediction_cache.stats()
+
+        return stats
+
+    def _clear_caches(self):
+        # the caches of the previous steps do not depend on the artifacts reloaded in this action
+        logger.info("Clearing the {} caches: {}".format(self.action_name, self._cache_stats()))
+
+        for cache in (self._prediction_cache, self._step_cache):
+            if cache is not None:
+                cache.clear()
+
+    def _parse_params(self, raw_params):
+        if self._params_cache is None:
+            return super(EngineBaseOnlineAction, self)._parse_params(raw_params)
+
+        # requests without params share the default ones, read only like any other cached params
+        params = self._params_cache.get(raw_params or '')
+        if params is MISSING:
+            params = freeze(json_codec.loads(raw_params) if raw_params else self._params)
+            self._params_cache.set(raw_params or '', params)
+
+        return params
+
+    @staticmethod
+    def _parse_message(raw_message):
+        return json_codec.loads(raw_message) if raw_message else None
+
+    @staticmethod
+    def _serialize_message(message):
+        if type(message) != str:
+            message = json_codec.dumps(message)
+
+        return message
+
+    def _parse_request_message(self, request):
+        if request.content_type:
+            return decode_payload(request.payload, request.content_type)
+
+        return self._parse_message(request.message)
+
+    def _build_response(self, message, content_type=None):
+        if content_type:
+            try:
+                return OnlineActionResponse(payload=encode_payload(message, content_type), content_type=content_type)
+            except ValueError as e:
+                if e.args[0] != 'UnencodableMessage':
+                    raise
+                # the client tells the responses apart by their empty content type
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Returning the {} result as JSON: {}".format(self.action_name, e.args[2]))
+
+        return OnlineActionResponse(message=self._serialize_message(message))
+
+    @staticmethod
+    def _request_id(context, index=None):
+        """
+        Return the x-request-id metadata sent by the client, followed by the
+        index of the message for streams, or a new random id.
+        """
+        if context is not None:
+            for key, value in context.invocation_metadata() or ():
+                if key == REQUEST_ID_METADATA:
+                    return value if index is None else '{}.{}'.format(value, index)
+
+        return uuid.uuid4().hex
+
+    @contextmanager
+    def _access_logged(self, rpc, request_id, messages=1):
+        """
+        Write one access log line, with the duration and the outcome, for
+        the sampled requests, replacing the per request info logs.
+        """
+        if not self._access_log_sample_rate or random.random() >= self._access_log_sample_rate:
+            yield
+            return
+
+        started_at = time.time()
+        status = 'OK'
+        try:
+            yield
+        except BaseException as e:
+            status = e.__class__.__name__
+            raise
+        finally:
+            duration = time.time() - started_at
+            access_logger.info("{} {} {} request_id={} messages={} duration={:.3f}ms".format(
+                self.action_name, rpc, status, request_id, messages, duration * 1000),
+                extra={'action': self.action_name, 'rpc': rpc, 'status': status, 'request_id': request_id, 'messages': messages,
+                       'duration': duration})
+
+    @contextmanager
+    def _admitted(self, context):
+        if self._admission is None:
+            yield
+        else:
+            with self._admission.admitted(context):
+                yield
 
     def _remote_execute(self, request, context):
-        logger.info("Received message from client and sending to engine action...")
-        logger.debug("Received Params: {}".format(request.params))
-        logger.debug("Received Message: {}".format(request.message))
+        request_id = self._request_id(context)
 
-        input_message = json.loads(request.message) if request.message else None
-        params = json.loads(request.params) if request.params else self._params
+        with self._access_logged('execute', request_id), self._admitted(context), aborting_cancelled(context):
+            return self._execute_request(request, cancellation=CancellationToken.from_context(context), request_id=request_id)
 
-        _message = self._pipeline_execute(input_message=input_message, params=params)
+    def _execute_request(self, request, cancellation=None, request_id=None):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Received request {} with Params: {}".format(request_id, request.params), extra={'request_id': request_id})
+            logger.debug("Received Message: {}".format(request.message or "{} bytes of {}".format(len(request.payload), request.content_type)),
+                         extra={'request_id': request_id})
 
-        logger.info("Handling returned message from engine action...")
+        input_message = self._parse_request_message(request)
+        params = self._parse_params(request.params)
 
-        if type(_message) != str:
-            _message = json.dumps(_message)
+        cache_key, _message = self._prediction_cache_lookup(input_message, params)
 
-        response_message = OnlineActionResponse(message=_message)
+        if _message is not MISSING:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Returning cached result of the {} pipeline".format(self.action_name), extra={'request_id': request_id})
 
-        logger.info("Return final results to the client!")
-        return response_message
+        else:
+            if self._batcher:
+                # batched messages run together, so the token is only checked before joining a batch
+                if cancellation is not None:
+                    cancellation.raise_if_cancelled(self.action_name)
+                _message = self._batcher.submit(input_message=input_message, params=params, key=request.params)
+            else:
+                _message = self._pipeline_execute(input_message=input_message, params=params, request_id=request_id,
+                                                  **self._execute_kwargs(cancellation))
 
-    def _prepare_remote_server(self, port, workers, rpc_workers):
-        server = grpc.server(thread_pool=futures.ThreadPoolExecutor(max_workers=workers), maximum_concurrent_rpcs=rpc_workers)
+            self._cache_store(self._prediction_cache, cache_key, _message)
+
+        return self._build_response(_message, request.content_type)
+
+    def _remote_execute_stream(self, request_iterator, context):
+        """
+        Execute each message received in the stream and send back the
+        results in the same order, one stream keeps a single connection and
+        handler for any number of messages.
+        """
+        logger.info("Opened messages stream from client...")
+
+        cancellation = CancellationToken.from_context(context)
+
+        count = 0
+        for request in request_iterator:
+            request_id = self._request_id(context, index=count)
+
+            with self._access_logged('execute_stream', request_id), self._admitted(context), aborting_cancelled(context):
+                response_message = self._execute_request(request, cancellation=cancellation, request_id=request_id)
+            yield response_message
+            count += 1
+
+        logger.info("Closed messages stream from client after {} messages!".format(count))
+
+    def _remote_execute_batch(self, request, context):
+        request_id = self._request_id(context)
+
+        with self._access_logged('execute_batch', request_id, messages=len(request.messages)), self._admitted(context), aborting_cancelled(context):
+            return self._execute_batch_request(request, cancellation=CancellationToken.from_context(context), request_id=request_id)
+
+    def _execute_batch_request(self, request, cancellation=None, request_id=None):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Received batch request {} with {} messages and Params: {}".format(request_id, len(request.messages), request.params),
+                         extra={'request_id': request_id})
+
+        input_messages = [self._parse_message(message) for message in request.messages]
+        params = self._parse_params(request.params)
+
+        _messages = self._pipeline_execute_batch(input_messages=input_messages, params=params, request_id=request_id,
+                                                 **self._execute_kwargs(cancellation))
+
+        return OnlineActionBatchResponse(messages=[self._serialize_message(_message) for _message in _messages])
+
+    def _prepare_remote_server(self, port, workers, rpc_workers, max_batch_size=1, max_batch_wait=0.002, reuse_port=False,
+                               max_queue_depth=0, max_queue_time=0):
+        self._compile_pipeline()
+
+        if max_batch_size > 1:
+            logger.info("Enabling micro batching with batches up to {} messages and {}s of wait".format(max_batch_size, max_batch_wait))
+            self._batcher = MicroBatcher(action=self, max_batch_size=max_batch_size, max_batch_wait=max_batch_wait)
+
+        threads = workers
+        if max_queue_depth > 0:
+            logger.info("Enabling admission control with {} queued requests and {}s of queue time".format(max_queue_depth, max_queue_time))
+            self._admission = AdmissionController(concurrency=workers, max_queue_depth=max_queue_depth, max_queue_time=max_queue_time)
+            # gRPC refuses the requests beyond maximum_concurrent_rpcs before they reach the admission control, that
+            # would leave its queue empty (eg. with the default rpc_workers == workers), so it admits the queue and
+            # as many requests to shed (and count) as there are workers. Every accepted request gets a thread, the
+            # queued ones wait in the admission control instead of the invisible thread pool queue
+            rpc_workers = threads = max(rpc_workers, 2 * workers + max_queue_depth)
+
+        # SO_REUSEPORT lets many processes listen in the same port, the kernel balances the connections
+        options = [('grpc.so_reuseport', 1)] if reuse_port else None
+
+        server = grpc.server(thread_pool=futures.ThreadPoolExecutor(max_workers=threads), maximum_concurrent_rpcs=rpc_workers, options=options)
         actions_pb2_grpc.add_OnlineActionHandlerServicer_to_server(self, server)
         server.add_insecure_port('[::]:{}'.format(port))
         return server
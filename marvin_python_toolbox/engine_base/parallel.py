@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2017] [B2W Digital]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Parallel fan-out of independent online pipeline steps.
+
+A list inside the `pipeline` of an action in engine.metadata is a group of
+independent steps executed concurrently with the same input message, their
+outputs are merged before the next step:
+
+    "pipeline": [["ppreparator", "UserFeatures", "ItemFeatures"]]
+
+The steps run in threads, so the fan-out pays off for I/O bound steps (eg.
+feature store lookups) and numpy/native code releasing the GIL. Steps in a
+group must have plain (not async) execute methods.
+"""
+
+import os
+import threading
+from concurrent import futures
+
+from .engine_base_action import EngineBaseOnlineAction
+from .._logging import get_logger
+
+
+__all__ = ['ParallelStep', 'merge_outputs']
+logger = get_logger('engine_base_parallel')
+
+
+def merge_outputs(outputs, names):
+    """
+    Merge the outputs of the parallel steps: dicts are merged in a single
+    dict (a key returned by two steps raises
+    ValueError('ConflictingStepOutputs', key, names)), any other outputs
+    are returned as a list in the steps order.
+    """
+    if not all(isinstance(output, dict) for output in outputs):
+        return list(outputs)
+
+    merged = {}
+    for output in outputs:
+        for key in output:
+            if key in merged:
+                raise ValueError('ConflictingStepOutputs', key, names)
+        merged.update(output)
+
+    return merged
+
+
+class ParallelStep(EngineBaseOnlineAction):
+    """
+    Online pipeline step executing a group of independent steps
+    concurrently with the same input and merging their outputs.
+
+    The first step runs in the calling thread and the others in a thread
+    pool, max_workers should allow every concurrent request to run its
+    len(steps) - 1 pool tasks (MarvinEngineServer uses the number of gRPC
+    workers times that).
+    """
+
+    def __init__(self, steps, max_workers=None, **kwargs):
+        for step in steps:
+            if not isinstance(step, EngineBaseOnlineAction):
+                raise ValueError('InvalidParallelStep', step.__class__.__name__)
+
+        super(ParallelStep, self).__init__(**kwargs)
+
+        self.steps = list(steps)
+        self.action_name = "Parallel({})".format(",".join(step.action_name for step in self.steps))
+        self._max_workers = max_workers or max(len(self.steps) - 1, 1)
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self):
+        # created per process, the pool threads started before a fork (eg. by the warm up
+        # of the MultiProcessServer workers) do not exist in the child process
+        if self._executor_pid != os.getpid():
+            with self._executor_lock:
+                if self._executor_pid != os.getpid():
+                    self._executor = futures.ThreadPoolExecutor(max_workers=self._max_workers)
+                    self._executor_pid = os.getpid()
+
+        return self._executor
+
+    def _fan_out(self, method, input_message, params, kwargs):
+        executor = self._get_executor()
+        pending = [executor.submit(getattr(step, method), input_message, params, **kwargs) for step in self.steps[1:]]
+        outputs = [getattr(self.steps[0], method)(input_message, params, **kwargs)]
+        outputs.extend(future.result() for future in pending)
+        return outputs
+
+    def execute(self, input_message, params, **kwargs):
+        outputs = self._fan_out('_pipeline_execute', input_message, params, kwargs)
+        return merge_outputs(outputs, [step.action_name for step in self.steps])
+
+    def execute_batch(self, input_messages, params, **kwargs):
+        outputs = self._fan_out('_pipeline_execute_batch', input_messages, params, kwargs)
+        names = [step.action_name for step in self.steps]
+        return [merge_outputs(message_outputs, names) for message_outputs in zip(*outputs)]
+
+    def _cache_stats(self):
+        stats = super(ParallelStep, self)._cache_stats()
+        for step in self.steps:
+            stats.update(step._cache_stats())
+        return stats
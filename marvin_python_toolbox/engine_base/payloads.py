@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2017] [B2W Digital]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Binary payload encodings of the online actions messages.
+
+Requests with a content type other than JSON carry the message in the
+`payload` bytes field of OnlineActionRequest, the response is encoded with
+the same content type in OnlineActionResponse.payload. Requests without a
+content type keep using the JSON `message` string, as do the responses
+whose result can not be encoded in the request content type (eg. a dict
+returned for an Arrow request), their content_type is empty.
+
+Supported content types:
+
+    application/json                     any JSON value
+    application/msgpack                  any msgpack value (needs msgpack)
+    application/x-numpy                  a numpy array in the .npy format
+    application/vnd.apache.arrow.stream  a pyarrow Table in the Arrow IPC stream format (needs pyarrow)
+"""
+
+import io
+
+from ..common import json_codec
+from .._logging import get_logger
+
+
+__all__ = ['JSON', 'MSGPACK', 'NUMPY', 'ARROW', 'CONTENT_TYPES', 'decode_payload', 'encode_payload']
+logger = get_logger('engine_base_payloads')
+
+JSON = 'application/json'
+MSGPACK = 'application/msgpack'
+NUMPY = 'application/x-numpy'
+ARROW = 'application/vnd.apache.arrow.stream'
+
+CONTENT_TYPES = (JSON, MSGPACK, NUMPY, ARROW)
+
+
+def _decode_json(payload):
+    return json_codec.loads(payload)
+
+
+def _encode_json(message):
+    return json_codec.dumpb(message)
+
+
+def _decode_msgpack(payload):
+    import msgpack
+
+    return msgpack.unpackb(payload, raw=False)
+
+
+def _encode_msgpack(message):
+    import msgpack
+
+    return msgpack.packb(message, use_bin_type=True)
+
+
+def _decode_numpy(payload):
+    import numpy as np
+
+    # never unpickle objects sent by clients
+    return np.load(io.BytesIO(payload), allow_pickle=False)
+
+
+def _encode_numpy(message):
+    import numpy as np
+
+    buffer = io.BytesIO()
+    np.save(buffer, np.asarray(message), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def _decode_arrow(payload):
+    import pyarrow as pa
+
+    return pa.ipc.open_stream(pa.py_buffer(payload)).read_all()
+
+
+def _encode_arrow(message):
+    import pyarrow as pa
+
+    if isinstance(message, pa.RecordBatch):
+        message = pa.Table.from_batches([message])
+
+    if not isinstance(message, pa.Table):
+        raise TypeError('{} is not an Arrow Table or RecordBatch'.format(type(message).__name__))
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, message.schema) as writer:
+        writer.write_table(message)
+    return sink.getvalue().to_pybytes()
+
+
+_DECODERS = {JSON: _decode_json, MSGPACK: _decode_msgpack, NUMPY: _decode_numpy, ARROW: _decode_arrow}
+_ENCODERS = {JSON: _encode_json, MSGPACK: _encode_msgpack, NUMPY: _encode_numpy, ARROW: _encode_arrow}
+
+
+def _codec(codecs, content_type):
+    try:
+        return codecs[content_type]
+    except KeyError:
+        raise ValueError('UnsupportedContentType', content_type)
+
+
+def decode_payload(payload, content_type):
+    """Return the message encoded in the payload bytes, empty payloads decode to None."""
+    if not payload:
+        return None
+
+    return _codec(_DECODERS, content_type)(payload)
+
+
+def encode_payload(message, content_type):
+    """
+    Return the message encoded as payload bytes of the given content type,
+    raises ValueError('UnencodableMessage', content_type, error) when the
+    message has no representation in that content type.
+    """
+    encoder = _codec(_ENCODERS, content_type)
+
+    try:
+        return encoder(message)
+    except (TypeError, ValueError) as e:
+        raise ValueError('UnencodableMessage', content_type, str(e))
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2017] [B2W Digital]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+import sys
+import uuid
+import errno
+import atexit
+import shutil
+import datetime
+import threading
+from concurrent import futures
+
+from .._compatibility import six
+from .._logging import get_logger
+
+
+__all__ = ['BackgroundWriter', 'get_background_writer', 'create_artifacts_version', 'publish_artifacts_version',
+           'discard_artifacts_version', 'list_artifacts_versions', 'fsync_path']
+logger = get_logger('engine_base_persistence')
+
+# pointer to the artifacts version in use, in versioned engine directories
+CURRENT_VERSION = 'current'
+
+
+def fsync_path(path):
+    """
+    Flush a file, or the entries of a directory, to the disk.
+
+    Renames are only durable once the directory holding them is synced too.
+    Directories can't be opened on windows, where they are left to the OS.
+    """
+    if os.path.isdir(path) and os.name == 'nt':
+        return
+
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class BackgroundWriter(object):
+    """
+    Runs the artifacts writes in background threads.
+
+    Each write is tracked by the artifact file path until flush is called, so
+    readers can wait for a pending write of the file before loading it. Writes
+    of the same file are always executed in submission order.
+    """
+
+    def __init__(self, max_workers=1):
+        self._executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, *args, **kwargs):
+        # a new version of the file can't be written before the previous one
+        self.flush(key)
+
+        future = self._executor.submit(fn, *args, **kwargs)
+        with self._lock:
+            self._pending[key] = future
+
+        return future
+
+    def is_pending(self, key):
+        with self._lock:
+            return key in self._pending
+
+    def flush(self, key=None):
+        """Wait for the pending writes (or only the one of key) and raise the first error found."""
+        with self._lock:
+            if key is None:
+                pending = list(self._pending.items())
+            elif key in self._pending:
+                pending = [(key, self._pending[key])]
+            else:
+                pending = []
+
+        error = None
+        for pending_key, future in pending:
+            try:
+                future.result()
+            except Exception:
+                logger.exception("Error writing {} in background".format(pending_key))
+                error = error or sys.exc_info()
+            finally:
+                with self._lock:
+                    if self._pending.get(pending_key) is future:
+                        del self._pending[pending_key]
+
+        if error is not None:
+            six.reraise(*error)
+
+    def close(self):
+        self.flush()
+        self._executor.shutdown()
+
+
+_background_writer = None
+_background_writer_lock = threading.Lock()
+
+
+def _flush_at_exit(writer):
+    # last chance to report writes nobody waited for, the errors are already logged by flush
+    try:
+        writer.flush()
+    except Exception:
+        pass
+
+
+def get_background_writer():
+    """Return the writer shared by all actions of the process, so any action can wait for a file written by another one."""
+    global _background_writer
+
+    with _background_writer_lock:
+        if _background_writer is None:
+            _background_writer = BackgroundWriter()
+            atexit.register(_flush_at_exit, _background_writer)
+
+    return _background_writer
+
+
+def _is_version(directory, name):
+    return not name.startswith('.') and name != CURRENT_VERSION and os.path.isdir(os.path.join(directory, name))
+
+
+def list_artifacts_versions(directory):
+    """Return the versions of the engine directory, from the oldest to the newest."""
+    if not os.path.isdir(directory):
+        return []
+
+    return sorted(name for name in os.listdir(directory) if _is_version(directory, name))
+
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except (OSError, AttributeError):
+        # file systems (or platforms) without hard links
+        shutil.copy2(src, dst)
+
+
+def create_artifacts_version(directory):
+    """
+    Create a new version directory inside the engine directory and return its path.
+
+    The new version starts with the artifacts of the current one (or with the
+    artifacts of a not versioned engine directory), hard linked instead of
+    copied, so writing an artifact in it never changes the previous versions.
+    """
+    while True:
+        version = '{:%Y%m%d%H%M%S%f}'.format(datetime.datetime.utcnow())
+        version_path = os.path.join(directory, version)
+        try:
+            os.makedirs(version_path)
+            break
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+    current_path = os.path.join(directory, CURRENT_VERSION)
+    source = current_path if os.path.isdir(current_path) else directory
+
+    for name in os.listdir(source):
+        path = os.path.join(source, name)
+        if not name.startswith('.') and os.path.isfile(path):
+            _link_or_copy(path, os.path.join(version_path, name))
+
+    fsync_path(version_path)
+    fsync_path(directory)
+    return version_path
+
+
+def publish_artifacts_version(version_path, versions_to_keep=None):
+    """
+    Point the current version of the engine directory to version_path.
+
+    The pointer is a symbolic link replaced by a rename, so readers see either
+    the previous or the new version and never a mix of both. Versions older
+    than the last versions_to_keep are removed.
+    """
+    directory, version = os.path.split(version_path.rstrip(os.sep))
+    tmp_link_path = os.path.join(directory, '.{}.{}.tmp'.format(CURRENT_VERSION, uuid.uuid4().hex))
+
+    os.symlink(version, tmp_link_path)
+    os.rename(tmp_link_path, os.path.join(directory, CURRENT_VERSION))
+    fsync_path(directory)
+    logger.info("Artifacts version {} published in {}".format(version, directory))
+
+    if versions_to_keep:
+        for old_version in list_artifacts_versions(directory)[:-versions_to_keep]:
+            if old_version != version:
+                logger.info("Removing old artifacts version {}".format(old_version))
+                shutil.rmtree(os.path.join(directory, old_version), ignore_errors=True)
+
+
+def discard_artifacts_version(version_path):
+    """Remove a version that will not be published, eg. the version of a failed execution."""
+    logger.info("Discarding artifacts version {}".format(version_path))
+    shutil.rmtree(version_path, ignore_errors=True)
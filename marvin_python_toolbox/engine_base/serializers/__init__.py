@@ -16,3 +16,4 @@
 # limitations under the License.
 
 from .keras_serializer import KerasSerializer
+from .artifact_codecs import ArtifactCodec, register_codec, get_codec, registered_codecs
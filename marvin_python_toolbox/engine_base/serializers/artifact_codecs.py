@@ -0,0 +1,399 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2017] [B2W Digital]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Artifact codecs module.
+
+Codecs know how to dump and load one kind of artifact and are looked up by
+name in a registry, so each engine artifact can be bound to the codec that
+suits it best. The codec used to dump an artifact is recorded in a sidecar
+manifest file (<artifact>.manifest) and loading always follows it.
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+import pickle
+import uuid
+from contextlib import contextmanager
+
+import joblib as serializer
+
+from ..._compatibility import six
+from ..._logging import get_logger
+from ..persistence import fsync_path
+
+
+__all__ = ['ArtifactCodec', 'register_codec', 'get_codec', 'registered_codecs',
+           'read_manifest', 'write_manifest', 'get_manifest_path', 'parse_compression',
+           'replacing_file']
+logger = get_logger('engine_base_artifact_codecs')
+
+MANIFEST_EXTENSION = '.manifest'
+
+COMPRESSION_METHODS = ('zlib', 'gzip', 'bz2', 'lzma', 'xz', 'lz4', 'zstd')
+COMPRESSION_LEVELS = range(1, 10)
+ZSTD_PREFIX = b'\x28\xb5\x2f\xfd'
+
+
+try:
+    from joblib import register_compressor
+    from joblib.compressor import CompressorWrapper
+
+    class _ZstdCompressorWrapper(CompressorWrapper):
+        """Zstandard support for joblib, the zstandard package is only imported when it is used."""
+        prefix = ZSTD_PREFIX
+        extension = '.zst'
+
+        def __init__(self):
+            self.fileobj_factory = None
+
+        def compressor_file(self, fileobj, compresslevel=None):
+            import zstandard
+
+            # joblib gives the file name when writing and an opened file when reading
+            return zstandard.open(fileobj, 'wb', cctx=zstandard.ZstdCompressor(level=compresslevel or 3))
+
+        def decompressor_file(self, fileobj):
+            import zstandard
+
+            return zstandard.ZstdDecompressor().stream_reader(fileobj, closefd=False)
+
+    register_compressor('zstd', _ZstdCompressorWrapper())
+    _zstd_registered = True
+except ImportError:  # pragma: no cover
+    logger.debug("Joblib version without custom compressors support, zstd compression disabled.")
+    _zstd_registered = False
+
+
+def parse_compression(compression):
+    """
+    Normalize a compression setting to a joblib compress value.
+
+    Accepts None or "none" (no compression), a zlib level (eg. 3), a method
+    name (eg. "lz4"), "method:level" strings (eg. "zstd:3") and
+    [method, level] pairs. Levels go from 1 to 9, any other value raises
+    ValueError('InvalidCompression', value).
+    """
+    if compression in (None, False, 0, 'none'):
+        return 0
+
+    if compression is True:
+        return 3
+
+    if isinstance(compression, six.integer_types):
+        if compression not in COMPRESSION_LEVELS:
+            logger.error("Compression level must be between 1 and 9")
+            raise ValueError('InvalidCompression', compression)
+        return compression
+
+    if isinstance(compression, six.string_types):
+        method, _, level = compression.partition(':')
+        # joblib expects native strings, values read from json are unicode on python 2
+        method = str(method)
+        if level:
+            try:
+                level = int(level)
+            except ValueError:
+                logger.error("Invalid compression level {}".format(level))
+                raise ValueError('InvalidCompression', compression)
+        else:
+            level = None
+    else:
+        try:
+            method, level = compression
+        except (TypeError, ValueError):
+            logger.error("Compression must be a level, a method name or a [method, level] pair")
+            raise ValueError('InvalidCompression', compression)
+        method = str(method)
+
+    if method not in COMPRESSION_METHODS:
+        logger.error("Compression method must be one of {}".format(COMPRESSION_METHODS))
+        raise ValueError('InvalidCompression', method)
+
+    if level is not None and level not in COMPRESSION_LEVELS:
+        logger.error("Compression level must be between 1 and 9")
+        raise ValueError('InvalidCompression', compression)
+
+    if method == 'zstd' and not _zstd_registered:
+        logger.error("zstd compression requires joblib>=0.12")
+        raise ValueError('InvalidCompression', method)
+
+    return [method, level]
+
+
+_codecs = {}
+
+
+def register_codec(codec_class):
+    """Register a codec class by its name, can be used as a class decorator."""
+    _codecs[codec_class.name] = codec_class
+    return codec_class
+
+
+def get_codec(name, **options):
+    try:
+        codec_class = _codecs[name]
+    except KeyError:
+        logger.error("Artifact codec {} is not registered, use one of {}".format(name, registered_codecs()))
+        raise ValueError('UnknownArtifactCodec', name)
+
+    return codec_class(**options)
+
+
+def registered_codecs():
+    return sorted(_codecs.keys())
+
+
+def get_manifest_path(object_file_path):
+    return object_file_path + MANIFEST_EXTENSION
+
+
+def write_manifest(object_file_path, codec):
+    with replacing_file(get_manifest_path(object_file_path)) as tmp_file_path, open(tmp_file_path, 'w') as f:
+        f.write(json.dumps({'codec': codec.name, 'options': codec.options}, sort_keys=True))
+
+
+def read_manifest(object_file_path):
+    """Return the codec recorded for the artifact or None for artifacts without manifest."""
+    manifest_path = get_manifest_path(object_file_path)
+
+    if not os.path.exists(manifest_path):
+        return None
+
+    with open(manifest_path, 'r') as f:
+        manifest = json.loads(f.read())
+
+    return get_codec(manifest['codec'], **manifest.get('options', {}))
+
+
+@contextmanager
+def replacing_file(object_file_path):
+    """
+    Yield a temporary path to be written and renamed over object_file_path.
+
+    Processes that have the old file memory mapped keep reading its inode
+    untouched, while rewriting it in place would truncate the mapped pages
+    under them (SIGBUS). The file is synced before the rename and the
+    directory after it, so a crash leaves either the old or the new file.
+    """
+    directory, name = os.path.split(object_file_path)
+    # not created with mkstemp to keep the usual file permissions, the extension
+    # is kept because some libraries choose the file format by it
+    tmp_file_path = os.path.join(directory, '.{}.{}.tmp{}'.format(name, uuid.uuid4().hex, os.path.splitext(name)[1]))
+
+    try:
+        yield tmp_file_path
+        fsync_path(tmp_file_path)
+        os.rename(tmp_file_path, object_file_path)
+    except BaseException:
+        if os.path.exists(tmp_file_path):
+            os.remove(tmp_file_path)
+        raise
+
+    fsync_path(directory or os.curdir)
+
+
+class ArtifactCodec(object):
+    """
+    Base class of the artifact codecs.
+
+    usage:
+
+        @register_codec
+        class MyCodec(ArtifactCodec):
+            name = 'my-codec'
+
+            def dump(self, obj, object_file_path):
+                ...
+
+            def load(self, object_file_path):
+                ...
+
+    The options given to the constructor are saved in the artifact manifest
+    and used again to build the codec that loads it, so they must be json
+    serializable. Codecs that must dump from the thread that created the
+    object set background_writes to False. dump writes object_file_path
+    directly, the engine actions give it a temporary path that is renamed
+    over the artifact afterwards (see replacing_file).
+    """
+    name = None
+    background_writes = True
+
+    def __init__(self, **options):
+        self.options = options
+
+    def dump(self, obj, object_file_path):
+        raise NotImplementedError()
+
+    def load(self, object_file_path):
+        raise NotImplementedError()
+
+
+@register_codec
+class JoblibCodec(ArtifactCodec):
+    """
+    Joblib pickles, the default codec.
+
+    compress takes any value accepted by parse_compression. Use mmap_mode to
+    memory map the numpy arrays of uncompressed files.
+    """
+    name = 'joblib'
+
+    def __init__(self, compress=3, mmap_mode=None):
+        super(JoblibCodec, self).__init__(compress=parse_compression(compress), mmap_mode=mmap_mode)
+
+    def dump(self, obj, object_file_path):
+        compress = self.options['compress']
+        serializer.dump(obj, object_file_path, protocol=2, compress=tuple(compress) if isinstance(compress, list) else compress)
+
+    def load(self, object_file_path):
+        if self.options['mmap_mode']:
+            return serializer.load(object_file_path, mmap_mode=self.options['mmap_mode'])
+        return serializer.load(object_file_path)
+
+
+@register_codec
+class PickleCodec(ArtifactCodec):
+    """
+    Pickle protocol 5 with out-of-band buffers.
+
+    Large contiguous buffers (eg. numpy arrays) are written after the pickle
+    stream, aligned to 64 bytes, and are memory mapped back on load without
+    any copy, so the loaded arrays are read only and keep the file mapped
+    while they are referenced. Out-of-band buffers need python 3.8 and, for
+    arrays, numpy 1.16; with older versions the objects are pickled in band
+    and loaded as regular copies.
+    """
+    name = 'pickle'
+
+    MAGIC = b'MRVNPKL5'
+    ALIGNMENT = 64
+
+    def dump(self, obj, object_file_path):
+        buffers = []
+        if sys.version_info >= (3, 8):
+            data = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+        else:
+            data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+        with open(object_file_path, 'wb') as f:
+            f.write(self.MAGIC)
+            f.write(struct.pack('<QI', len(data), len(buffers)))
+            f.write(data)
+
+            for buffer in buffers:
+                raw = buffer.raw()
+                f.write(struct.pack('<Q', raw.nbytes))
+                f.write(b'\0' * (-f.tell() % self.ALIGNMENT))
+                f.write(raw)
+
+    def load(self, object_file_path):
+        with open(object_file_path, 'rb') as f:
+            view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+        if view[:len(self.MAGIC)].tobytes() != self.MAGIC:
+            raise ValueError('InvalidPickleArtifact', object_file_path)
+
+        offset = len(self.MAGIC)
+        data_size, buffers_count = struct.unpack_from('<QI', view, offset)
+        offset += struct.calcsize('<QI')
+        data = view[offset:offset + data_size]
+        offset += data_size
+
+        buffers = []
+        for _ in range(buffers_count):
+            size, = struct.unpack_from('<Q', view, offset)
+            offset += struct.calcsize('<Q')
+            offset += -offset % self.ALIGNMENT
+            buffers.append(view[offset:offset + size])
+            offset += size
+
+        if sys.version_info >= (3, 8):
+            return pickle.loads(data, buffers=buffers)
+        return pickle.loads(data.tobytes())
+
+
+@register_codec
+class NumpyCodec(ArtifactCodec):
+    """Numpy .npy files for single arrays, optionally memory mapped on load."""
+    name = 'numpy'
+
+    def __init__(self, mmap_mode=None, allow_pickle=False):
+        super(NumpyCodec, self).__init__(mmap_mode=mmap_mode, allow_pickle=allow_pickle)
+
+    def dump(self, obj, object_file_path):
+        import numpy
+
+        # saving to a file object avoids numpy appending the .npy extension
+        with open(object_file_path, 'wb') as f:
+            numpy.save(f, obj, allow_pickle=self.options['allow_pickle'])
+
+    def load(self, object_file_path):
+        import numpy
+
+        return numpy.load(object_file_path, mmap_mode=self.options['mmap_mode'], allow_pickle=self.options['allow_pickle'])
+
+
+@register_codec
+class ParquetCodec(ArtifactCodec):
+    """Columnar parquet files for pandas DataFrames, requires pyarrow (or fastparquet)."""
+    name = 'parquet'
+
+    def __init__(self, compression='snappy'):
+        super(ParquetCodec, self).__init__(compression=compression)
+
+    def dump(self, obj, object_file_path):
+        obj.to_parquet(object_file_path, compression=self.options['compression'])
+
+    def load(self, object_file_path):
+        import pandas
+
+        return pandas.read_parquet(object_file_path)
+
+
+@register_codec
+class KerasCodec(ArtifactCodec):
+    """Keras models saved as HDF5 files."""
+    name = 'keras'
+    # the model graph and session are bound to the thread that built it
+    background_writes = False
+
+    def dump(self, obj, object_file_path):
+        logger.debug("Saving model {} using keras serializer.".format(object_file_path))
+        obj.save(object_file_path)
+
+    def load(self, object_file_path):
+        from keras.models import load_model
+
+        logger.debug("Loading model {} using keras serializer.".format(object_file_path))
+        return load_model(object_file_path)
+
+
+@register_codec
+class JsonCodec(ArtifactCodec):
+    """Human readable json files, used by default for the metrics artifact."""
+    name = 'json'
+
+    def dump(self, obj, object_file_path):
+        with open(object_file_path, 'w') as f:
+            json.dump(obj, f, sort_keys=True, indent=4, separators=(',', ': '))
+
+    def load(self, object_file_path):
+        with open(object_file_path, 'r') as f:
+            return json.load(f)
@@ -19,7 +19,7 @@ DESCRIPTOR = _descriptor.FileDescriptor(
   name='actions.proto',
   package='',
   syntax='proto3',
-  serialized_pb=_b('\n\ractions.proto\"6\n\x13OnlineActionRequest\x12\x0f\n\x07message\x18\x01 \x01(\t\x12\x0e\n\x06params\x18\x02 \x01(\t\"\'\n\x14OnlineActionResponse\x12\x0f\n\x07message\x18\x01 \x01(\t\"$\n\x12\x42\x61tchActionRequest\x12\x0e\n\x06params\x18\x01 \x01(\t\"&\n\x13\x42\x61tchActionResponse\x12\x0f\n\x07message\x18\x01 \x01(\t\"4\n\rReloadRequest\x12\x10\n\x08protocol\x18\x01 \x01(\t\x12\x11\n\tartifacts\x18\x02 \x01(\t\"!\n\x0eReloadResponse\x12\x0f\n\x07message\x18\x01 \x01(\t\"\'\n\x12HealthCheckRequest\x12\x11\n\tartifacts\x18\x02 \x01(\t\"]\n\x13HealthCheckResponse\x12+\n\x06status\x18\x01 \x01(\x0e\x32\x1b.HealthCheckResponse.Status\"\x19\n\x06Status\x12\x06\n\x02OK\x10\x00\x12\x07\n\x03NOK\x10\x01\x32\xca\x01\n\x13OnlineActionHandler\x12@\n\x0f_remote_execute\x12\x14.OnlineActionRequest\x1a\x15.OnlineActionResponse\"\x00\x12\x33\n\x0e_remote_reload\x12\x0e.ReloadRequest\x1a\x0f.ReloadResponse\"\x00\x12<\n\r_health_check\x12\x13.HealthCheckRequest\x1a\x14.HealthCheckResponse\"\x00\x32\xc7\x01\n\x12\x42\x61tchActionHandler\x12>\n\x0f_remote_execute\x12\x13.BatchActionRequest\x1a\x14.BatchActionResponse\"\x00\x12\x33\n\x0e_remote_reload\x12\x0e.ReloadRequest\x1a\x0f.ReloadResponse\"\x00\x12<\n\r_health_check\x12\x13.HealthCheckRequest\x1a\x14.HealthCheckResponse\"\x00\x62\x06proto3')
+  serialized_pb=_b('\n\ractions.proto\"]\n\x13OnlineActionRequest\x12\x0f\n\x07message\x18\x01 \x01(\t\x12\x0e\n\x06params\x18\x02 \x01(\t\x12\x0f\n\x07payload\x18\x03 \x01(\x0c\x12\x14\n\x0c\x63ontent_type\x18\x04 \x01(\t\"N\n\x14OnlineActionResponse\x12\x0f\n\x07message\x18\x01 \x01(\t\x12\x0f\n\x07payload\x18\x02 \x01(\x0c\x12\x14\n\x0c\x63ontent_type\x18\x03 \x01(\t\"<\n\x18OnlineActionBatchRequest\x12\x10\n\x08messages\x18\x01 \x03(\t\x12\x0e\n\x06params\x18\x02 \x01(\t\"-\n\x19OnlineActionBatchResponse\x12\x10\n\x08messages\x18\x01 \x03(\t\"$\n\x12\x42\x61tchActionRequest\x12\x0e\n\x06params\x18\x01 \x01(\t\"&\n\x13\x42\x61tchActionResponse\x12\x0f\n\x07message\x18\x01 \x01(\t\"h\n\x13\x42\x61tchActionProgress\x12\x0e\n\x06\x61\x63tion\x18\x01 \x01(\t\x12\r\n\x05\x65vent\x18\x02 \x01(\t\x12\x10\n\x08progress\x18\x03 \x01(\x02\x12\x0f\n\x07message\x18\x04 \x01(\t\x12\x0f\n\x07metrics\x18\x05 \x01(\t\"4\n\rReloadRequest\x12\x10\n\x08protocol\x18\x01 \x01(\t\x12\x11\n\tartifacts\x18\x02 \x01(\t\"!\n\x0eReloadResponse\x12\x0f\n\x07message\x18\x01 \x01(\t\"\'\n\x12HealthCheckRequest\x12\x11\n\tartifacts\x18\x02 \x01(\t\"]\n\x13HealthCheckResponse\x12+\n\x06status\x18\x01 \x01(\x0e\x32\x1b.HealthCheckResponse.Status\"\x19\n\x06Status\x12\x06\n\x02OK\x10\x00\x12\x07\n\x03NOK\x10\x01\x32\xe9\x02\n\x13OnlineActionHandler\x12@\n\x0f_remote_execute\x12\x14.OnlineActionRequest\x1a\x15.OnlineActionResponse\"\x00\x12P\n\x15_remote_execute_batch\x12\x19.OnlineActionBatchRequest\x1a\x1a.OnlineActionBatchResponse\"\x00\x12K\n\x16_remote_execute_stream\x12\x14.OnlineActionRequest\x1a\x15.OnlineActionResponse\"\x00(\x01\x30\x01\x12\x33\n\x0e_remote_reload\x12\x0e.ReloadRequest\x1a\x0f.ReloadResponse\"\x00\x12<\n\r_health_check\x12\x13.HealthCheckRequest\x1a\x14.HealthCheckResponse\"\x00\x32\x90\x02\n\x12\x42\x61tchActionHandler\x12>\n\x0f_remote_execute\x12\x13.BatchActionRequest\x1a\x14.BatchActionResponse\"\x00\x12G\n\x16_remote_execute_stream\x12\x13.BatchActionRequest\x1a\x14.BatchActionProgress\"\x00\x30\x01\x12\x33\n\x0e_remote_reload\x12\x0e.ReloadRequest\x1a\x0f.ReloadResponse\"\x00\x12<\n\r_health_check\x12\x13.HealthCheckRequest\x1a\x14.HealthCheckResponse\"\x00\x62\x06proto3')
 )
 
 
@@ -41,8 +41,8 @@ _HEALTHCHECKRESPONSE_STATUS = _descriptor.EnumDescriptor(
   ],
   containing_type=None,
   options=None,
-  serialized_start=390,
-  serialized_end=415,
+  serialized_start=683,
+  serialized_end=708,
 )
 _sym_db.RegisterEnumDescriptor(_HEALTHCHECKRESPONSE_STATUS)
 
@@ -68,6 +68,20 @@ _ONLINEACTIONREQUEST = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       options=None),
+    _descriptor.FieldDescriptor(
+      name='payload', full_name='OnlineActionRequest.payload', index=2,
+      number=3, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b(""),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='content_type', full_name='OnlineActionRequest.content_type', index=3,
+      number=4, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
   ],
   extensions=[
   ],
@@ -81,7 +95,7 @@ _ONLINEACTIONREQUEST = _descriptor.Descriptor(
   oneofs=[
   ],
   serialized_start=17,
-  serialized_end=71,
+  serialized_end=110,
 )
 
 
@@ -99,6 +113,89 @@ _ONLINEACTIONRESPONSE = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       options=None),
+    _descriptor.FieldDescriptor(
+      name='payload', full_name='OnlineActionResponse.payload', index=1,
+      number=2, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b(""),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='content_type', full_name='OnlineActionResponse.content_type', index=2,
+      number=3, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=112,
+  serialized_end=190,
+)
+
+
+_ONLINEACTIONBATCHREQUEST = _descriptor.Descriptor(
+  name='OnlineActionBatchRequest',
+  full_name='OnlineActionBatchRequest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='messages', full_name='OnlineActionBatchRequest.messages', index=0,
+      number=1, type=9, cpp_type=9, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='params', full_name='OnlineActionBatchRequest.params', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=192,
+  serialized_end=252,
+)
+
+
+_ONLINEACTIONBATCHRESPONSE = _descriptor.Descriptor(
+  name='OnlineActionBatchResponse',
+  full_name='OnlineActionBatchResponse',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='messages', full_name='OnlineActionBatchResponse.messages', index=0,
+      number=1, type=9, cpp_type=9, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
   ],
   extensions=[
   ],
@@ -111,8 +208,8 @@ _ONLINEACTIONRESPONSE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=73,
-  serialized_end=112,
+  serialized_start=254,
+  serialized_end=299,
 )
 
 
@@ -142,8 +239,8 @@ _BATCHACTIONREQUEST = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=114,
-  serialized_end=150,
+  serialized_start=301,
+  serialized_end=337,
 )
 
 
@@ -173,8 +270,67 @@ _BATCHACTIONRESPONSE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=152,
-  serialized_end=190,
+  serialized_start=339,
+  serialized_end=377,
+)
+
+
+_BATCHACTIONPROGRESS = _descriptor.Descriptor(
+  name='BatchActionProgress',
+  full_name='BatchActionProgress',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='action', full_name='BatchActionProgress.action', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='event', full_name='BatchActionProgress.event', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='progress', full_name='BatchActionProgress.progress', index=2,
+      number=3, type=2, cpp_type=6, label=1,
+      has_default_value=False, default_value=float(0),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='message', full_name='BatchActionProgress.message', index=3,
+      number=4, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='metrics', full_name='BatchActionProgress.metrics', index=4,
+      number=5, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=379,
+  serialized_end=483,
 )
 
 
@@ -211,8 +367,8 @@ _RELOADREQUEST = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=192,
-  serialized_end=244,
+  serialized_start=485,
+  serialized_end=537,
 )
 
 
@@ -242,8 +398,8 @@ _RELOADRESPONSE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=246,
-  serialized_end=279,
+  serialized_start=539,
+  serialized_end=572,
 )
 
 
@@ -273,8 +429,8 @@ _HEALTHCHECKREQUEST = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=281,
-  serialized_end=320,
+  serialized_start=574,
+  serialized_end=613,
 )
 
 
@@ -305,16 +461,19 @@ _HEALTHCHECKRESPONSE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=322,
-  serialized_end=415,
+  serialized_start=615,
+  serialized_end=708,
 )
 
 _HEALTHCHECKRESPONSE.fields_by_name['status'].enum_type = _HEALTHCHECKRESPONSE_STATUS
 _HEALTHCHECKRESPONSE_STATUS.containing_type = _HEALTHCHECKRESPONSE
 DESCRIPTOR.message_types_by_name['OnlineActionRequest'] = _ONLINEACTIONREQUEST
 DESCRIPTOR.message_types_by_name['OnlineActionResponse'] = _ONLINEACTIONRESPONSE
+DESCRIPTOR.message_types_by_name['OnlineActionBatchRequest'] = _ONLINEACTIONBATCHREQUEST
+DESCRIPTOR.message_types_by_name['OnlineActionBatchResponse'] = _ONLINEACTIONBATCHRESPONSE
 DESCRIPTOR.message_types_by_name['BatchActionRequest'] = _BATCHACTIONREQUEST
 DESCRIPTOR.message_types_by_name['BatchActionResponse'] = _BATCHACTIONRESPONSE
+DESCRIPTOR.message_types_by_name['BatchActionProgress'] = _BATCHACTIONPROGRESS
 DESCRIPTOR.message_types_by_name['ReloadRequest'] = _RELOADREQUEST
 DESCRIPTOR.message_types_by_name['ReloadResponse'] = _RELOADRESPONSE
 DESCRIPTOR.message_types_by_name['HealthCheckRequest'] = _HEALTHCHECKREQUEST
@@ -335,6 +494,20 @@ OnlineActionResponse = _reflection.GeneratedProtocolMessageType('OnlineActionRes
   ))
 _sym_db.RegisterMessage(OnlineActionResponse)
 
+OnlineActionBatchRequest = _reflection.GeneratedProtocolMessageType('OnlineActionBatchRequest', (_message.Message,), dict(
+  DESCRIPTOR = _ONLINEACTIONBATCHREQUEST,
+  __module__ = 'actions_pb2'
+  # @@protoc_insertion_point(class_scope:OnlineActionBatchRequest)
+  ))
+_sym_db.RegisterMessage(OnlineActionBatchRequest)
+
+OnlineActionBatchResponse = _reflection.GeneratedProtocolMessageType('OnlineActionBatchResponse', (_message.Message,), dict(
+  DESCRIPTOR = _ONLINEACTIONBATCHRESPONSE,
+  __module__ = 'actions_pb2'
+  # @@protoc_insertion_point(class_scope:OnlineActionBatchResponse)
+  ))
+_sym_db.RegisterMessage(OnlineActionBatchResponse)
+
 BatchActionRequest = _reflection.GeneratedProtocolMessageType('BatchActionRequest', (_message.Message,), dict(
   DESCRIPTOR = _BATCHACTIONREQUEST,
   __module__ = 'actions_pb2'
@@ -349,6 +522,13 @@ BatchActionResponse = _reflection.GeneratedProtocolMessageType('BatchActionRespo
   ))
 _sym_db.RegisterMessage(BatchActionResponse)
 
+BatchActionProgress = _reflection.GeneratedProtocolMessageType('BatchActionProgress', (_message.Message,), dict(
+  DESCRIPTOR = _BATCHACTIONPROGRESS,
+  __module__ = 'actions_pb2'
+  # @@protoc_insertion_point(class_scope:BatchActionProgress)
+  ))
+_sym_db.RegisterMessage(BatchActionProgress)
+
 ReloadRequest = _reflection.GeneratedProtocolMessageType('ReloadRequest', (_message.Message,), dict(
   DESCRIPTOR = _RELOADREQUEST,
   __module__ = 'actions_pb2'
@@ -385,8 +565,8 @@ _ONLINEACTIONHANDLER = _descriptor.ServiceDescriptor(
   file=DESCRIPTOR,
   index=0,
   options=None,
-  serialized_start=418,
-  serialized_end=620,
+  serialized_start=711,
+  serialized_end=1072,
   methods=[
   _descriptor.MethodDescriptor(
     name='_remote_execute',
@@ -397,10 +577,28 @@ _ONLINEACTIONHANDLER = _descriptor.ServiceDescriptor(
     output_type=_ONLINEACTIONRESPONSE,
     options=None,
   ),
+  _descriptor.MethodDescriptor(
+    name='_remote_execute_batch',
+    full_name='OnlineActionHandler._remote_execute_batch',
+    index=1,
+    containing_service=None,
+    input_type=_ONLINEACTIONBATCHREQUEST,
+    output_type=_ONLINEACTIONBATCHRESPONSE,
+    options=None,
+  ),
+  _descriptor.MethodDescriptor(
+    name='_remote_execute_stream',
+    full_name='OnlineActionHandler._remote_execute_stream',
+    index=2,
+    containing_service=None,
+    input_type=_ONLINEACTIONREQUEST,
+    output_type=_ONLINEACTIONRESPONSE,
+    options=None,
+  ),
   _descriptor.MethodDescriptor(
     name='_remote_reload',
     full_name='OnlineActionHandler._remote_reload',
-    index=1,
+    index=3,
     containing_service=None,
     input_type=_RELOADREQUEST,
     output_type=_RELOADRESPONSE,
@@ -409,7 +607,7 @@ _ONLINEACTIONHANDLER = _descriptor.ServiceDescriptor(
   _descriptor.MethodDescriptor(
     name='_health_check',
     full_name='OnlineActionHandler._health_check',
-    index=2,
+    index=4,
     containing_service=None,
     input_type=_HEALTHCHECKREQUEST,
     output_type=_HEALTHCHECKRESPONSE,
@@ -427,8 +625,8 @@ _BATCHACTIONHANDLER = _descriptor.ServiceDescriptor(
   file=DESCRIPTOR,
   index=1,
   options=None,
-  serialized_start=623,
-  serialized_end=822,
+  serialized_start=1075,
+  serialized_end=1347,
   methods=[
   _descriptor.MethodDescriptor(
     name='_remote_execute',
@@ -439,10 +637,19 @@ _BATCHACTIONHANDLER = _descriptor.ServiceDescriptor(
     output_type=_BATCHACTIONRESPONSE,
     options=None,
   ),
+  _descriptor.MethodDescriptor(
+    name='_remote_execute_stream',
+    full_name='BatchActionHandler._remote_execute_stream',
+    index=1,
+    containing_service=None,
+    input_type=_BATCHACTIONREQUEST,
+    output_type=_BATCHACTIONPROGRESS,
+    options=None,
+  ),
   _descriptor.MethodDescriptor(
     name='_remote_reload',
     full_name='BatchActionHandler._remote_reload',
-    index=1,
+    index=2,
     containing_service=None,
     input_type=_RELOADREQUEST,
     output_type=_RELOADRESPONSE,
@@ -451,7 +658,7 @@ _BATCHACTIONHANDLER = _descriptor.ServiceDescriptor(
   _descriptor.MethodDescriptor(
     name='_health_check',
     full_name='BatchActionHandler._health_check',
-    index=2,
+    index=3,
     containing_service=None,
     input_type=_HEALTHCHECKREQUEST,
     output_type=_HEALTHCHECKRESPONSE,
@@ -21,6 +21,16 @@ class OnlineActionHandlerStub(object):
         request_serializer=actions__pb2.OnlineActionRequest.SerializeToString,
         response_deserializer=actions__pb2.OnlineActionResponse.FromString,
         )
+    self._remote_execute_batch = channel.unary_unary(
+        '/OnlineActionHandler/_remote_execute_batch',
+        request_serializer=actions__pb2.OnlineActionBatchRequest.SerializeToString,
+        response_deserializer=actions__pb2.OnlineActionBatchResponse.FromString,
+        )
+    self._remote_execute_stream = channel.stream_stream(
+        '/OnlineActionHandler/_remote_execute_stream',
+        request_serializer=actions__pb2.OnlineActionRequest.SerializeToString,
+        response_deserializer=actions__pb2.OnlineActionResponse.FromString,
+        )
     self._remote_reload = channel.unary_unary(
         '/OnlineActionHandler/_remote_reload',
         request_serializer=actions__pb2.ReloadRequest.SerializeToString,
@@ -44,6 +54,20 @@ class OnlineActionHandlerServicer(object):
     context.set_details('Method not implemented!')
     raise NotImplementedError('Method not implemented!')
 
+  def _remote_execute_batch(self, request, context):
+    # missing associated documentation comment in .proto file
+    pass
+    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+    context.set_details('Method not implemented!')
+    raise NotImplementedError('Method not implemented!')
+
+  def _remote_execute_stream(self, request_iterator, context):
+    # missing associated documentation comment in .proto file
+    pass
+    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+    context.set_details('Method not implemented!')
+    raise NotImplementedError('Method not implemented!')
+
   def _remote_reload(self, request, context):
     # missing associated documentation comment in .proto file
     pass
@@ -66,6 +90,16 @@ def add_OnlineActionHandlerServicer_to_server(servicer, server):
           request_deserializer=actions__pb2.OnlineActionRequest.FromString,
           response_serializer=actions__pb2.OnlineActionResponse.SerializeToString,
       ),
+      '_remote_execute_batch': grpc.unary_unary_rpc_method_handler(
+          servicer._remote_execute_batch,
+          request_deserializer=actions__pb2.OnlineActionBatchRequest.FromString,
+          response_serializer=actions__pb2.OnlineActionBatchResponse.SerializeToString,
+      ),
+      '_remote_execute_stream': grpc.stream_stream_rpc_method_handler(
+          servicer._remote_execute_stream,
+          request_deserializer=actions__pb2.OnlineActionRequest.FromString,
+          response_serializer=actions__pb2.OnlineActionResponse.SerializeToString,
+      ),
       '_remote_reload': grpc.unary_unary_rpc_method_handler(
           servicer._remote_reload,
           request_deserializer=actions__pb2.ReloadRequest.FromString,
@@ -97,6 +131,11 @@ class BatchActionHandlerStub(object):
         request_serializer=actions__pb2.BatchActionRequest.SerializeToString,
         response_deserializer=actions__pb2.BatchActionResponse.FromString,
         )
+    self._remote_execute_stream = channel.unary_stream(
+        '/BatchActionHandler/_remote_execute_stream',
+        request_serializer=actions__pb2.BatchActionRequest.SerializeToString,
+        response_deserializer=actions__pb2.BatchActionProgress.FromString,
+        )
     self._remote_reload = channel.unary_unary(
         '/BatchActionHandler/_remote_reload',
         request_serializer=actions__pb2.ReloadRequest.SerializeToString,
@@ -120,6 +159,13 @@ class BatchActionHandlerServicer(object):
     context.set_details('Method not implemented!')
     raise NotImplementedError('Method not implemented!')
 
+  def _remote_execute_stream(self, request, context):
+    # missing associated documentation comment in .proto file
+    pass
+    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+    context.set_details('Method not implemented!')
+    raise NotImplementedError('Method not implemented!')
+
   def _remote_reload(self, request, context):
     # missing associated documentation comment in .proto file
     pass
@@ -142,6 +188,11 @@ def add_BatchActionHandlerServicer_to_server(servicer, server):
           request_deserializer=actions__pb2.BatchActionRequest.FromString,
           response_serializer=actions__pb2.BatchActionResponse.SerializeToString,
       ),
+      '_remote_execute_stream': grpc.unary_stream_rpc_method_handler(
+          servicer._remote_execute_stream,
+          request_deserializer=actions__pb2.BatchActionRequest.FromString,
+          response_serializer=actions__pb2.BatchActionProgress.SerializeToString,
+      ),
       '_remote_reload': grpc.unary_unary_rpc_method_handler(
           servicer._remote_reload,
           request_deserializer=actions__pb2.ReloadRequest.FromString,
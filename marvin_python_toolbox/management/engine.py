@@ -33,8 +33,9 @@ import multiprocessing
 from marvin_python_toolbox.common.profiling import profiling
 from marvin_python_toolbox.common.data import MarvinData
 from marvin_python_toolbox.common.config import Config
+from marvin_python_toolbox.common import json_codec
 from .._compatibility import iteritems
-from .._logging import get_logger
+from .._logging import get_logger, enable_queue_logging
 
 
 logger = get_logger('management.engine')
@@ -191,6 +192,8 @@ class MarvinDryRun(object):
             else:
                 step.execute(params=params)
 
+            step._flush_pending_saves()
+
         self.print_finish_step()
 
     def print_finish_step(self):
@@ -217,8 +220,8 @@ def read_file(filename):
 
         print("Engine file {} loaded!".format(filename))
 
-        with open(fname, 'r') as fp:
-            return json.load(fp)
+        with open(fname, 'rb') as fp:
+            return json_codec.loads(fp.read())
     else:
         print("Engine file {} doesn't exists...".format(filename))
         return {}
@@ -245,13 +248,70 @@ def generate_kwargs(clazz, params=None, initial_dataset=None, dataset=None, mode
     return kwargs
 
 
+# actions served by the OnlineActionHandler, the only ones that can run in many processes
+ONLINE_ACTIONS = ('ppreparator', 'predictor', 'feedback')
+
+
+class MultiProcessServer(object):
+    """
+    Serves an online action from many forked processes sharing the same port.
+
+    Each process builds its own gRPC server (gRPC can't be forked) for its own
+    copy of the action pipeline, artifacts loaded before the fork are shared
+    copy on write. Has the start and stop methods of a gRPC server. Requires
+    SO_REUSEPORT support (Linux).
+    """
+
+    def __init__(self, action, processes, server_kwargs):
+        self.action = action
+        self.processes = processes
+        self.server_kwargs = server_kwargs
+        self._workers = []
+
+    def _serve(self):
+        server = self.action._prepare_remote_server(reuse_port=True, **self.server_kwargs)
+        server.start()
+
+        try:
+            while True:
+                time.sleep(100)
+        finally:
+            server.stop(0)
+
+    def start(self):
+        for _ in range(self.processes):
+            worker = multiprocessing.Process(target=self._serve)
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self, grace):
+        for worker in self._workers:
+            worker.terminate()
+
+        for worker in self._workers:
+            worker.join(grace)
+
+        self._workers = []
+
+
 class MarvinEngineServer(object):
     @classmethod
-    def create(self, ctx, action, port, workers, rpc_workers, params, initial_dataset, dataset, model, metrics, pipeline):
+    def create(self, ctx, action, port, workers, rpc_workers, params, initial_dataset, dataset, model, metrics, pipeline,
+               max_batch_size=1, max_batch_wait=0.002, artifacts_to_load=None, messages=None, warmup_iterations=0, processes=1, aio=False,
+               max_queue_depth=0, max_queue_time=0):
         package_name = ctx.obj['package_name']
 
         def create_object(act):
-            clazz = CLAZZES[act]
+            if isinstance(act, list):
+                # a group of independent steps executed concurrently
+                from marvin_python_toolbox.engine_base.parallel import ParallelStep
+
+                return ParallelStep(steps=[create_object(step) for step in act], max_workers=workers * max(len(act) - 1, 1),
+                                    **generate_kwargs(ParallelStep, params))
+
+            # steps out of the default actions are classes of the engine package
+            clazz = CLAZZES.get(act, act)
             _Action = dynamic_import("{}.{}".format(package_name, clazz))
             kwargs = generate_kwargs(_Action, params, initial_dataset, dataset, model, metrics)
             return _Action(**kwargs)
@@ -264,9 +324,41 @@ class MarvinEngineServer(object):
                 previous_object._previous_step = create_object(step)
                 previous_object = previous_object._previous_step
 
-        server = root_obj._prepare_remote_server(port=port, workers=workers, rpc_workers=rpc_workers)
+        # imported here to keep grpc and the stubs out of the other marvin commands
+        from marvin_python_toolbox.engine_base import EngineBaseOnlineAction
+
+        server_kwargs = {}
+        if isinstance(root_obj, EngineBaseOnlineAction):
+            server_kwargs = {'max_batch_size': max_batch_size, 'max_batch_wait': max_batch_wait}
+            if max_queue_depth > 0:
+                server_kwargs.update(max_queue_depth=max_queue_depth, max_queue_time=max_queue_time)
+
+            if aio:
+                # imported here because grpc.aio needs python 3
+                from marvin_python_toolbox.engine_base.aio import is_async_pipeline
+
+                if is_async_pipeline(root_obj):
+                    print("Warm up messages are not executed by pipelines with async steps")
+                    warmup_iterations = 0
+
+            print("Warming up {} Action".format(action))
+            root_obj._warm_up(artifacts=artifacts_to_load, messages=messages, iterations=warmup_iterations, params=params)
+
+        if aio:
+            from marvin_python_toolbox.engine_base.aio import AioServer
+
+            server = AioServer(action=root_obj, port=port, workers=workers, rpc_workers=rpc_workers)
+            print("Starting asyncio GRPC server [{}] for {} Action".format(port, action))
+
+        elif processes > 1 and isinstance(root_obj, EngineBaseOnlineAction):
+            server_kwargs.update(port=port, workers=workers, rpc_workers=rpc_workers)
+            server = MultiProcessServer(action=root_obj, processes=processes, server_kwargs=server_kwargs)
+            print("Starting {} GRPC server processes [{}] for {} Action".format(processes, port, action))
+
+        else:
+            server = root_obj._prepare_remote_server(port=port, workers=workers, rpc_workers=rpc_workers, **server_kwargs)
+            print("Starting GRPC server [{}] for {} Action".format(port, action))
 
-        print("Starting GRPC server [{}] for {} Action".format(port, action))
         server.start()
 
         return server
@@ -288,8 +380,17 @@ class MarvinEngineServer(object):
 @click.option('--spark-conf', '-c', envvar='SPARK_CONF_DIR', type=click.Path(exists=True), help='Spark configuration path to be used')
 @click.option('--max-workers', '-w', default=multiprocessing.cpu_count(), help='Max number of grpc threads workers per action')
 @click.option('--max-rpc-workers', '-rw', default=multiprocessing.cpu_count(), help='Max number of grpc workers per action')
+@click.option('--max-batch-size', '-bs', default=1, help='Max number of messages micro batched in a single online action execution (1 disables it)')
+@click.option('--max-batch-wait', '-bw', default=2.0, help='Max time in milliseconds a message waits for its micro batch to be filled')
+@click.option('--messages-file', '-msf', default='engine.messages', help='Marvin engine messages file path used in the warm up', type=click.Path())
+@click.option('--warmup-iterations', '-wi', default=0, help='Number of messages executed by each online action before serving')
+@click.option('--processes', '-p', default=1, help='Number of processes serving each online action in the same port (Linux only)')
+@click.option('--max-queue-depth', '-qd', default=0, help='Max number of online requests waiting for a worker, the extra ones are rejected (0 disables it)')
+@click.option('--max-queue-time', '-qt', default=0.0, help='Max time in milliseconds an online request waits for a worker before being rejected (0 disables it)')
+@click.option('--aio', is_flag=True, default=False, help='Use the asyncio gRPC server, needed by actions with async execute methods')
 @click.pass_context
-def engine_server(ctx, action, params_file, metadata_file, initial_dataset, dataset, model, metrics, spark_conf, max_workers, max_rpc_workers):
+def engine_server(ctx, action, params_file, metadata_file, initial_dataset, dataset, model, metrics, spark_conf, max_workers, max_rpc_workers,
+                  max_batch_size, max_batch_wait, messages_file, warmup_iterations, processes, max_queue_depth, max_queue_time, aio):
 
     print("Starting server ...")
 
@@ -300,14 +401,19 @@ def engine_server(ctx, action, params_file, metadata_file, initial_dataset, data
     params = read_file(params_file)
     metadata = read_file(metadata_file)
     default_actions = {action['name']: action for action in metadata['actions']}
+    messages = read_file(messages_file) if warmup_iterations else []
 
     if action == 'all':
         action = default_actions
     else:
         action = {action: default_actions[action]}
 
+    # the gRPC threads hand the log records to a background thread instead of writing them
+    enable_queue_logging()
+
     servers = []
-    for action_name in action.keys():
+    # the online actions processes are forked before any gRPC server exists in this process
+    for action_name in sorted(action.keys(), key=lambda name: name not in ONLINE_ACTIONS):
         # initializing server configuration
         engine_server = MarvinEngineServer.create(
             ctx=ctx,
@@ -320,7 +426,16 @@ def engine_server(ctx, action, params_file, metadata_file, initial_dataset, data
             dataset=dataset,
             model=model,
             metrics=metrics,
-            pipeline=action[action_name]["pipeline"]
+            pipeline=action[action_name]["pipeline"],
+            max_batch_size=max_batch_size,
+            max_batch_wait=max_batch_wait / 1000.0,
+            artifacts_to_load=action[action_name].get("artifactsToLoad"),
+            messages=messages,
+            warmup_iterations=warmup_iterations,
+            processes=processes,
+            aio=aio,
+            max_queue_depth=max_queue_depth,
+            max_queue_time=max_queue_time / 1000.0
         )
 
         servers.append(engine_server)
@@ -74,7 +74,7 @@ REQUIREMENTS_EXTERNAL = [
     'findspark>=1.1.0',
     'grpcio>=1.13.0',
     'grpcio-tools>=1.13.0',
-    'joblib>=0.11',
+    'joblib>=0.12',
     'autopep8>=1.3.3',
     'progressbar2>=3.34.3',
     'urllib3>=1.21.1',
@@ -94,6 +94,16 @@ REQUIREMENTS_TESTS = [
     'Keras>=2.2.0',
     'tensorflow>=1.8.0',
 ]
+# Optional artifacts compression methods
+REQUIREMENTS_LZ4 = ['lz4>=0.19']
+REQUIREMENTS_ZSTD = ['zstandard>=0.15']
+# Optional binary payloads of the online actions
+REQUIREMENTS_MSGPACK = ['msgpack>=0.6.0']
+REQUIREMENTS_ARROW = ['pyarrow>=0.15.0']
+# Optional faster JSON encoding, orjson is preferred over ujson
+REQUIREMENTS_ORJSON = ['orjson>=3.0.0']
+REQUIREMENTS_UJSON = ['ujson>=5.4.0']
+
 # This is normally an empty list
 DEPENDENCY_LINKS_EXTERNAL = []
 
@@ -174,6 +184,12 @@ setup(
     tests_require=REQUIREMENTS_TESTS,
     extras_require={
         'testing': REQUIREMENTS_TESTS,
+        'lz4': REQUIREMENTS_LZ4,
+        'zstd': REQUIREMENTS_ZSTD,
+        'msgpack': REQUIREMENTS_MSGPACK,
+        'arrow': REQUIREMENTS_ARROW,
+        'orjson': REQUIREMENTS_ORJSON,
+        'ujson': REQUIREMENTS_UJSON,
     },
     dependency_links=DEPENDENCY_LINKS_EXTERNAL,
     scripts=SCRIPTS,
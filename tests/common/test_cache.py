@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2017] [B2W Digital]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import mock
+import pytest
+
+from marvin_python_toolbox.common.cache import LRUCache, MISSING
+
+
+class TestLRUCache:
+    def test_get_and_set(self):
+        cache = LRUCache(max_size=2)
+
+        assert cache.get('a') is MISSING
+        cache.set('a', None)
+
+        assert cache.get('a') is None
+        assert cache.stats() == {'size': 1, 'hits': 1, 'misses': 1, 'evictions': 0, 'expirations': 0}
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        assert cache.get('b') is MISSING
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+        assert len(cache) == 2
+        assert cache.evictions == 1
+
+    @mock.patch('marvin_python_toolbox.common.cache.time.time')
+    def test_ttl(self, time_mocked):
+        time_mocked.return_value = 100
+        cache = LRUCache(max_size=2, ttl=10)
+        cache.set('a', 1)
+
+        time_mocked.return_value = 109
+        assert cache.get('a') == 1
+
+        time_mocked.return_value = 110
+        assert cache.get('a') is MISSING
+        assert cache.expirations == 1
+        assert len(cache) == 0
+
+    def test_clear(self):
+        cache = LRUCache(max_size=2)
+        cache.set('a', 1)
+        cache.clear()
+
+        assert cache.get('a') is MISSING
+
+    def test_set_skipped_after_clear(self):
+        cache = LRUCache(max_size=2)
+        generation = cache.generation
+        cache.clear()
+        cache.set('a', 'old', generation=generation)
+
+        assert cache.get('a') is MISSING
+
+        cache.set('a', 'new', generation=cache.generation)
+        assert cache.get('a') == 'new'
+
+    def test_invalid_size(self):
+        with pytest.raises(ValueError) as excinfo:
+            LRUCache(max_size=0)
+
+        assert excinfo.value.args == ('InvalidCacheSize', 0)
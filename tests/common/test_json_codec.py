@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2017] [B2W Digital]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import json
+import math
+import uuid
+import datetime
+
+import pytest
+import numpy as np
+
+from marvin_python_toolbox.common import json_codec
+from marvin_python_toolbox.common.utils import to_json, from_json
+
+
+class Obj(object):
+    id = '42'
+
+
+@pytest.fixture(params=list(json_codec._BACKENDS))
+def codec(request):
+    return json_codec._BACKENDS[request.param]
+
+
+def test_roundtrip(codec):
+    dumps, dumpb, loads = codec
+    data = {'i': 42, 'f': 0.5, 's': u'sábado', 'l': [1, None, True], 'd': {'b': 1, 'a': 2}}
+
+    assert loads(dumps(data)) == data
+    assert loads(dumpb(data)) == data
+    assert isinstance(dumpb(data), bytes)
+    assert json.loads(dumps(data)) == data
+
+
+def test_sort_keys(codec):
+    dumps, dumpb, loads = codec
+
+    assert dumps({'b': 1, 'a': {'d': 2, 'c': 3}}, sort_keys=True).replace(' ', '') == '{"a":{"c":3,"d":2},"b":1}'
+
+
+def test_default_types(codec):
+    dumps, dumpb, loads = codec
+    dt = datetime.datetime(2020, 1, 2, 3, 4, 5)
+    id_ = uuid.uuid4()
+
+    data = loads(dumps({'dt': dt, 'id': id_, 'obj': Obj(), 'array': np.arange(3), 'float': np.float32(0.5), 'int': np.int64(7)}))
+
+    assert data == {'dt': '2020-01-02T03:04:05', 'id': str(id_), 'obj': '42', 'array': [0, 1, 2], 'float': 0.5, 'int': 7}
+
+
+def test_not_serializable(codec):
+    dumps, dumpb, loads = codec
+
+    with pytest.raises(TypeError):
+        dumps({'obj': object()})
+
+
+def test_invalid_json(codec):
+    dumps, dumpb, loads = codec
+
+    with pytest.raises(ValueError):
+        loads('{"a":')
+
+
+@pytest.mark.parametrize('backend', list(json_codec._BACKENDS))
+def test_nan_and_infinity(backend):
+    dumps, dumpb, loads = json_codec._BACKENDS[backend]
+    encoded = dumps({'nan': float('nan'), 'inf': float('inf')})
+
+    if backend == 'orjson':
+        assert json.loads(encoded) == {'nan': None, 'inf': None}
+    else:
+        data = loads(encoded)
+        assert math.isnan(data['nan'])
+        assert data['inf'] == float('inf')
+
+
+def test_big_integers(codec):
+    dumps, dumpb, loads = codec
+    data = {'big': 2 ** 70, 'negative': -2 ** 70}
+
+    assert json.loads(dumps(data)) == data
+    assert json.loads(dumpb(data).decode('utf-8')) == data
+
+
+def test_from_json_converts_datetimes_and_uuids():
+    id_ = uuid.uuid4()
+    data = {'dt': datetime.datetime(2020, 1, 2, 3, 4, 5), 'nested': [{'id': id_, 's': 'x' * 36}], 's': '2020-01-02', 'l': [str(id_)]}
+
+    assert from_json(to_json(data)) == {'dt': datetime.datetime(2020, 1, 2, 3, 4, 5), 'nested': [{'id': id_, 's': 'x' * 36}],
+                                        's': '2020-01-02', 'l': [str(id_)]}
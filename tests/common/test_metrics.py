@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2017] [B2W Digital]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+from marvin_python_toolbox.common.metrics import Counter, Histogram
+
+
+class TestCounter:
+    def test_inc(self):
+        counter = Counter()
+        counter.inc()
+        counter.inc('queue_full', 2)
+        counter.inc('queue_time')
+
+        assert counter.value() == 1
+        assert counter.value('queue_full') == 2
+        assert counter.value('missing') == 0
+        assert counter.total == 4
+        assert counter.snapshot() == {'total': 1, 'queue_full': 2, 'queue_time': 1}
+
+        counter.reset()
+        assert counter.snapshot() == {}
+
+    def test_concurrent_inc(self):
+        counter = Counter()
+
+        def inc():
+            for _ in range(1000):
+                counter.inc()
+
+        threads = [threading.Thread(target=inc) for _ in range(4)]
+        [thread.start() for thread in threads]
+        [thread.join() for thread in threads]
+
+        assert counter.value() == 4000
+
+
+class TestHistogram:
+    def test_observe(self):
+        histogram = Histogram(buckets=[10, 1, 5])
+        for value in [0.5, 1, 3, 7, 20]:
+            histogram.observe(value)
+
+        snapshot = histogram.snapshot()
+
+        assert histogram.buckets == (1, 5, 10)
+        assert snapshot['count'] == 5
+        assert snapshot['sum'] == 31.5
+        assert snapshot['buckets'] == [(1, 2), (5, 1), (10, 1), ('+Inf', 1)]
+
+    def test_quantile(self):
+        histogram = Histogram(buckets=[1, 2, 4])
+        assert histogram.quantile(0.5) is None
+
+        for value in [1, 1, 1, 2, 3, 100]:
+            histogram.observe(value)
+
+        assert histogram.quantile(0.5) == 1
+        assert histogram.quantile(0.8) == 4
+        assert histogram.quantile(1) == float('inf')
+
+    def test_reset(self):
+        histogram = Histogram(buckets=[1])
+        histogram.observe(1)
+        histogram.reset()
+
+        assert histogram.count == 0
+        assert histogram.sum == 0
+        assert histogram.snapshot()['buckets'] == [(1, 0), ('+Inf', 0)]
+
+    def test_concurrent_observe(self):
+        histogram = Histogram(buckets=[1])
+
+        def observe():
+            for _ in range(1000):
+                histogram.observe(1)
+
+        threads = [threading.Thread(target=observe) for _ in range(4)]
+        [thread.start() for thread in threads]
+        [thread.join() for thread in threads]
+
+        assert histogram.count == 4000
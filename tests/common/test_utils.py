@@ -15,7 +15,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
 import uuid
+import pickle
 import datetime
 import json
 
@@ -28,7 +30,8 @@ except ImportError:
 
 from marvin_python_toolbox.common.utils import (class_property, memoized_class_property, get_datetime, deprecated,
                                         to_json, from_json, is_valid_json, validate_json, generate_key, to_slug,
-                                        url_encode, getattr_qualified, chunks, check_path)
+                                        url_encode, getattr_qualified, chunks, check_path, freeze,
+                                        ReadOnlyDict, ReadOnlyList)
 from marvin_python_toolbox.common.exceptions import InvalidJsonException
 
 instance_count = 0
@@ -110,7 +113,7 @@ def test_to_json_with_numpy():
             return 0.666
 
     d = {'float': FakeNumpyFloat()}
-    assert to_json(d) == '{"float": 0.666}'
+    assert json.loads(to_json(d)) == {'float': 0.666}
 
 
 def test_from_json():
@@ -251,3 +254,39 @@ def test_url_encode_string():
     original = b'http://host.com/path_with_special_char_\xc3\xa1\xc3\xa9\xc3\xad\xc3\xb3\xc3\xba?and=query&string=true'
     transformed = 'http://host.com/path_with_special_char_%C3%A1%C3%A9%C3%AD%C3%B3%C3%BA?and=query&string=true'
     assert url_encode(original) == transformed
+
+
+def test_freeze():
+    frozen = freeze({'a': [1, {'b': 2}], 'c': 'd'})
+
+    assert frozen == {'a': [1, {'b': 2}], 'c': 'd'}
+    assert isinstance(frozen, ReadOnlyDict)
+    assert isinstance(frozen['a'], ReadOnlyList)
+    assert isinstance(frozen['a'][1], ReadOnlyDict)
+    assert json.loads(json.dumps(frozen)) == frozen
+
+    with pytest.raises(TypeError):
+        frozen['c'] = 'e'
+    with pytest.raises(TypeError):
+        frozen.update(c='e')
+    with pytest.raises(TypeError):
+        frozen['a'].append(3)
+    with pytest.raises(TypeError):
+        frozen['a'][1]['b'] = 3
+
+    assert frozen == {'a': [1, {'b': 2}], 'c': 'd'}
+
+
+def test_freeze_copies_are_mutable():
+    frozen = freeze({'a': [1, {'b': 2}]})
+
+    copied = copy.deepcopy(frozen)
+    copied['a'][1]['b'] = 3
+    copied['a'].append(4)
+    assert copied == {'a': [1, {'b': 3}, 4]}
+    assert type(copied) is dict
+
+    assert type(copy.copy(frozen)) is dict
+    assert type(dict(frozen, c=1)) is dict
+    assert pickle.loads(pickle.dumps(frozen)) == frozen
+    assert frozen == {'a': [1, {'b': 2}]}
@@ -15,9 +15,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import sys
 import pytest
 
 
+# asyncio syntax and grpc.aio need python 3
+collect_ignore = ['engine_base/test_aio.py'] if sys.version_info < (3, 6) else []
+
+
 @pytest.fixture
 def config_fixture():
     return {
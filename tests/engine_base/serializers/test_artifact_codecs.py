@@ -0,0 +1,302 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2017] [B2W Digital]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+
+import numpy as np
+import pytest
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+from marvin_python_toolbox.engine_base import EngineBaseTraining
+from marvin_python_toolbox.engine_base.serializers import ArtifactCodec, register_codec, get_codec, registered_codecs
+from marvin_python_toolbox.engine_base.serializers.artifact_codecs import read_manifest, write_manifest, parse_compression
+from marvin_python_toolbox.engine_base.serializers.artifact_codecs import replacing_file
+
+
+@register_codec
+class UpperCodec(ArtifactCodec):
+    name = 'test-upper'
+
+    def dump(self, obj, object_file_path):
+        with open(object_file_path, 'w') as f:
+            f.write(obj.upper())
+
+    def load(self, object_file_path):
+        with open(object_file_path, 'r') as f:
+            return f.read()
+
+
+@pytest.fixture
+def engine(tmpdir):
+    class EngineAction(EngineBaseTraining):
+        def execute(self, params, **kwargs):
+            pass
+
+    def _engine(**kwargs):
+        return EngineAction(default_root_path=str(tmpdir), persistence_mode='local', **kwargs)
+
+    return _engine
+
+
+class TestRegistry(object):
+    def test_registered_codecs(self):
+        for name in ['joblib', 'pickle', 'numpy', 'parquet', 'keras', 'json', 'test-upper']:
+            assert name in registered_codecs()
+
+    def test_get_codec_with_options(self):
+        codec = get_codec('joblib', compress=0, mmap_mode='r')
+        assert codec.options == {'compress': 0, 'mmap_mode': 'r'}
+
+    def test_get_unknown_codec(self):
+        with pytest.raises(ValueError) as e:
+            get_codec('xyz')
+
+        assert e.value.args == ('UnknownArtifactCodec', 'xyz')
+
+    def test_parse_compression(self):
+        assert parse_compression(None) == 0
+        assert parse_compression('none') == 0
+        assert parse_compression(False) == 0
+        assert parse_compression(6) == 6
+        assert parse_compression('lz4') == ['lz4', None]
+        assert parse_compression('zstd:3') == ['zstd', 3]
+        assert parse_compression(['zlib', 1]) == ['zlib', 1]
+
+        with pytest.raises(ValueError) as e:
+            parse_compression('snappy:1')
+
+        assert e.value.args == ('InvalidCompression', 'snappy')
+
+    def test_parse_compression_unicode(self):
+        method, level = parse_compression(u'lz4')
+
+        assert (method, level) == ('lz4', None)
+        assert isinstance(method, str)
+
+    @pytest.mark.parametrize('compression', ['zstd:x', 'zlib:10', 10, -1, ['zstd', 22], ['zlib', 'x'], ['zlib'], 1.5])
+    def test_parse_invalid_compression(self, compression):
+        with pytest.raises(ValueError) as e:
+            parse_compression(compression)
+
+        assert e.value.args[0] == 'InvalidCompression'
+
+    def test_parse_compression_without_zstd_support(self):
+        with mock.patch('marvin_python_toolbox.engine_base.serializers.artifact_codecs._zstd_registered', False):
+            with pytest.raises(ValueError) as e:
+                parse_compression('zstd')
+
+        assert e.value.args == ('InvalidCompression', 'zstd')
+
+    def test_manifest(self, tmpdir):
+        path = str(tmpdir.join('model'))
+        assert read_manifest(path) is None
+
+        write_manifest(path, get_codec('numpy', mmap_mode='r'))
+        codec = read_manifest(path)
+
+        assert codec.name == 'numpy'
+        assert codec.options == {'mmap_mode': 'r', 'allow_pickle': False}
+
+    def test_replacing_file_syncs(self, tmpdir):
+        path = str(tmpdir.join('model'))
+        synced = []
+
+        def fsync_path(synced_path):
+            synced.append((synced_path, os.path.exists(path)))
+
+        with mock.patch('marvin_python_toolbox.engine_base.serializers.artifact_codecs.fsync_path', side_effect=fsync_path):
+            with replacing_file(path) as tmp_file_path:
+                with open(tmp_file_path, 'w') as f:
+                    f.write('data')
+
+        # the file before the rename and its directory after it
+        assert synced == [(tmp_file_path, False), (str(tmpdir), True)]
+
+
+class TestCodecs(object):
+    def test_joblib(self, tmpdir):
+        path = str(tmpdir.join('obj'))
+        get_codec('joblib').dump({'a': [1, 2]}, path)
+        assert get_codec('joblib').load(path) == {'a': [1, 2]}
+
+    @pytest.mark.parametrize('compression', ['zlib:1', 'lz4', 'zstd', 'zstd:9'])
+    def test_joblib_compression(self, tmpdir, compression):
+        pytest.importorskip({'zlib': 'zlib', 'lz4': 'lz4', 'zstd': 'zstandard'}[compression.split(':')[0]])
+
+        path = str(tmpdir.join('obj'))
+        obj = {'weights': np.zeros(10000), 'name': 'model'}
+        get_codec('joblib', compress=compression).dump(obj, path)
+
+        # the compression method is detected from the file header on load
+        loaded = get_codec('joblib').load(path)
+
+        assert os.path.getsize(path) < obj['weights'].nbytes
+        assert loaded['name'] == 'model'
+        assert np.array_equal(loaded['weights'], obj['weights'])
+
+    @pytest.mark.skipif(sys.version_info < (3, 8) or tuple(int(v) for v in np.__version__.split('.')[:2]) < (1, 16),
+                        reason='out-of-band buffers need python 3.8 and numpy 1.16')
+    def test_pickle_out_of_band_buffers(self, tmpdir):
+        path = str(tmpdir.join('obj'))
+        obj = {'weights': np.arange(100, dtype=np.float32), 'bias': np.ones((3, 3)), 'name': 'model'}
+        get_codec('pickle').dump(obj, path)
+
+        loaded = get_codec('pickle').load(path)
+
+        assert loaded['name'] == 'model'
+        assert np.array_equal(loaded['weights'], obj['weights'])
+        assert np.array_equal(loaded['bias'], obj['bias'])
+        assert not loaded['weights'].flags.writeable
+        assert loaded['weights'].ctypes.data % 64 == 0
+
+    def test_pickle_invalid_file(self, tmpdir):
+        path = str(tmpdir.join('obj'))
+        get_codec('joblib').dump([1], path)
+
+        with pytest.raises(ValueError):
+            get_codec('pickle').load(path)
+
+    def test_numpy(self, tmpdir):
+        path = str(tmpdir.join('obj'))
+        get_codec('numpy').dump(np.arange(10), path)
+
+        loaded = get_codec('numpy', mmap_mode='r').load(path)
+
+        assert not os.path.exists(path + '.npy')
+        assert isinstance(loaded, np.memmap)
+        assert np.array_equal(loaded, np.arange(10))
+
+    def test_parquet(self, tmpdir):
+        pandas = pytest.importorskip('pandas')
+        pytest.importorskip('pyarrow')
+
+        path = str(tmpdir.join('obj'))
+        df = pandas.DataFrame({'a': [1, 2, 3], 'b': ['x', 'y', 'z']})
+        get_codec('parquet').dump(df, path)
+
+        assert get_codec('parquet').load(path).equals(df)
+
+    def test_json(self, tmpdir):
+        path = str(tmpdir.join('obj'))
+        get_codec('json').dump({'b': 1, 'a': 2}, path)
+
+        assert open(path).read() == '{\n    "a": 2,\n    "b": 1\n}'
+        assert get_codec('json').load(path) == {'a': 2, 'b': 1}
+
+
+class TestActionCodecsBinding(object):
+    def test_default_bindings(self, engine):
+        action = engine()
+
+        assert action._get_artifact_codec('/tmp/x/metrics').name == 'json'
+        assert action._get_artifact_codec('/tmp/x/model').name == 'joblib'
+        assert action._get_artifact_codec('/tmp/x/model').options['compress'] == 3
+
+    def test_compression_binding(self, engine):
+        assert engine(artifacts_compression='zstd:3')._get_artifact_codec('/tmp/x/model').options['compress'] == ['zstd', 3]
+        assert engine(params={'artifacts_compression': None})._get_artifact_codec('/tmp/x/model').options['compress'] == 0
+
+        # memory mapping needs uncompressed files
+        codec = engine(artifacts_compression='lz4', artifacts_format='mmap')._get_artifact_codec('/tmp/x/model')
+        assert codec.options['compress'] == 0
+
+    def test_compressed_manifest(self, engine):
+        pytest.importorskip('lz4')
+
+        action = engine(artifacts_compression='lz4')
+        action.marvin_model = {'a': 1}
+        path = action._get_object_file_path('_model')
+
+        assert read_manifest(path).options['compress'] == ['lz4', None]
+        assert engine()._load_obj('_model') == {'a': 1}
+
+    def test_mmap_format_binding(self, engine):
+        codec = engine(artifacts_format='mmap')._get_artifact_codec('/tmp/x/model')
+
+        assert codec.options == {'compress': 0, 'mmap_mode': 'r'}
+
+    def test_bindings_from_params(self, engine):
+        action = engine(params={'artifacts_codecs': {'_dataset': 'test-upper', 'model': {'codec': 'numpy', 'mmap_mode': 'r'}}})
+
+        assert action._get_artifact_codec('/tmp/x/dataset').name == 'test-upper'
+        assert action._get_artifact_codec('/tmp/x/model').options['mmap_mode'] == 'r'
+        assert action._get_artifact_codec('/tmp/x/metrics').name == 'json'
+
+    def test_save_and_load_with_manifest(self, engine):
+        action = engine(artifacts_codecs={'dataset': 'test-upper'})
+        action.marvin_dataset = 'data'
+        path = action._get_object_file_path('_dataset')
+
+        assert read_manifest(path).name == 'test-upper'
+
+        # the manifest is used even when the action has no binding
+        assert engine()._load_obj('_dataset') == 'DATA'
+
+    def test_load_without_manifest_uses_binding(self, engine):
+        action = engine(artifacts_codecs={'dataset': 'test-upper'})
+        action.marvin_dataset = 'data'
+        path = action._get_object_file_path('_dataset')
+        os.remove(path + '.manifest')
+
+        assert engine(artifacts_codecs={'dataset': 'test-upper'})._load_obj('_dataset') == 'DATA'
+
+    def test_pickle_rewritten_while_mapped(self, engine, tmpdir):
+        action = engine(artifacts_codecs={'obj': 'pickle'})
+        path = str(tmpdir.join('obj'))
+        action._serializer_dump({'weights': np.zeros(100000)}, path)
+        mapped = action._serializer_load(path)
+
+        action._serializer_dump({'weights': np.ones(10)}, path)
+
+        assert np.array_equal(mapped['weights'], np.zeros(100000))
+        assert np.array_equal(action._serializer_load(path)['weights'], np.ones(10))
+
+    def test_failed_dump_keeps_file(self, engine, tmpdir):
+        action = engine()
+        path = str(tmpdir.join('obj'))
+        action._serializer_dump([1], path)
+
+        with pytest.raises(Exception):
+            action._serializer_dump(lambda: 1, path)
+
+        assert action._serializer_load(path) == [1]
+        assert sorted(tmpdir.listdir()) == [tmpdir.join('obj'), tmpdir.join('obj.manifest')]
+
+    def test_manifest_written_before_artifact(self, engine, tmpdir):
+        action = engine()
+        path = str(tmpdir.join('obj'))
+        artifact_exists = []
+
+        def recording_write_manifest(object_file_path, codec):
+            artifact_exists.append(os.path.exists(object_file_path))
+            write_manifest(object_file_path, codec)
+
+        with mock.patch('marvin_python_toolbox.engine_base.engine_base_action.write_manifest', side_effect=recording_write_manifest):
+            action._serializer_dump([1], path)
+
+        assert artifact_exists == [False]
+        assert action._serializer_load(path) == [1]
+
+    def test_retrieve_obj_with_manifest(self, engine):
+        action = engine(artifacts_codecs={'dataset': 'test-upper'})
+        action.marvin_dataset = 'data'
+
+        assert EngineBaseTraining.retrieve_obj(action._get_object_file_path('_dataset')) == 'DATA'
@@ -15,7 +15,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
 import mock
+from mock import ANY
 import pytest
 
 from marvin_python_toolbox.engine_base import EngineBaseTraining
@@ -47,16 +49,26 @@ class TestKerasSerializer(object):
         mocked_load.assert_called_once_with(mocked_path)
         assert obj == {"me": "here"}
 
-    def test__serializer_dump_keras(self, engine):
+    def test__serializer_dump_keras(self, engine, tmpdir):
         mocked_obj = mock.MagicMock()
-        mocked_path = "/tmp/engine/model"
+        mocked_obj.save.side_effect = lambda path: open(path, 'w').close()
+        mocked_path = str(tmpdir.join("model"))
         engine._serializer_dump(mocked_obj, object_file_path=mocked_path)
-        mocked_obj.save.assert_called_once_with(mocked_path)
+        mocked_obj.save.assert_called_once_with(ANY)
+        assert os.path.exists(mocked_path)
+        assert os.path.exists(mocked_path + ".manifest")
 
-    @mock.patch('marvin_python_toolbox.engine_base.EngineBaseTraining._serializer_dump')
-    def test__serializer_dump_not_keras(self, mocked_dump, engine):
+    @mock.patch('joblib.dump')
+    def test__serializer_dump_not_keras(self, mocked_dump, engine, tmpdir):
         mocked_obj = mock.MagicMock()
-        mocked_path = "/tmp/engine/dataset"
+        mocked_path = str(tmpdir.join("dataset"))
+        mocked_dump.side_effect = lambda obj, path, **kwargs: open(path, 'w').close()
+
         engine._serializer_dump(mocked_obj, object_file_path=mocked_path)
-        mocked_dump.assert_called_once_with(mocked_obj, mocked_path)
+
+        # written to a temporary file renamed to the artifact path
+        mocked_dump.assert_called_once_with(mocked_obj, ANY, protocol=2, compress=3)
+        assert os.path.dirname(mocked_dump.call_args[0][1]) == str(tmpdir)
+        assert os.path.exists(mocked_path)
+        mocked_obj.save.assert_not_called()
 
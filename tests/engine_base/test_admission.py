@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2017] [B2W Digital]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import time
+import threading
+
+import grpc
+import mock
+import pytest
+
+from marvin_python_toolbox.engine_base import EngineBaseOnlineAction
+from marvin_python_toolbox.engine_base.admission import AdmissionController
+from marvin_python_toolbox.engine_base.stubs import actions_pb2_grpc
+from marvin_python_toolbox.engine_base.stubs.actions_pb2 import OnlineActionRequest
+
+
+def _hold_slot(controller):
+    """Take an execution slot in another thread until the returned event is set."""
+    taken, release = threading.Event(), threading.Event()
+
+    def hold():
+        with controller.admitted():
+            taken.set()
+            release.wait(10)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    taken.wait(10)
+    return release, thread
+
+
+class TestAdmissionController(object):
+    def test_admitted(self):
+        controller = AdmissionController(concurrency=2, max_queue_depth=1)
+
+        with controller.admitted():
+            with controller.admitted():
+                assert controller.stats()['running'] == 2
+
+        stats = controller.stats()
+        assert stats['admitted'] == 2
+        assert stats['running'] == 0
+        assert stats['shed'] == {}
+        assert stats['queue_time']['count'] == 2
+
+    def test_shed_when_queue_is_full(self):
+        controller = AdmissionController(concurrency=1, max_queue_depth=1)
+        release, holder = _hold_slot(controller)
+
+        def wait():
+            with controller.admitted():
+                pass
+
+        waiter = threading.Thread(target=wait)
+        waiter.start()
+        while controller.stats()['waiting'] < 1:
+            time.sleep(0.001)
+
+        with pytest.raises(ValueError) as excinfo:
+            with controller.admitted():
+                pass
+
+        release.set()
+        holder.join()
+        waiter.join()
+
+        assert excinfo.value.args == ('RequestShed', 'queue_full')
+        assert controller.shed.snapshot() == {'queue_full': 1}
+        assert controller.admissions.total == 2
+
+    def test_shed_after_queue_time(self):
+        controller = AdmissionController(concurrency=1, max_queue_depth=5, max_queue_time=0.05)
+        release, holder = _hold_slot(controller)
+
+        started_at = time.time()
+        with pytest.raises(ValueError) as excinfo:
+            with controller.admitted():
+                pass
+
+        release.set()
+        holder.join()
+
+        assert excinfo.value.args == ('RequestShed', 'queue_time')
+        assert time.time() - started_at >= 0.05
+        assert controller.stats()['waiting'] == 0
+
+    def test_shed_when_expected_wait_exceeds_queue_time(self):
+        controller = AdmissionController(concurrency=1, max_queue_depth=5, max_queue_time=0.1)
+        controller._service_time = 1
+        release, holder = _hold_slot(controller)
+
+        started_at = time.time()
+        with pytest.raises(ValueError) as excinfo:
+            with controller.admitted():
+                pass
+
+        release.set()
+        holder.join()
+
+        assert excinfo.value.args == ('RequestShed', 'queue_time')
+        assert time.time() - started_at < 0.1
+
+    def test_queued_request_gets_the_released_slot(self):
+        controller = AdmissionController(concurrency=1, max_queue_depth=1, max_queue_time=5)
+        release, holder = _hold_slot(controller)
+
+        threading.Timer(0.05, release.set).start()
+        with controller.admitted():
+            pass
+
+        holder.join()
+        assert controller.admissions.total == 2
+        assert controller.queue_time_histogram.sum >= 0.05
+
+    def test_shed_aborts_the_call(self):
+        controller = AdmissionController(concurrency=1, max_queue_depth=0)
+        release, holder = _hold_slot(controller)
+
+        context = mock.MagicMock()
+        context.abort.side_effect = grpc.RpcError
+
+        with pytest.raises(grpc.RpcError):
+            with controller.admitted(context):
+                pass
+
+        release.set()
+        holder.join()
+
+        context.abort.assert_called_once_with(grpc.StatusCode.RESOURCE_EXHAUSTED, "Request shed by queue_full")
+
+
+class TestOnlineActionAdmission(object):
+    @pytest.fixture
+    def action(self):
+        class Predictor(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message
+
+        return Predictor(default_root_path="/tmp/.marvin")
+
+    @mock.patch('marvin_python_toolbox.engine_base.engine_base_action.futures.ThreadPoolExecutor')
+    @mock.patch('marvin_python_toolbox.engine_base.engine_base_action.grpc.server')
+    def test_prepare_remote_server_enables_admission(self, server_mocked, executor_mocked, action):
+        action._prepare_remote_server(port=0, workers=2, rpc_workers=10)
+
+        assert action._admission is None
+        executor_mocked.assert_called_with(max_workers=2)
+
+        action._prepare_remote_server(port=0, workers=2, rpc_workers=10, max_queue_depth=3, max_queue_time=0.2)
+
+        assert action._admission.concurrency == 2
+        assert action._admission.max_queue_depth == 3
+        assert action._admission.max_queue_time == 0.2
+        executor_mocked.assert_called_with(max_workers=10)
+
+    @mock.patch('marvin_python_toolbox.engine_base.engine_base_action.futures.ThreadPoolExecutor')
+    @mock.patch('marvin_python_toolbox.engine_base.engine_base_action.grpc.server')
+    def test_prepare_remote_server_admits_queued_rpcs(self, server_mocked, executor_mocked, action):
+        action._prepare_remote_server(port=0, workers=2, rpc_workers=2)
+        assert server_mocked.call_args[1]['maximum_concurrent_rpcs'] == 2
+
+        action._prepare_remote_server(port=0, workers=2, rpc_workers=2, max_queue_depth=3)
+        assert server_mocked.call_args[1]['maximum_concurrent_rpcs'] == 7
+        executor_mocked.assert_called_with(max_workers=7)
+
+        action._prepare_remote_server(port=0, workers=2, rpc_workers=10, max_queue_depth=3)
+        assert server_mocked.call_args[1]['maximum_concurrent_rpcs'] == 10
+
+    def test_server_sheds_with_rpc_workers_equal_to_workers(self):
+        started, release = threading.Event(), threading.Event()
+
+        class Predictor(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                started.set()
+                release.wait(10)
+                return input_message
+
+        action = Predictor(default_root_path="/tmp/.marvin")
+        server = action._prepare_remote_server(port=0, workers=1, rpc_workers=1, max_queue_depth=1)
+        port = server.add_insecure_port('localhost:0')
+        server.start()
+
+        try:
+            stub = actions_pb2_grpc.OnlineActionHandlerStub(grpc.insecure_channel('localhost:{}'.format(port)))
+            running = stub._remote_execute.future(OnlineActionRequest(message="1"))
+            assert started.wait(10)
+
+            queued = stub._remote_execute.future(OnlineActionRequest(message="2"))
+            deadline = time.time() + 10
+            while action._admission._waiting < 1 and time.time() < deadline:
+                time.sleep(0.01)
+
+            with pytest.raises(grpc.RpcError) as excinfo:
+                stub._remote_execute(OnlineActionRequest(message="3"))
+
+            release.set()
+
+            assert excinfo.value.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+            assert excinfo.value.details() == "Request shed by queue_full"
+            assert running.result().message == "1"
+            assert queued.result().message == "2"
+            assert action._admission.stats()['shed'] == {'queue_full': 1}
+        finally:
+            release.set()
+            server.stop(0)
+
+    def test_remote_execute_is_shed(self, action):
+        action._admission = AdmissionController(concurrency=1, max_queue_depth=0)
+        release, holder = _hold_slot(action._admission)
+
+        with pytest.raises(ValueError) as excinfo:
+            action._remote_execute(OnlineActionRequest(message="1"), None)
+
+        release.set()
+        holder.join()
+
+        assert excinfo.value.args == ('RequestShed', 'queue_full')
+        assert action._remote_execute(OnlineActionRequest(message="1"), None).message == "1"
+        assert action._admission.stats()['shed'] == {'queue_full': 1}
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2017] [B2W Digital]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import time
+import asyncio
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+import grpc
+import pytest
+
+pytest.importorskip('grpc.aio')
+
+from marvin_python_toolbox.engine_base import EngineBaseOnlineAction, EngineBaseBatchAction
+from marvin_python_toolbox.engine_base.aio import AioServer, is_async_pipeline
+from marvin_python_toolbox.engine_base.stubs import actions_pb2_grpc
+from marvin_python_toolbox.engine_base.stubs.actions_pb2 import OnlineActionRequest, OnlineActionBatchRequest, BatchActionRequest
+from marvin_python_toolbox.engine_base.stubs.actions_pb2 import HealthCheckRequest, HealthCheckResponse, ReloadRequest
+
+
+class Preparator(EngineBaseOnlineAction):
+    def execute(self, input_message, params, **kwargs):
+        return input_message + 1
+
+
+class AsyncPredictor(EngineBaseOnlineAction):
+    async def execute(self, input_message, params, **kwargs):
+        await asyncio.sleep(0.01)
+        return input_message * params["m"]
+
+
+class SyncPredictor(EngineBaseOnlineAction):
+    def execute(self, input_message, params, **kwargs):
+        return input_message * params["m"]
+
+
+class SlowPreparator(EngineBaseOnlineAction):
+    def execute(self, input_message, params, **kwargs):
+        time.sleep(0.3)
+        return input_message
+
+
+class RecordingPredictor(EngineBaseOnlineAction):
+    async def execute(self, input_message, params, **kwargs):
+        self.executed = True
+        return input_message
+
+
+class ReloadingPredictor(EngineBaseOnlineAction):
+    _model = None
+
+    async def execute(self, input_message, params, **kwargs):
+        model = self._model
+        if input_message == "reload":
+            # the reload finishes while this request still uses the old model
+            self._remote_reload(ReloadRequest(artifacts="_model"), None)
+        return model
+
+
+class AsyncTrainer(EngineBaseBatchAction):
+    async def execute(self, params, **kwargs):
+        self.trained = params
+        self.report_progress(progress=0.5, message="half")
+
+
+class SyncTrainer(EngineBaseBatchAction):
+    def execute(self, params, **kwargs):
+        self.report_progress(progress=0.5, message="half")
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def _serve(action, stub_class):
+        server = AioServer(action=action, port=0, workers=2, rpc_workers=10)
+        server.start()
+        servers.append(server)
+        return stub_class(grpc.insecure_channel('localhost:{}'.format(server.port)))
+
+    yield _serve
+
+    for server in servers:
+        server.stop(0)
+
+
+class TestAioServer(object):
+    def test_is_async_pipeline(self):
+        predictor = SyncPredictor()
+        assert not is_async_pipeline(predictor)
+
+        predictor._previous_step = AsyncPredictor()
+        assert is_async_pipeline(predictor)
+
+    def test_async_online_pipeline(self, serve):
+        predictor = AsyncPredictor(params={"m": 2})
+        predictor._previous_step = Preparator()
+        stub = serve(predictor, actions_pb2_grpc.OnlineActionHandlerStub)
+
+        assert stub._remote_execute(OnlineActionRequest(message="3")).message == "8"
+
+        response = stub._remote_execute_batch(OnlineActionBatchRequest(messages=["1", "2"], params="{\"m\": 3}"))
+        assert list(response.messages) == ["6", "9"]
+
+    def test_sync_online_pipeline(self, serve):
+        stub = serve(SyncPredictor(params={"m": 2}), actions_pb2_grpc.OnlineActionHandlerStub)
+
+        assert stub._remote_execute(OnlineActionRequest(message="3")).message == "6"
+        assert stub._health_check(HealthCheckRequest()).status == HealthCheckResponse.OK
+
+    @pytest.mark.parametrize('predictor_class', [SyncPredictor, AsyncPredictor])
+    def test_remote_execute_stream(self, serve, predictor_class):
+        stub = serve(predictor_class(params={"m": 2}), actions_pb2_grpc.OnlineActionHandlerStub)
+
+        responses = stub._remote_execute_stream(OnlineActionRequest(message=str(i)) for i in range(20))
+
+        assert [response.message for response in responses] == [str(i * 2) for i in range(20)]
+
+    def test_async_batch_action(self, serve):
+        trainer = AsyncTrainer()
+        stub = serve(trainer, actions_pb2_grpc.BatchActionHandlerStub)
+
+        assert stub._remote_execute(BatchActionRequest(params="{\"a\": 1}")).message == "Done"
+        assert trainer.trained == {"a": 1}
+
+    @pytest.mark.parametrize('trainer_class', [SyncTrainer, AsyncTrainer])
+    def test_batch_remote_execute_stream(self, serve, trainer_class):
+        stub = serve(trainer_class(), actions_pb2_grpc.BatchActionHandlerStub)
+
+        events = [(event.event, event.message) for event in stub._remote_execute_stream(BatchActionRequest(params="{}"))]
+
+        assert events == [("started", ""), ("progress", "half"), ("finished", ""), ("done", "Done")]
+
+    @mock.patch('marvin_python_toolbox.engine_base.engine_base_action.EngineBaseAction._read_obj')
+    def test_prediction_cache_reload_during_request(self, read_obj_mocked, serve):
+        read_obj_mocked.return_value = "new"
+        predictor = ReloadingPredictor(prediction_cache_size=10)
+        predictor._model = "old"
+        stub = serve(predictor, actions_pb2_grpc.OnlineActionHandlerStub)
+
+        request = OnlineActionRequest(message="\"reload\"")
+        assert stub._remote_execute(request).message == "old"
+        assert len(predictor._prediction_cache) == 0
+        assert stub._remote_execute(request).message == "new"
+
+    def test_abandoned_request_stops_the_pipeline(self, serve):
+        predictor = RecordingPredictor()
+        predictor.executed = False
+        predictor._previous_step = SlowPreparator()
+        stub = serve(predictor, actions_pb2_grpc.OnlineActionHandlerStub)
+
+        with pytest.raises(grpc.RpcError) as excinfo:
+            stub._remote_execute(OnlineActionRequest(message="1"), timeout=0.1)
+
+        assert excinfo.value.code() == grpc.StatusCode.DEADLINE_EXCEEDED
+
+        time.sleep(0.4)
+        assert not predictor.executed
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2017] [B2W Digital]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+import pytest
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+from marvin_python_toolbox.engine_base import EngineBaseOnlineAction
+from marvin_python_toolbox.engine_base.batching import MicroBatcher
+from marvin_python_toolbox.engine_base.stubs.actions_pb2 import OnlineActionRequest
+
+
+class VectorizedAction(EngineBaseOnlineAction):
+    def __init__(self, **kwargs):
+        self.batches = []
+        super(VectorizedAction, self).__init__(**kwargs)
+
+    def execute(self, input_message, params, **kwargs):
+        raise AssertionError("execute_batch must be used")
+
+    def execute_batch(self, input_messages, params, **kwargs):
+        self.batches.append(list(input_messages))
+        if params and params.get("fail"):
+            raise ValueError("failed batch")
+        return [message * params["m"] for message in input_messages]
+
+
+@pytest.fixture
+def action():
+    return VectorizedAction()
+
+
+def submit_concurrently(batcher, messages, params):
+    results = {}
+
+    def submit(message):
+        try:
+            results[message] = batcher.submit(input_message=message, params=params)
+        except Exception as e:
+            results[message] = e
+
+    threads = [threading.Thread(target=submit, args=(message,)) for message in messages]
+    [thread.start() for thread in threads]
+    [thread.join() for thread in threads]
+    return results
+
+
+class TestMicroBatcher:
+    def test_batch_size_buckets(self):
+        assert MicroBatcher._batch_size_buckets(1) == [1]
+        assert MicroBatcher._batch_size_buckets(10) == [1, 2, 4, 8, 10]
+
+    def test_submit_groups_concurrent_messages(self, action):
+        batcher = MicroBatcher(action=action, max_batch_size=8, max_batch_wait=0.5)
+
+        results = submit_concurrently(batcher, range(8), {"m": 2})
+        batcher.close()
+
+        assert results == {message: message * 2 for message in range(8)}
+        assert len(action.batches) < 8
+        assert sorted(sum(action.batches, [])) == list(range(8))
+        assert batcher.batch_size_histogram.count == len(action.batches)
+        assert batcher.queue_latency_histogram.count == 8
+
+    def test_submit_respects_max_batch_size(self, action):
+        batcher = MicroBatcher(action=action, max_batch_size=2, max_batch_wait=0.5)
+
+        submit_concurrently(batcher, range(6), {"m": 1})
+        batcher.close()
+
+        assert all(len(batch) <= 2 for batch in action.batches)
+
+    def test_submit_does_not_mix_params(self, action):
+        batcher = MicroBatcher(action=action, max_batch_size=8, max_batch_wait=0.01)
+
+        first = batcher.submit(input_message=1, params={"m": 2})
+        second = batcher.submit(input_message=1, params={"m": 3})
+        batcher.close()
+
+        assert (first, second) == (2, 3)
+
+    def test_submit_propagates_errors(self, action):
+        batcher = MicroBatcher(action=action, max_batch_size=4, max_batch_wait=0.01)
+
+        with pytest.raises(ValueError):
+            batcher.submit(input_message=1, params={"fail": True})
+
+        assert batcher.submit(input_message=1, params={"m": 5}) == 5
+        batcher.close()
+
+    def test_stats(self, action):
+        batcher = MicroBatcher(action=action, max_batch_size=4, max_batch_wait=0.001)
+        batcher.submit(input_message=1, params={"m": 1})
+        batcher.close()
+
+        stats = batcher.stats()
+
+        assert stats['batch_size']['count'] == 1
+        assert stats['queue_latency']['count'] == 1
+
+
+class TestOnlineActionMicroBatching:
+    @mock.patch('marvin_python_toolbox.engine_base.engine_base_action.actions_pb2_grpc')
+    @mock.patch('marvin_python_toolbox.engine_base.engine_base_action.grpc.server')
+    def test_prepare_remote_server_enables_batcher(self, server_mocked, grpc_mocked, action):
+        server = action._prepare_remote_server(port=50098, workers=1, rpc_workers=3)
+
+        assert server is server_mocked.return_value
+        assert server_mocked.call_args[1]['maximum_concurrent_rpcs'] == 3
+        server.add_insecure_port.assert_called_once_with('[::]:50098')
+        grpc_mocked.add_OnlineActionHandlerServicer_to_server.assert_called_once_with(action, server)
+        assert action._batcher is None
+        assert action._compiled_steps == [action]
+
+        assert server_mocked.call_args[1]['options'] is None
+
+        action._prepare_remote_server(port=50099, workers=1, rpc_workers=1, max_batch_size=4, max_batch_wait=0.01, reuse_port=True)
+
+        assert server_mocked.call_args[1]['options'] == [('grpc.so_reuseport', 1)]
+
+        assert isinstance(action._batcher, MicroBatcher)
+        assert action._batcher.max_batch_size == 4
+        assert action._batcher.max_batch_wait == 0.01
+        action._batcher.close()
+
+    def test_remote_execute_uses_batcher(self, action):
+        action._batcher = MicroBatcher(action=action, max_batch_size=4, max_batch_wait=0.001)
+
+        request = OnlineActionRequest(message="3", params="{\"m\": 2}")
+        response = action._remote_execute(request=request, context=None)
+        action._batcher.close()
+
+        assert response.message == "6"
+        assert action.batches == [[3]]
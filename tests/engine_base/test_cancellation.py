@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2017] [B2W Digital]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import time
+from concurrent import futures
+
+import grpc
+import mock
+import pytest
+
+from marvin_python_toolbox.engine_base import EngineBaseOnlineAction
+from marvin_python_toolbox.engine_base.cancellation import CancellationToken, cancellation_status, aborting_cancelled
+from marvin_python_toolbox.engine_base.stubs import actions_pb2_grpc
+from marvin_python_toolbox.engine_base.stubs.actions_pb2 import OnlineActionRequest, OnlineActionBatchRequest
+
+
+class TestCancellationToken(object):
+    def test_cancel(self):
+        token = CancellationToken()
+        assert not token.cancelled
+        token.raise_if_cancelled("Predictor")
+
+        token.cancel()
+
+        assert token.cancelled
+        with pytest.raises(ValueError) as excinfo:
+            token.raise_if_cancelled("Predictor")
+        assert excinfo.value.args == ('ExecutionCancelled', 'Predictor')
+
+    def test_deadline(self):
+        token = CancellationToken(deadline=time.time() - 1)
+
+        assert token.expired
+        assert token.time_remaining() == 0
+        with pytest.raises(ValueError) as excinfo:
+            token.raise_if_cancelled("Predictor")
+        assert excinfo.value.args == ('DeadlineExceeded', 'Predictor')
+
+    def test_without_deadline(self):
+        token = CancellationToken()
+
+        assert not token.expired
+        assert token.time_remaining() is None
+
+    def test_from_context(self):
+        context = mock.MagicMock(spec=['time_remaining', 'add_callback'])
+        context.time_remaining.return_value = 10
+
+        token = CancellationToken.from_context(context)
+
+        assert 9 < token.time_remaining() <= 10
+        on_cancel, = context.add_callback.call_args[0]
+        on_cancel()
+        assert token.cancelled
+
+    def test_from_aio_context(self):
+        context = mock.MagicMock(spec=['time_remaining', 'add_done_callback'])
+        context.time_remaining.return_value = None
+
+        token = CancellationToken.from_context(context)
+
+        assert token.deadline is None
+        on_done, = context.add_done_callback.call_args[0]
+        on_done(context)
+        assert token.cancelled
+
+    def test_from_no_context(self):
+        assert CancellationToken.from_context(None) is None
+
+    def test_cancellation_status(self):
+        assert cancellation_status(ValueError('ExecutionCancelled', 'a')) == grpc.StatusCode.CANCELLED
+        assert cancellation_status(ValueError('DeadlineExceeded', 'a')) == grpc.StatusCode.DEADLINE_EXCEEDED
+        assert cancellation_status(ValueError('InvalidCompression', 'a')) is None
+        assert cancellation_status(KeyError('ExecutionCancelled')) is None
+
+    def test_aborting_cancelled(self):
+        context = mock.MagicMock()
+
+        with aborting_cancelled(context):
+            raise ValueError('DeadlineExceeded', 'Predictor')
+
+        context.abort.assert_called_once_with(grpc.StatusCode.DEADLINE_EXCEEDED, "DeadlineExceeded Predictor")
+
+    def test_aborting_cancelled_other_errors(self):
+        context = mock.MagicMock()
+
+        with pytest.raises(ValueError):
+            with aborting_cancelled(context):
+                raise ValueError('BatchSizeMismatch', 'Predictor', 1, 2)
+
+        assert not context.abort.called
+
+
+class Preparator(EngineBaseOnlineAction):
+    def execute(self, input_message, params, **kwargs):
+        time.sleep(0.3)
+        return input_message
+
+
+class Predictor(EngineBaseOnlineAction):
+    executed = False
+
+    def execute(self, input_message, params, **kwargs):
+        Predictor.executed = True
+        return input_message
+
+
+@pytest.fixture
+def online_stub():
+    predictor = Predictor(default_root_path="/tmp/.marvin")
+    predictor._previous_step = Preparator(default_root_path="/tmp/.marvin")
+    Predictor.executed = False
+
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    actions_pb2_grpc.add_OnlineActionHandlerServicer_to_server(predictor, server)
+    port = server.add_insecure_port('localhost:0')
+    server.start()
+
+    yield actions_pb2_grpc.OnlineActionHandlerStub(grpc.insecure_channel('localhost:{}'.format(port)))
+
+    server.stop(0)
+
+
+class TestRemoteExecuteDeadline(object):
+    def test_execute_receives_the_token(self):
+        received = []
+
+        class Action(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                received.append(kwargs.get('cancellation'))
+                return input_message
+
+        context = mock.MagicMock()
+        context.time_remaining.return_value = 5
+
+        Action(default_root_path="/tmp/.marvin")._remote_execute(OnlineActionRequest(message="1"), context)
+
+        assert isinstance(received[0], CancellationToken)
+
+    def test_abandoned_request_stops_the_pipeline(self, online_stub):
+        with pytest.raises(grpc.RpcError) as excinfo:
+            online_stub._remote_execute(OnlineActionRequest(message="1"), timeout=0.1)
+
+        assert excinfo.value.code() == grpc.StatusCode.DEADLINE_EXCEEDED
+
+        time.sleep(0.4)
+        assert not Predictor.executed
+
+    def test_abandoned_batch_stops_the_pipeline(self, online_stub):
+        with pytest.raises(grpc.RpcError):
+            online_stub._remote_execute_batch(OnlineActionBatchRequest(messages=["1"]), timeout=0.1)
+
+        time.sleep(0.4)
+        assert not Predictor.executed
+
+    def test_request_within_deadline(self, online_stub):
+        assert online_stub._remote_execute(OnlineActionRequest(message="1"), timeout=5).message == "1"
+        assert Predictor.executed
@@ -17,10 +17,15 @@
 
 from builtins import str
 import joblib as serializer
+import numpy as np
 import pytest
+import grpc
 import os
 import shutil
 import copy
+import re
+import json
+import threading
 from mock import ANY
 try:
     import mock
@@ -31,6 +36,10 @@ from marvin_python_toolbox.engine_base import EngineBaseBatchAction
 from marvin_python_toolbox.engine_base import EngineBaseAction, EngineBaseOnlineAction
 from marvin_python_toolbox.engine_base.stubs.actions_pb2 import HealthCheckResponse, HealthCheckRequest
 from marvin_python_toolbox.engine_base.stubs.actions_pb2 import OnlineActionRequest, ReloadRequest, BatchActionRequest
+from marvin_python_toolbox.engine_base.stubs.actions_pb2 import OnlineActionBatchRequest
+from marvin_python_toolbox.engine_base.serializers import ArtifactCodec, register_codec
+from marvin_python_toolbox.engine_base.payloads import NUMPY, decode_payload, encode_payload
+from marvin_python_toolbox.common import json_codec
 
 
 @pytest.fixture
@@ -42,6 +51,38 @@ def engine_action():
     return EngineAction(default_root_path="/tmp/.marvin")
 
 
+@register_codec
+class SyncCodec(ArtifactCodec):
+    name = 'test-sync'
+    background_writes = False
+
+    def dump(self, obj, object_file_path):
+        with open(object_file_path, 'w') as f:
+            f.write(obj)
+
+    def load(self, object_file_path):
+        with open(object_file_path, 'r') as f:
+            return f.read()
+
+
+def _blocked_async_action(root_path, **kwargs):
+    """Action saving objects in background with writes blocked until its release event is set."""
+    class EngineAction(EngineBaseAction):
+        def execute(self, params, **kwargs):
+            return 1
+
+    action = EngineAction(default_root_path=root_path, persistence_mode='local', async_persistence=True, **kwargs)
+    action.release = threading.Event()
+    serializer_dump = action._serializer_dump
+
+    def blocked_dump(obj, object_file_path):
+        action.release.wait()
+        serializer_dump(obj, object_file_path)
+
+    action._serializer_dump = blocked_dump
+    return action
+
+
 @pytest.fixture
 def batch_engine_action():
     class BatchEngineAction(EngineBaseBatchAction):
@@ -221,7 +262,7 @@ class TestEngineBaseAction:
         engine_action = StringReturnedAction()
         response = engine_action._remote_execute(request=request, context=None)
 
-        assert response.message == "{\"r\": 1}"
+        assert json.loads(response.message) == {"r": 1}
 
     def test_remote_execute_with_list_response(self):
         class StringReturnedAction(EngineBaseOnlineAction):
@@ -232,18 +273,388 @@ class TestEngineBaseAction:
         engine_action = StringReturnedAction()
         response = engine_action._remote_execute(request=request, context=None)
 
-        assert response.message == "[1, 2]"
+        assert json.loads(response.message) == [1, 2]
 
-    @mock.patch('marvin_python_toolbox.engine_base.engine_base_action.EngineBaseAction._load_obj')
-    def test_remote_reload_with_artifacts(self, load_obj_mocked, engine_action):
+    def test_remote_execute_with_binary_payload(self):
+        class SumAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message.sum(axis=1)
+
+        payload = encode_payload(np.arange(6, dtype='float32').reshape(2, 3), NUMPY)
+        request = OnlineActionRequest(payload=payload, content_type=NUMPY)
+        response = SumAction()._remote_execute(request=request, context=None)
+
+        assert response.message == ""
+        assert response.content_type == NUMPY
+        assert decode_payload(response.payload, response.content_type).tolist() == [3.0, 12.0]
+
+    def test_remote_execute_with_binary_payload_unencodable_result(self):
+        class LabelAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return {"label": "cat", "score": float(input_message.max())}
+
+        request = OnlineActionRequest(payload=encode_payload([0.25, 0.75], NUMPY), content_type=NUMPY)
+        response = LabelAction()._remote_execute(request=request, context=None)
+
+        assert response.content_type == ""
+        assert response.payload == b""
+        assert json.loads(response.message) == {"label": "cat", "score": 0.75}
+
+    def test_remote_execute_stream(self):
+        class SumAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message + params["k"]
+
+        requests = (OnlineActionRequest(message=str(i), params="{\"k\": 10}") for i in range(5))
+        responses = SumAction()._remote_execute_stream(request_iterator=requests, context=None)
+
+        assert [response.message for response in responses] == ["10", "11", "12", "13", "14"]
+
+    def test_remote_execute_stream_with_binary_payload(self):
+        class EchoAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message
+
+        requests = [
+            OnlineActionRequest(payload=encode_payload([1, 2], NUMPY), content_type=NUMPY),
+            OnlineActionRequest(message="[3, 4]"),
+        ]
+        responses = list(EchoAction()._remote_execute_stream(request_iterator=iter(requests), context=None))
+
+        assert decode_payload(responses[0].payload, NUMPY).tolist() == [1, 2]
+        assert json.loads(responses[1].message) == [3, 4]
+
+    def test_prediction_cache(self):
+        class Preparator(EngineBaseOnlineAction):
+            calls = 0
+
+            def execute(self, input_message, params, **kwargs):
+                Preparator.calls += 1
+                return input_message
+
+        class Predictor(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return {"score": input_message["a"] * 2}
+
+        predictor = Predictor(params={"prediction_cache_size": 10})
+        predictor._previous_step = Preparator()
+
+        responses = [predictor._remote_execute(OnlineActionRequest(message=message), None).message
+                     for message in ['{"a": 1, "b": 2}', '{"b": 2, "a": 1}', '{"a": 2, "b": 2}']]
+
+        assert [json.loads(response) for response in responses] == [{"score": 2}, {"score": 2}, {"score": 4}]
+        assert Preparator.calls == 2
+        assert predictor._prediction_cache.stats()['hits'] == 1
+        assert predictor._prediction_cache.stats()['misses'] == 2
+
+        predictor._remote_execute(OnlineActionRequest(message='{"a": 1, "b": 2}', params='{"other": 1}'), None)
+        assert Preparator.calls == 3
+
+    @mock.patch('marvin_python_toolbox.engine_base.engine_base_action.EngineBaseAction._read_obj')
+    def test_prediction_cache_cleared_on_reload(self, read_obj_mocked):
+        class Predictor(EngineBaseOnlineAction):
+            _model = None
+
+            def execute(self, input_message, params, **kwargs):
+                return input_message
+
+        predictor = Predictor(prediction_cache_size=10, prediction_cache_ttl=60)
+        predictor._remote_execute(OnlineActionRequest(message="1"), None)
+        assert len(predictor._prediction_cache) == 1
+
+        predictor._remote_reload(ReloadRequest(artifacts="_model"), None)
+
+        assert len(predictor._prediction_cache) == 0
+
+    @mock.patch('marvin_python_toolbox.engine_base.engine_base_action.EngineBaseAction._read_obj')
+    def test_prediction_cache_reload_during_request(self, read_obj_mocked):
+        read_obj_mocked.return_value = "new"
+
+        class Predictor(EngineBaseOnlineAction):
+            _model = None
+
+            def execute(self, input_message, params, **kwargs):
+                model = self._model
+                if input_message == "reload":
+                    # the reload finishes while this request still uses the old model
+                    self._remote_reload(ReloadRequest(artifacts="_model"), None)
+                return model
+
+        predictor = Predictor(prediction_cache_size=10)
+        predictor._model = "old"
+
+        request = OnlineActionRequest(message="\"reload\"")
+        assert predictor._remote_execute(request, None).message == "old"
+        assert len(predictor._prediction_cache) == 0
+
+        assert predictor._remote_execute(request, None).message == "new"
+
+    def test_prediction_cache_skips_binary_payloads(self):
+        class Predictor(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message
+
+        predictor = Predictor(prediction_cache_size=10)
+        request = OnlineActionRequest(payload=encode_payload([1, 2], NUMPY), content_type=NUMPY)
+        predictor._remote_execute(request, None)
+
+        assert len(predictor._prediction_cache) == 0
+        assert predictor._prediction_cache.stats()['misses'] == 0
+
+    def test_step_cache(self):
+        class Preparator(EngineBaseOnlineAction):
+            _step_cache_size = 10
+            calls = 0
+
+            def execute(self, input_message, params, **kwargs):
+                Preparator.calls += 1
+                return {"features": [input_message["a"], 1]}
+
+        class Predictor(EngineBaseOnlineAction):
+            calls = 0
+
+            def execute(self, input_message, params, **kwargs):
+                Predictor.calls += 1
+                return sum(input_message["features"])
+
+        predictor = Predictor()
+        predictor._previous_step = Preparator()
+
+        assert [predictor._pipeline_execute({"a": a}, {}) for a in (1, 2, 1)] == [2, 3, 2]
+        assert (Preparator.calls, Predictor.calls) == (2, 3)
+        assert predictor._cache_stats() == {"Preparator": {'size': 2, 'hits': 1, 'misses': 2, 'evictions': 0, 'expirations': 0}}
+
+    def test_step_cache_in_batches(self):
+        class Preparator(EngineBaseOnlineAction):
+            batches = []
+
+            def execute(self, input_message, params, **kwargs):
+                return input_message * 10
+
+            def execute_batch(self, input_messages, params, **kwargs):
+                Preparator.batches.append(input_messages)
+                return super(Preparator, self).execute_batch(input_messages, params, **kwargs)
+
+        preparator = Preparator(step_cache_size=10)
+
+        assert preparator._pipeline_execute_batch([1, 2], {}) == [10, 20]
+        assert preparator._pipeline_execute_batch([2, 3, 1], {}) == [20, 30, 10]
+        assert preparator._pipeline_execute_batch([3], {}) == [30]
+        assert Preparator.batches == [[1, 2], [3]]
+
+    @mock.patch('marvin_python_toolbox.engine_base.engine_base_action.EngineBaseAction._read_obj')
+    def test_step_cache_of_previous_steps_kept_on_reload(self, read_obj_mocked):
+        class Preparator(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message
+
+        class Predictor(EngineBaseOnlineAction):
+            _model = None
+
+            def execute(self, input_message, params, **kwargs):
+                return input_message
+
+        predictor = Predictor(step_cache_size=10)
+        predictor._previous_step = Preparator(step_cache_size=10)
+        predictor._pipeline_execute(1, {})
+
+        predictor._remote_reload(ReloadRequest(artifacts="_model"), None)
+
+        assert len(predictor._previous_step._step_cache) == 1
+        assert len(predictor._step_cache) == 0
+
+    def test_compiled_pipeline(self):
+        class Step(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message + [self.action_name]
+
+        class First(Step):
+            pass
+
+        class Second(Step):
+            pass
+
+        class Last(Step):
+            pass
+
+        last = Last()
+        last._previous_step = Second()
+        last._previous_step._previous_step = First()
+
+        steps = last._compile_pipeline()
+
+        assert [step.action_name for step in steps] == ["First", "Second", "Last"]
+        assert last._pipeline_steps() is steps
+        assert last._pipeline_execute([], {}) == ["First", "Second", "Last"]
+        assert last._pipeline_execute_batch([[]], {}) == [["First", "Second", "Last"]]
+        assert [step['count'] for step in last._pipeline_stats().values()] == [2, 2, 2]
+
+    def test_pipeline_execute_long_chains(self):
+        class Increment(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message + 1
+
+        root = step = Increment()
+        for _ in range(3000):
+            step._previous_step = Increment()
+            step = step._previous_step
+
+        assert root._pipeline_execute(0, {}) == 3001
+
+    def test_pipeline_stats_are_logged(self):
+        class Predictor(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message
+
+        predictor = Predictor()
+        predictor._last_stats_report = 0
+
+        with mock.patch('marvin_python_toolbox.engine_base.engine_base_action.logger') as logger_mocked:
+            predictor._pipeline_execute(1, {})
+            predictor._pipeline_execute(1, {})
+
+        stats_logs = [call for call in logger_mocked.info.call_args_list if "Pipeline stats" in call[0][0]]
+        assert len(stats_logs) == 1
+
+    def test_parse_params_cached(self):
+        class Predictor(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message
+
+        predictor = Predictor(params={"default": 1}, params_cache_size=128)
+
+        with mock.patch('marvin_python_toolbox.common.json_codec.loads', side_effect=json_codec.loads) as loads_mocked:
+            params = predictor._parse_params('{"a": [1, 2]}')
+            assert predictor._parse_params('{"a": [1, 2]}') is params
+            loads_mocked.assert_called_once_with('{"a": [1, 2]}')
+
+        assert params == {"a": [1, 2]}
+
+        with pytest.raises(TypeError):
+            params["a"] = 1
+        with pytest.raises(TypeError):
+            params["a"].append(3)
+
+    def test_parse_params_cached_defaults_are_read_only(self):
+        class Predictor(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message
+
+        predictor = Predictor(params={"default": [1]}, params_cache_size=128)
+        params = predictor._parse_params('')
+
+        assert params == {"default": [1]}
+        assert predictor._parse_params(None) is params
+
+        with pytest.raises(TypeError):
+            params["default"] = 2
+        with pytest.raises(TypeError):
+            params["default"].append(2)
+
+        assert predictor._params == {"default": [1]}
+
+    def test_parse_params_cache_disabled(self):
+        class Predictor(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message
+
+        predictor = Predictor()
+        params = predictor._parse_params('{"a": 1}')
+        params["a"] = 2
+
+        assert predictor._params_cache is None
+        assert predictor._parse_params('{"a": 1}') == {"a": 1}
+
+    def test_prediction_cache_disabled_by_default(self):
+        class Predictor(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message
+
+        assert Predictor()._prediction_cache is None
+
+    def test_remote_execute_with_unsupported_content_type(self):
+        class EchoAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message
+
+        request = OnlineActionRequest(payload=b"data", content_type="text/csv")
+
+        with pytest.raises(ValueError) as excinfo:
+            EchoAction()._remote_execute(request=request, context=None)
+
+        assert excinfo.value.args == ('UnsupportedContentType', 'text/csv')
+
+    @mock.patch('marvin_python_toolbox.engine_base.engine_base_action.EngineBaseAction._read_obj')
+    def test_remote_reload_with_artifacts(self, read_obj_mocked, engine_action):
         objs_key = "obj1"
         engine_action._save_obj(objs_key, "check")
+        read_obj_mocked.return_value = "new"
         request = ReloadRequest(artifacts=objs_key, protocol='xyz')
 
         response = engine_action._remote_reload(request, None)
-        load_obj_mocked.assert_called_once_with(force=True, object_reference=u'obj1')
+        read_obj_mocked.assert_called_once_with(u'obj1')
+        assert engine_action.obj1 == "new"
         assert response.message == "Reloaded"
 
+    def test_remote_reload_swaps_after_loading(self, engine_action):
+        engine_action._model = "old model"
+        engine_action._metrics = "old metrics"
+        loading = threading.Event()
+        release = threading.Event()
+
+        def read_obj(object_reference):
+            if object_reference == "_metrics":
+                loading.set()
+                release.wait()
+            return object_reference.replace("_", "new ")
+
+        engine_action._read_obj = read_obj
+        reload_thread = threading.Thread(target=engine_action._remote_reload, args=(ReloadRequest(artifacts="_model,_metrics"), None))
+        reload_thread.start()
+        loading.wait()
+
+        # requests keep seeing the old objects while the new ones are loaded
+        assert (engine_action._model, engine_action._metrics) == ("old model", "old metrics")
+
+        release.set()
+        reload_thread.join()
+
+        assert (engine_action._model, engine_action._metrics) == ("new model", "new metrics")
+
+    def test_remote_reload_failure_keeps_current_objects(self, engine_action):
+        engine_action._model = "old model"
+        engine_action._metrics = "old metrics"
+        engine_action._read_obj = mock.MagicMock(side_effect=["new model", IOError("missing")])
+
+        with pytest.raises(IOError):
+            engine_action._remote_reload(ReloadRequest(artifacts="_model,_metrics"), None)
+
+        assert (engine_action._model, engine_action._metrics) == ("old model", "old metrics")
+
+    def test_load_obj_loads_once_for_concurrent_requests(self, engine_action):
+        engine_action._persistence_mode = 'local'
+        engine_action._model = None
+        reading = threading.Event()
+        release = threading.Event()
+
+        def read_obj(object_reference):
+            reading.set()
+            release.wait()
+            return "model"
+
+        engine_action._read_obj = mock.MagicMock(side_effect=read_obj)
+        threads = [threading.Thread(target=engine_action._load_obj, args=("_model",)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+
+        reading.wait()
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert engine_action._model == "model"
+        assert engine_action._read_obj.call_count == 1
+
     @mock.patch('marvin_python_toolbox.engine_base.engine_base_action.EngineBaseAction._load_obj')
     def test_remote_reload_without_artifacts(self, load_obj_mocked, engine_action):
         request = ReloadRequest(artifacts=None, protocol='xyz')
@@ -271,6 +682,211 @@ class TestEngineBaseAction:
 
         assert new_obj == engine_action._params
 
+    def test_artifacts_format_from_params(self):
+        class EngineAction(EngineBaseAction):
+            def execute(self, params, **kwargs):
+                return 1
+
+        assert EngineAction()._artifacts_format == 'compressed'
+        assert EngineAction(params={"artifacts_format": "mmap"})._artifacts_format == 'mmap'
+        assert EngineAction(params={"artifacts_format": "mmap"}, artifacts_format='compressed')._artifacts_format == 'compressed'
+
+        with pytest.raises(ValueError):
+            EngineAction(artifacts_format='xyz')
+
+    def test_mmap_artifacts_format(self, engine_action):
+        obj = {"weights": np.arange(1000, dtype=np.float64)}
+        path = engine_action._get_object_file_path("_model")
+        engine_action._artifacts_format = 'mmap'
+        engine_action._serializer_dump(obj, path)
+
+        loaded = engine_action._serializer_load(path)
+
+        assert isinstance(loaded["weights"], np.memmap)
+        assert not loaded["weights"].flags.writeable
+        assert np.array_equal(loaded["weights"], obj["weights"])
+
+    def test_mmap_artifacts_format_loads_compressed_files(self, engine_action):
+        obj = [6, 5, 4]
+        path = engine_action._get_object_file_path("_model")
+        engine_action._serializer_dump(obj, path)
+
+        engine_action._artifacts_format = 'mmap'
+
+        assert engine_action._serializer_load(path) == obj
+
+    def test_mmap_artifacts_rewritten_while_mapped(self, tmpdir):
+        class EngineAction(EngineBaseAction):
+            def execute(self, params, **kwargs):
+                return 1
+
+        action = EngineAction(default_root_path=str(tmpdir), artifacts_format='mmap')
+        path = action._get_object_file_path("_model")
+        action._serializer_dump({"weights": np.zeros(100000)}, path)
+        mapped = action._serializer_load(path)
+
+        # a new model replaces the file, the mapped one must stay readable and unchanged
+        action._serializer_dump({"weights": np.ones(10)}, path)
+
+        assert np.array_equal(mapped["weights"], np.zeros(100000))
+        assert np.array_equal(action._serializer_load(path)["weights"], np.ones(10))
+        assert sorted(os.listdir(os.path.dirname(path))) == ["model", "model.manifest"]
+
+    def test_serializer_dump_is_atomic(self, tmpdir):
+        class FailingCodec(ArtifactCodec):
+            name = 'test-failing'
+
+            def dump(self, obj, object_file_path):
+                with open(object_file_path, 'w') as f:
+                    f.write('partial')
+                raise IOError('disk full')
+
+        class EngineAction(EngineBaseAction):
+            def execute(self, params, **kwargs):
+                return 1
+
+        action = EngineAction(default_root_path=str(tmpdir))
+        path = action._get_object_file_path('_model')
+        action._serializer_dump([1, 2], path)
+
+        with mock.patch.object(action, '_get_artifact_codec', return_value=FailingCodec()):
+            with pytest.raises(IOError):
+                action._serializer_dump([3], path)
+
+        assert action._serializer_load(path) == [1, 2]
+        assert sorted(os.listdir(os.path.dirname(path))) == ['model', 'model.manifest']
+
+    def test_versioned_artifacts(self, tmpdir):
+        class EngineAction(EngineBaseAction):
+            def execute(self, params, **kwargs):
+                return 1
+
+        action = EngineAction(default_root_path=str(tmpdir), persistence_mode='local', is_remote_calling=True, artifacts_versions=2)
+        action._save_obj('_model', [1])
+        action._save_obj('_metrics', {'acc': 0.9})
+        action._save_obj('_model', [2])
+
+        directory = action._get_artifacts_directory()
+        versions = sorted(name for name in os.listdir(directory) if name != 'current')
+
+        assert len(versions) == 2
+        assert action._get_object_file_path('_model') == os.path.join(directory, 'current', 'model')
+
+        loader = EngineAction(default_root_path=str(tmpdir), persistence_mode='local', params={'artifacts_versions': 2})
+        assert loader._load_obj('_model') == [2]
+        assert loader._load_obj('_metrics') == {'acc': 0.9}
+
+        # the previous version is still complete on disk
+        assert action._serializer_load(os.path.join(directory, versions[0], 'model')) == [1]
+        assert action._serializer_load(os.path.join(directory, versions[0], 'metrics')) == {'acc': 0.9}
+
+    def test_versioned_pipeline_execution(self, tmpdir):
+        class Preparator(EngineBaseBatchAction):
+            def execute(self, params, **kwargs):
+                self._save_obj('_dataset', [params["run"]])
+
+        class Trainer(EngineBaseBatchAction):
+            def execute(self, params, **kwargs):
+                if params.get("fail"):
+                    raise ValueError('TrainingFailed')
+                # reads the dataset saved by the previous step in the same execution
+                self._save_obj('_model', self._load_obj('_dataset', force=True) * 2)
+
+        settings = dict(default_root_path=str(tmpdir), persistence_mode='local', is_remote_calling=True, async_persistence=True,
+                        artifacts_versions=3)
+        trainer = Trainer(**settings)
+        trainer._previous_step = Preparator(**settings)
+        directory = trainer._get_artifacts_directory()
+
+        trainer._remote_execute(BatchActionRequest(params='{"run": 1}'), None)
+        trainer._remote_execute(BatchActionRequest(params='{"run": 2}'), None)
+
+        with pytest.raises(ValueError):
+            trainer._remote_execute(BatchActionRequest(params='{"run": 3, "fail": true}'), None)
+
+        # one version per successful execution, the failed one is discarded
+        versions = sorted(name for name in os.listdir(directory) if name != 'current')
+        assert len(versions) == 2
+
+        loader = Trainer(**settings)
+        assert loader._load_obj('_dataset') == [2]
+        assert loader._load_obj('_model') == [2, 2]
+        assert loader._serializer_load(os.path.join(directory, versions[0], 'model')) == [1, 1]
+
+    def test_async_persistence(self, tmpdir):
+        action = _blocked_async_action(str(tmpdir))
+
+        try:
+            # returns before the object is written
+            action._save_obj('_model', [1, 2])
+            assert not os.path.exists(action._get_object_file_path('_model'))
+        finally:
+            action.release.set()
+
+        action._flush_pending_saves()
+
+        assert action._serializer_load(action._get_object_file_path('_model')) == [1, 2]
+
+    def test_async_persistence_writes_the_assigned_object(self, tmpdir):
+        action = _blocked_async_action(str(tmpdir))
+        model = {"weights": [1, 2]}
+        written = []
+
+        persist_obj = action._persist_obj
+
+        def recording_persist_obj(object_reference, obj):
+            written.append(obj)
+            persist_obj(object_reference, obj)
+
+        action._persist_obj = recording_persist_obj
+
+        try:
+            action._save_obj('_model', model)
+        finally:
+            action.release.set()
+
+        action._flush_pending_saves()
+
+        assert written[0] is model
+        assert action._serializer_load(action._get_object_file_path('_model')) == {"weights": [1, 2]}
+
+    def test_load_obj_waits_async_persistence(self, tmpdir):
+        action = _blocked_async_action(str(tmpdir))
+        action._save_obj('_model', [1, 2])
+        action._model = None
+
+        loaded = []
+        loader = threading.Thread(target=lambda: loaded.append(action._load_obj('_model')))
+        loader.start()
+        loader.join(0.2)
+
+        # the load is blocked until the write finishes
+        assert loader.is_alive()
+        assert loaded == []
+
+        action.release.set()
+        loader.join()
+
+        assert loaded == [[1, 2]]
+
+    def test_async_persistence_sync_codecs(self, tmpdir):
+        action = _blocked_async_action(str(tmpdir), artifacts_codecs={'model': 'test-sync'})
+        action.release.set()
+
+        with mock.patch('marvin_python_toolbox.engine_base.engine_base_action.get_background_writer') as writer_mocked:
+            action._save_obj('_model', "model")
+
+        assert not writer_mocked.return_value.submit.called
+        assert action._serializer_load(action._get_object_file_path('_model')) == "model"
+
+    def test_async_persistence_from_params(self):
+        class EngineAction(EngineBaseAction):
+            def execute(self, params, **kwargs):
+                return 1
+
+        assert not EngineAction()._async_persistence
+        assert EngineAction(params={"async_persistence": True})._async_persistence
+
 
 class TestEngineBaseBatchAction:
     def setup(self):
@@ -284,15 +900,33 @@ class TestEngineBaseBatchAction:
 
     def test_pipeline_execute_with_previous_steps(self, batch_engine_action):
         previous = copy.copy(batch_engine_action)
-        previous._pipeline_execute = mock.MagicMock()
+        previous.execute = mock.MagicMock()
         batch_engine_action._previous_step = previous
         batch_engine_action.execute = mock.MagicMock()
 
         batch_engine_action._pipeline_execute(params=123)
         
-        previous._pipeline_execute.assert_called_once_with(123)
+        previous.execute.assert_called_once_with(123)
         batch_engine_action.execute.assert_called_once_with(123)
 
+    def test_pipeline_stats(self):
+        class Preparator(EngineBaseBatchAction):
+            def execute(self, params, **kwargs):
+                pass
+
+        class Trainer(EngineBaseBatchAction):
+            def execute(self, params, **kwargs):
+                pass
+
+        trainer = Trainer(default_root_path="/tmp/.marvin")
+        trainer._previous_step = Preparator(default_root_path="/tmp/.marvin")
+        trainer._pipeline_execute(params={})
+        trainer._pipeline_execute(params={})
+
+        stats = trainer._pipeline_stats()
+        assert list(stats.keys()) == ["Preparator", "Trainer"]
+        assert [step['count'] for step in stats.values()] == [2, 2]
+
     def test_remote_execute_without_request_params(self, batch_engine_action):
         batch_engine_action._params = 123
         batch_engine_action._pipeline_execute = mock.MagicMock()
@@ -302,6 +936,25 @@ class TestEngineBaseBatchAction:
 
         batch_engine_action._pipeline_execute.assert_called_once_with(params=123)
 
+    def test_remote_execute_flushes_pending_saves(self, batch_engine_action):
+        previous_action = copy.copy(batch_engine_action)
+        batch_engine_action._previous_step = previous_action
+        batch_engine_action._flush_pending_saves = mock.MagicMock()
+        request = BatchActionRequest(params=None)
+
+        batch_engine_action._remote_execute(request, None)
+
+        batch_engine_action._flush_pending_saves.assert_called_once_with()
+
+    def test_flush_pending_saves_of_previous_steps(self, batch_engine_action):
+        previous_action = copy.copy(batch_engine_action)
+        previous_action._flush_pending_saves = mock.MagicMock()
+        batch_engine_action._previous_step = previous_action
+
+        batch_engine_action._flush_pending_saves()
+
+        previous_action._flush_pending_saves.assert_called_once_with()
+
     def test_remote_execute_with_request_params(self, batch_engine_action):
         batch_engine_action._params = 123
         batch_engine_action._pipeline_execute = mock.MagicMock()
@@ -311,6 +964,77 @@ class TestEngineBaseBatchAction:
 
         batch_engine_action._pipeline_execute.assert_called_once_with(params={u"test": 123})
 
+    def test_remote_execute_stream(self):
+        class Preparator(EngineBaseBatchAction):
+            def execute(self, params, **kwargs):
+                pass
+
+        class Trainer(EngineBaseBatchAction):
+            def execute(self, params, **kwargs):
+                for epoch in range(params["epochs"]):
+                    self.report_progress(progress=(epoch + 1) / 2.0, message="epoch", metrics={"loss": 1.0 / (epoch + 1)})
+
+        trainer = Trainer(default_root_path="/tmp/.marvin")
+        trainer._previous_step = Preparator(default_root_path="/tmp/.marvin")
+        trainer._release_local_saved_objects = mock.MagicMock()
+
+        events = list(trainer._remote_execute_stream(BatchActionRequest(params='{"epochs": 2}'), None))
+
+        assert [(event.action, event.event, event.progress) for event in events] == [
+            ("Preparator", "started", 0.0),
+            ("Preparator", "finished", 1.0),
+            ("Trainer", "started", 0.0),
+            ("Trainer", "progress", 0.5),
+            ("Trainer", "progress", 1.0),
+            ("Trainer", "finished", 1.0),
+            ("Trainer", "done", 1.0),
+        ]
+        assert json.loads(events[4].metrics) == {"loss": 0.5}
+        trainer._release_local_saved_objects.assert_called_once_with()
+        assert trainer._progress_listener is None
+        assert trainer._previous_step._progress_listener is None
+
+    def test_remote_execute_stream_with_error(self):
+        class Trainer(EngineBaseBatchAction):
+            def execute(self, params, **kwargs):
+                raise KeyError("column")
+
+        events = []
+        with pytest.raises(KeyError):
+            for event in Trainer(default_root_path="/tmp/.marvin")._remote_execute_stream(BatchActionRequest(), None):
+                events.append(event.event)
+
+        assert events == ["started"]
+
+    def test_remote_execute_stream_cancelled(self):
+        resume = threading.Event()
+
+        class Trainer(EngineBaseBatchAction):
+            def execute(self, params, **kwargs):
+                self.report_progress(progress=0.1)
+                resume.wait(10)
+                self.report_progress(progress=0.2)
+
+        context = mock.MagicMock()
+        context.time_remaining.return_value = None
+        context.abort.side_effect = grpc.RpcError
+        stream = Trainer(default_root_path="/tmp/.marvin")._remote_execute_stream(BatchActionRequest(), context)
+
+        assert next(stream).event == "started"
+        assert next(stream).progress == pytest.approx(0.1)
+
+        on_cancel, = context.add_callback.call_args[0]
+        on_cancel()
+        resume.set()
+
+        with pytest.raises(grpc.RpcError):
+            next(stream)
+
+        context.abort.assert_called_once_with(grpc.StatusCode.CANCELLED, "ExecutionCancelled Trainer")
+
+    def test_report_progress_without_stream(self, batch_engine_action):
+        batch_engine_action.report_progress(progress=0.5, metrics={"loss": 1})
+
     @mock.patch("json.load")
     def test__serializer_load_metrics(self, mocked_load):
         obj = {"key", 1}
@@ -324,7 +1048,7 @@ class TestEngineBaseBatchAction:
                 pass
 
         mocked_open = mock.mock_open()
-        with mock.patch('marvin_python_toolbox.engine_base.engine_base_action.open', mocked_open, create=False):
+        with mock.patch('marvin_python_toolbox.engine_base.serializers.artifact_codecs.open', mocked_open, create=True):
             _metrics = _EAction(default_root_path="/tmp/.marvin", persistence_mode="local")._load_obj(object_reference)
 
         mocked_load.assert_called_once_with(ANY)
@@ -332,7 +1056,7 @@ class TestEngineBaseBatchAction:
         assert obj == _metrics
 
     @mock.patch("json.dump")
-    def test__serializer_dump_metrics(self, mocked_dump):
+    def test__serializer_dump_metrics(self, mocked_dump, tmpdir):
         obj = {"key", 1}
         object_reference = "_metrics"
 
@@ -342,11 +1066,188 @@ class TestEngineBaseBatchAction:
             def execute(self, params, **kwargs):
                 pass
 
-        mocked_open = mock.mock_open()
-        with mock.patch('marvin_python_toolbox.engine_base.engine_base_action.open', mocked_open, create=False):
-            _EAction(default_root_path="/tmp/.marvin", persistence_mode="local")._save_obj(object_reference, obj)
+        _EAction(default_root_path=str(tmpdir), persistence_mode="local")._save_obj(object_reference, obj)
 
         mocked_dump.assert_called_once_with(obj, ANY, indent=4, separators=(u',', u': '), sort_keys=True)
-        mocked_open.assert_called_once()
+        assert os.path.exists(str(tmpdir.join("test_base_action", "metrics")))
+        assert os.path.exists(str(tmpdir.join("test_base_action", "metrics.manifest")))
+
+
+class TestEngineBaseOnlineAction:
+    def test_warm_up(self, tmpdir):
+        class Predictor(EngineBaseOnlineAction):
+            _initial_dataset = None
+
+            def execute(self, input_message, params, **kwargs):
+                self.executed.append((input_message, params))
+                return input_message
+
+        predictor = Predictor(default_root_path=str(tmpdir), persistence_mode='local', params={"p": 1})
+        predictor.executed = []
+        predictor._serializer_dump([1], predictor._get_object_file_path('_initial_dataset'))
+
+        predictor._warm_up(artifacts=['initialdataset', 'missing'], messages=[{"m": 1}, {"m": 2}], iterations=3)
+
+        assert predictor._initial_dataset == [1]
+        assert predictor.executed == [({"m": 1}, {"p": 1}), ({"m": 2}, {"p": 1}), ({"m": 1}, {"p": 1})]
+
+    def test_warm_up_ignores_message_errors(self):
+        class Predictor(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                raise ValueError("bad message")
+
+        Predictor()._warm_up(messages=[{"m": 1}], iterations=2)
+
+    def test_execute_batch_default_calls_execute(self):
+        class OnlineAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message["k"] * params["m"]
+
+        engine_action = OnlineAction()
+
+        assert engine_action.execute_batch([{"k": 1}, {"k": 2}], {"m": 3}) == [3, 6]
+
+    def test_pipeline_execute_batch_with_previous_steps(self):
+        class Preparator(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message + 1
+
+        class Predictor(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                raise AssertionError("execute_batch must be used")
+
+            def execute_batch(self, input_messages, params, **kwargs):
+                return [message * 10 for message in input_messages]
+
+        engine_action = Predictor()
+        engine_action._previous_step = Preparator()
+
+        assert engine_action._pipeline_execute_batch([1, 2, 3], None) == [20, 30, 40]
+
+    def test_pipeline_execute_batch_size_mismatch(self):
+        class BadAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                pass
+
+            def execute_batch(self, input_messages, params, **kwargs):
+                return input_messages[1:]
+
+        with pytest.raises(ValueError) as e:
+            BadAction()._pipeline_execute_batch([1, 2], None)
+
+        assert e.value.args[0] == 'BatchSizeMismatch'
+
+    def test_remote_execute_batch(self):
+        class OnlineAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                if input_message is None:
+                    return "empty"
+                return {"r": input_message["k"] + params["k"]}
+
+        request = OnlineActionBatchRequest(messages=["{\"k\": 1}", "{\"k\": 2}", ""], params="{\"k\": 10}")
+        response = OnlineAction()._remote_execute_batch(request=request, context=None)
+
+        assert [json.loads(message) for message in response.messages[:2]] == [{"r": 11}, {"r": 12}]
+        assert response.messages[2] == "empty"
+
+    def test_remote_execute_batch_without_request_params(self):
+        class OnlineAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return params
+
+        request = OnlineActionBatchRequest(messages=["1", "2"])
+        response = OnlineAction(params={"p": 1})._remote_execute_batch(request=request, context=None)
+
+        assert [json.loads(message) for message in response.messages] == [{"p": 1}, {"p": 1}]
+
+    @mock.patch('marvin_python_toolbox.engine_base.engine_base_action.access_logger')
+    def test_access_log(self, access_logger_mocked):
+        class OnlineAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                if input_message is None:
+                    raise ValueError("NoMessage")
+                return input_message
+
+        action = OnlineAction(access_log_sample_rate=1)
+        action._remote_execute(request=OnlineActionRequest(message="1"), context=None)
+        action._remote_execute_batch(request=OnlineActionBatchRequest(messages=["1", "2"]), context=None)
+        with pytest.raises(ValueError):
+            action._remote_execute(request=OnlineActionRequest(message=""), context=None)
+
+        lines = [call[0][0] for call in access_logger_mocked.info.call_args_list]
+        assert len(lines) == 3
+        assert re.match(r"OnlineAction execute OK request_id=[0-9a-f]{32} messages=1 duration=", lines[0])
+        assert re.match(r"OnlineAction execute_batch OK request_id=[0-9a-f]{32} messages=2 duration=", lines[1])
+        assert re.match(r"OnlineAction execute ValueError request_id=[0-9a-f]{32} messages=1 duration=", lines[2])
+
+        fields = access_logger_mocked.info.call_args_list[1][1]['extra']
+        assert fields['action'] == "OnlineAction"
+        assert fields['rpc'] == "execute_batch"
+        assert fields['status'] == "OK"
+        assert fields['messages'] == 2
+        assert fields['duration'] >= 0
+
+    @mock.patch('marvin_python_toolbox.engine_base.engine_base_action.access_logger')
+    def test_access_log_disabled_by_default(self, access_logger_mocked):
+        class OnlineAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message
+
+        OnlineAction()._remote_execute(request=OnlineActionRequest(message="1"), context=None)
+
+        access_logger_mocked.info.assert_not_called()
+
+    @mock.patch('marvin_python_toolbox.engine_base.engine_base_action.logger')
+    def test_remote_execute_logs_lazily(self, logger_mocked):
+        class OnlineAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message
+
+        action = OnlineAction()
+        logger_mocked.reset_mock()
+
+        logger_mocked.isEnabledFor.return_value = False
+        action._remote_execute(request=OnlineActionRequest(message="1", params="{\"p\": 1}"), context=None)
+
+        logger_mocked.debug.assert_not_called()
+        logger_mocked.info.assert_not_called()
+
+        logger_mocked.isEnabledFor.return_value = True
+        action._remote_execute(request=OnlineActionRequest(message="1", params="{\"p\": 1}"), context=None)
+
+        messages = [call[0][0] for call in logger_mocked.debug.call_args_list]
+        assert any(message.endswith("with Params: {\"p\": 1}") for message in messages)
+
+    @mock.patch('marvin_python_toolbox.engine_base.engine_base_action.logger')
+    def test_request_id_propagated_to_step_logs(self, logger_mocked):
+        class Preparator(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message
+
+        class Predictor(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message
+
+        action = Predictor()
+        action._previous_step = Preparator()
+        context = mock.MagicMock()
+        context.time_remaining.return_value = None
+        context.invocation_metadata.return_value = [("x-request-id", "abc")]
+
+        logger_mocked.isEnabledFor.return_value = True
+        action._remote_execute(request=OnlineActionRequest(message="1"), context=context)
+
+        steps = [call[1]['extra'] for call in logger_mocked.debug.call_args_list if 'step' in call[1].get('extra', {})]
+        assert [(fields['action'], fields['step'], fields['request_id']) for fields in steps] == [
+            ("Predictor", "Preparator", "abc"), ("Predictor", "Predictor", "abc")]
+
+    def test_request_id(self):
+        context = mock.MagicMock()
+        context.invocation_metadata.return_value = [("user-agent", "grpc"), ("x-request-id", "abc")]
 
+        assert EngineBaseOnlineAction._request_id(context) == "abc"
+        assert EngineBaseOnlineAction._request_id(context, index=2) == "abc.2"
 
+        context.invocation_metadata.return_value = None
+        assert re.match(r"^[0-9a-f]{32}$", EngineBaseOnlineAction._request_id(context))
+        assert EngineBaseOnlineAction._request_id(None) != EngineBaseOnlineAction._request_id(None)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2017] [B2W Digital]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+import time
+import multiprocessing
+import threading
+
+import pytest
+
+from marvin_python_toolbox.engine_base import EngineBaseOnlineAction, EngineBaseBatchAction, ParallelStep
+from marvin_python_toolbox.engine_base.parallel import merge_outputs
+
+
+class Lookup(EngineBaseOnlineAction):
+    def __init__(self, key, delay=0, **kwargs):
+        self.key = key
+        self.delay = delay
+        self.threads = set()
+        super(Lookup, self).__init__(**kwargs)
+
+    def execute(self, input_message, params, **kwargs):
+        self.threads.add(threading.current_thread().name)
+        time.sleep(self.delay)
+        return {self.key: input_message["id"] * 10}
+
+
+class Cleaner(EngineBaseOnlineAction):
+    def execute(self, input_message, params, **kwargs):
+        return {"id": int(input_message)}
+
+
+class Predictor(EngineBaseOnlineAction):
+    def execute(self, input_message, params, **kwargs):
+        return sorted(input_message.items())
+
+
+@pytest.fixture
+def lookups():
+    return [Lookup("user", delay=0.2), Lookup("item", delay=0.2), Lookup("context", delay=0.2)]
+
+
+class TestMergeOutputs(object):
+    def test_merge_dicts(self):
+        assert merge_outputs([{"a": 1}, {"b": 2}], ["A", "B"]) == {"a": 1, "b": 2}
+
+    def test_conflicting_keys(self):
+        with pytest.raises(ValueError) as excinfo:
+            merge_outputs([{"a": 1}, {"a": 2}], ["A", "B"])
+
+        assert excinfo.value.args == ('ConflictingStepOutputs', 'a', ['A', 'B'])
+
+    def test_other_outputs(self):
+        assert merge_outputs(({"a": 1}, [2]), ["A", "B"]) == [{"a": 1}, [2]]
+
+
+class TestParallelStep(object):
+    def test_steps_run_concurrently(self, lookups):
+        step = ParallelStep(steps=lookups, max_workers=2)
+
+        started_at = time.time()
+        output = step._pipeline_execute({"id": 1}, {})
+
+        assert output == {"user": 10, "item": 10, "context": 10}
+        assert time.time() - started_at < 0.4
+        assert len(set.union(*[lookup.threads for lookup in lookups])) == 3
+        assert step.action_name == "Parallel(Lookup,Lookup,Lookup)"
+
+    def test_pipeline_with_parallel_group(self, lookups):
+        group = ParallelStep(steps=lookups[:2])
+        group._previous_step = Cleaner()
+        predictor = Predictor()
+        predictor._previous_step = group
+
+        assert predictor._pipeline_execute("2", {}) == [("item", 20), ("user", 20)]
+
+    def test_execute_batch(self, lookups):
+        step = ParallelStep(steps=[Lookup("user"), Lookup("item")])
+
+        assert step._pipeline_execute_batch([{"id": 1}, {"id": 2}], {}) == [{"user": 10, "item": 10}, {"user": 20, "item": 20}]
+
+    def test_step_errors_are_raised(self):
+        class Failing(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                raise KeyError("feature")
+
+        step = ParallelStep(steps=[Lookup("user"), Failing()])
+
+        with pytest.raises(KeyError):
+            step._pipeline_execute({"id": 1}, {})
+
+    def test_cache_stats_of_the_steps(self):
+        step = ParallelStep(steps=[Lookup("user", step_cache_size=2), Lookup("item")])
+        step._pipeline_execute({"id": 1}, {})
+
+        assert step._cache_stats()["Lookup"]["misses"] == 1
+
+    def test_batch_actions_are_rejected(self):
+        class Trainer(EngineBaseBatchAction):
+            def execute(self, params, **kwargs):
+                pass
+
+        with pytest.raises(ValueError) as excinfo:
+            ParallelStep(steps=[Lookup("user"), Trainer()])
+
+        assert excinfo.value.args == ('InvalidParallelStep', 'Trainer')
+
+    @pytest.mark.skipif(not hasattr(os, 'fork') or not hasattr(multiprocessing, 'get_context'), reason="requires os.fork")
+    def test_forked_process(self):
+        step = ParallelStep(steps=[Lookup("user"), Lookup("item")])
+        # starts the pool threads before the fork, like the warm up of MultiProcessServer
+        assert step._pipeline_execute({"id": 1}, {}) == {"user": 10, "item": 10}
+
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+
+        def run():
+            results.put(step._pipeline_execute({"id": 2}, {}))
+
+        worker = context.Process(target=run)
+        worker.start()
+        try:
+            assert results.get(timeout=10) == {"user": 20, "item": 20}
+        finally:
+            worker.join(1)
+            if worker.is_alive():
+                worker.terminate()
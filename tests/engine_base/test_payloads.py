@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2017] [B2W Digital]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import numpy as np
+import pytest
+
+from marvin_python_toolbox.engine_base.payloads import JSON, MSGPACK, NUMPY, ARROW, decode_payload, encode_payload
+
+
+class TestPayloads(object):
+    @pytest.mark.parametrize('message', [{"k": [1, 2.5, "a"]}, [1, 2], "message", 1])
+    def test_json_roundtrip(self, message):
+        assert decode_payload(encode_payload(message, JSON), JSON) == message
+
+    def test_msgpack_roundtrip(self):
+        pytest.importorskip('msgpack')
+
+        message = {"k": [1, 2.5, "a"], "b": b"\x00\x01"}
+        assert decode_payload(encode_payload(message, MSGPACK), MSGPACK) == message
+
+    def test_numpy_roundtrip(self):
+        message = np.arange(12, dtype='float32').reshape(3, 4)
+        decoded = decode_payload(encode_payload(message, NUMPY), NUMPY)
+
+        assert decoded.dtype == message.dtype
+        assert np.array_equal(decoded, message)
+
+    def test_numpy_from_list(self):
+        assert decode_payload(encode_payload([1, 2, 3], NUMPY), NUMPY).tolist() == [1, 2, 3]
+
+    def test_numpy_rejects_pickled_objects(self):
+        import io
+
+        buffer = io.BytesIO()
+        np.save(buffer, np.array([{"k": 1}], dtype=object), allow_pickle=True)
+
+        with pytest.raises(ValueError):
+            decode_payload(buffer.getvalue(), NUMPY)
+
+    def test_arrow_roundtrip(self):
+        pa = pytest.importorskip('pyarrow')
+
+        table = pa.table({"a": [1, 2], "b": ["x", "y"]})
+
+        assert decode_payload(encode_payload(table, ARROW), ARROW).equals(table)
+        assert decode_payload(encode_payload(table.to_batches()[0], ARROW), ARROW).equals(table)
+
+    def test_numpy_unencodable_message(self):
+        with pytest.raises(ValueError) as excinfo:
+            encode_payload({"k": 1}, NUMPY)
+
+        assert excinfo.value.args[:2] == ('UnencodableMessage', NUMPY)
+
+    def test_arrow_unencodable_message(self):
+        pytest.importorskip('pyarrow')
+
+        with pytest.raises(ValueError) as excinfo:
+            encode_payload({"k": 1}, ARROW)
+
+        assert excinfo.value.args[:2] == ('UnencodableMessage', ARROW)
+
+    def test_empty_payload(self):
+        assert decode_payload(b"", NUMPY) is None
+
+    def test_unsupported_content_type(self):
+        with pytest.raises(ValueError) as excinfo:
+            encode_payload({"k": 1}, "text/csv")
+
+        assert excinfo.value.args == ('UnsupportedContentType', 'text/csv')
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2017] [B2W Digital]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+import threading
+import pytest
+
+from marvin_python_toolbox.engine_base.persistence import BackgroundWriter, get_background_writer
+from marvin_python_toolbox.engine_base.persistence import create_artifacts_version, publish_artifacts_version, list_artifacts_versions
+
+
+class TestBackgroundWriter(object):
+    def test_flush_waits_pending_writes(self):
+        writer = BackgroundWriter()
+        release = threading.Event()
+        written = []
+
+        def write(value):
+            release.wait()
+            written.append(value)
+
+        writer.submit('a', write, 1)
+        assert writer.is_pending('a')
+
+        release.set()
+        writer.flush('a')
+
+        assert written == [1]
+        assert not writer.is_pending('a')
+        writer.close()
+
+    def test_writes_of_same_key_are_ordered(self):
+        writer = BackgroundWriter(max_workers=4)
+        written = []
+
+        for value in range(10):
+            writer.submit('a', written.append, value)
+
+        writer.flush()
+
+        assert written == list(range(10))
+        writer.close()
+
+    def test_flush_raises_write_errors(self):
+        writer = BackgroundWriter()
+
+        def write():
+            raise IOError('disk full')
+
+        writer.submit('a', write)
+
+        with pytest.raises(IOError):
+            writer.flush()
+
+        # errors are raised only once
+        writer.flush()
+        writer.close()
+
+    def test_flush_unknown_key(self):
+        BackgroundWriter().flush('xyz')
+
+    def test_shared_writer(self):
+        assert get_background_writer() is get_background_writer()
+
+
+class TestArtifactsVersions(object):
+    def test_create_and_publish(self, tmpdir):
+        directory = str(tmpdir)
+        version_path = create_artifacts_version(directory)
+        tmpdir.join(os.path.basename(version_path), 'model').write('v1')
+
+        publish_artifacts_version(version_path)
+
+        assert list_artifacts_versions(directory) == [os.path.basename(version_path)]
+        assert tmpdir.join('current', 'model').read() == 'v1'
+
+    def test_new_version_links_current_artifacts(self, tmpdir):
+        directory = str(tmpdir)
+        first = create_artifacts_version(directory)
+        tmpdir.join(os.path.basename(first), 'model').write('v1')
+        tmpdir.join(os.path.basename(first), 'metrics').write('m1')
+        publish_artifacts_version(first)
+
+        second = create_artifacts_version(directory)
+        os.remove(os.path.join(second, 'model'))
+        tmpdir.join(os.path.basename(second), 'model').write('v2')
+        publish_artifacts_version(second)
+
+        assert tmpdir.join('current', 'model').read() == 'v2'
+        assert tmpdir.join('current', 'metrics').read() == 'm1'
+        assert tmpdir.join(os.path.basename(first), 'model').read() == 'v1'
+
+    def test_first_version_takes_not_versioned_artifacts(self, tmpdir):
+        tmpdir.join('model').write('flat')
+
+        version_path = create_artifacts_version(str(tmpdir))
+
+        assert open(os.path.join(version_path, 'model')).read() == 'flat'
+
+    def test_publish_removes_old_versions(self, tmpdir):
+        directory = str(tmpdir)
+        versions = []
+        for _ in range(4):
+            versions.append(os.path.basename(create_artifacts_version(directory)))
+            publish_artifacts_version(os.path.join(directory, versions[-1]), versions_to_keep=2)
+
+        assert list_artifacts_versions(directory) == versions[-2:]
+        assert os.readlink(os.path.join(directory, 'current')) == versions[-1]
+        assert not [name for name in os.listdir(directory) if name.endswith('.tmp')]
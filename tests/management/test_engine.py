@@ -27,6 +27,8 @@ from marvin_python_toolbox.management.engine import dryrun
 from marvin_python_toolbox.management.engine import engine_httpserver
 from marvin_python_toolbox.management.engine import _create_virtual_env
 from marvin_python_toolbox.management.engine import _make_data_link
+from marvin_python_toolbox.management.engine import MarvinEngineServer, MultiProcessServer
+from marvin_python_toolbox.engine_base import EngineBaseOnlineAction, EngineBaseBatchAction, ParallelStep
 import os
 
 
@@ -48,6 +50,9 @@ class mocked_acquisitor():
     def execute(self, **kwargs):
         print ('test')
 
+    def _flush_pending_saves(self):
+        pass
+
 
 @mock.patch('marvin_python_toolbox.management.engine.time.time')
 @mock.patch('marvin_python_toolbox.management.engine.MarvinDryRun')
@@ -120,6 +125,119 @@ def test_marvindryrun(import_mocked, dumps_mocked):
     dumps_mocked.assert_called_with(None, indent=4, sort_keys=True)
 
 
+@mock.patch('marvin_python_toolbox.management.engine.dynamic_import')
+def test_marvindryrun_flushes_pending_saves(import_mocked):
+    test_dryrun = MarvinDryRun(ctx=mocked_ctx, messages=[[], []], print_response=False)
+    test_dryrun.execute(clazz='Trainer', params=None, initial_dataset=None, dataset=None, model=None, metrics=None)
+
+    import_mocked.return_value.return_value.execute.assert_called_once_with(params=None)
+    import_mocked.return_value.return_value._flush_pending_saves.assert_called_once_with()
+
+
+class _OnlineAction(EngineBaseOnlineAction):
+    def execute(self, input_message, params, **kwargs):
+        return input_message
+
+
+class _BatchAction(EngineBaseBatchAction):
+    def execute(self, params, **kwargs):
+        pass
+
+
+@mock.patch('marvin_python_toolbox.management.engine.dynamic_import')
+def test_engine_server_create_warms_up_online_actions(import_mocked):
+    import_mocked.return_value = _OnlineAction
+
+    with mock.patch.object(_OnlineAction, '_warm_up') as warm_up_mocked, \
+            mock.patch.object(_OnlineAction, '_prepare_remote_server') as prepare_mocked:
+        server = MarvinEngineServer.create(ctx=mocked_ctx, action='predictor', port=0, workers=1, rpc_workers=1, params={'p': 1},
+                                           initial_dataset=None, dataset=None, model=None, metrics=None, pipeline=[],
+                                           artifacts_to_load=['model'], messages=[{'m': 1}], warmup_iterations=5)
+
+    warm_up_mocked.assert_called_once_with(artifacts=['model'], messages=[{'m': 1}], iterations=5, params={'p': 1})
+    assert server is prepare_mocked.return_value
+    server.start.assert_called_once_with()
+
+
+@mock.patch('marvin_python_toolbox.management.engine.multiprocessing.Process')
+@mock.patch('marvin_python_toolbox.management.engine.dynamic_import')
+def test_engine_server_create_multiple_processes(import_mocked, process_mocked):
+    import_mocked.return_value = _OnlineAction
+
+    with mock.patch.object(_OnlineAction, '_prepare_remote_server') as prepare_mocked:
+        server = MarvinEngineServer.create(ctx=mocked_ctx, action='predictor', port=7000, workers=2, rpc_workers=3, params={},
+                                           initial_dataset=None, dataset=None, model=None, metrics=None, pipeline=[], processes=4)
+
+        assert isinstance(server, MultiProcessServer)
+        assert process_mocked.call_count == 4
+        assert process_mocked.return_value.start.call_count == 4
+
+        # the gRPC servers are only created in the worker processes
+        prepare_mocked.assert_not_called()
+        with mock.patch('marvin_python_toolbox.management.engine.time.sleep', side_effect=KeyboardInterrupt):
+            try:
+                server._serve()
+            except KeyboardInterrupt:
+                pass
+
+    prepare_mocked.assert_called_once_with(port=7000, workers=2, rpc_workers=3, max_batch_size=1, max_batch_wait=0.002, reuse_port=True)
+    prepare_mocked.return_value.start.assert_called_once_with()
+    prepare_mocked.return_value.stop.assert_called_once_with(0)
+
+    server.stop(1)
+
+    assert process_mocked.return_value.terminate.call_count == 4
+    process_mocked.return_value.join.assert_called_with(1)
+
+
+@mock.patch('marvin_python_toolbox.management.engine.dynamic_import')
+def test_engine_server_create_with_parallel_steps(import_mocked):
+    import_mocked.return_value = _OnlineAction
+
+    with mock.patch.object(_OnlineAction, '_prepare_remote_server', autospec=True) as prepare_mocked:
+        MarvinEngineServer.create(ctx=mocked_ctx, action='predictor', port=0, workers=4, rpc_workers=4, params={},
+                                  initial_dataset=None, dataset=None, model=None, metrics=None,
+                                  pipeline=['ppreparator', ['UserFeatures', 'ItemFeatures', 'ContextFeatures']])
+
+    root = prepare_mocked.call_args[0][0]
+    group = root._previous_step
+
+    assert isinstance(group, ParallelStep)
+    assert len(group.steps) == 3
+    assert group._max_workers == 8
+    assert isinstance(group._previous_step, _OnlineAction)
+    assert group._previous_step._previous_step is None
+
+    imported = [call[0][0] for call in import_mocked.call_args_list]
+    assert imported == ['test_package.Predictor', 'test_package.UserFeatures', 'test_package.ItemFeatures',
+                        'test_package.ContextFeatures', 'test_package.PredictionPreparator']
+
+
+@mock.patch('marvin_python_toolbox.management.engine.dynamic_import')
+def test_engine_server_create_with_admission_control(import_mocked):
+    import_mocked.return_value = _OnlineAction
+
+    with mock.patch.object(_OnlineAction, '_prepare_remote_server') as prepare_mocked:
+        MarvinEngineServer.create(ctx=mocked_ctx, action='predictor', port=0, workers=2, rpc_workers=8, params={},
+                                  initial_dataset=None, dataset=None, model=None, metrics=None, pipeline=[],
+                                  max_queue_depth=4, max_queue_time=0.05)
+
+    prepare_mocked.assert_called_once_with(port=0, workers=2, rpc_workers=8, max_batch_size=1, max_batch_wait=0.002,
+                                           max_queue_depth=4, max_queue_time=0.05)
+
+
+@mock.patch('marvin_python_toolbox.management.engine.dynamic_import')
+def test_engine_server_create_does_not_warm_up_batch_actions(import_mocked):
+    import_mocked.return_value = _BatchAction
+
+    with mock.patch.object(_BatchAction, '_prepare_remote_server') as prepare_mocked:
+        MarvinEngineServer.create(ctx=mocked_ctx, action='trainer', port=0, workers=1, rpc_workers=1, params={},
+                                  initial_dataset=None, dataset=None, model=None, metrics=None, pipeline=[],
+                                  artifacts_to_load=['dataset'], messages=[{'m': 1}], warmup_iterations=5)
+
+    prepare_mocked.assert_called_once_with(port=0, workers=1, rpc_workers=1)
+
+
 @mock.patch('marvin_python_toolbox.management.engine.sys.exit')
 @mock.patch('marvin_python_toolbox.management.engine.time.sleep')
 @mock.patch('marvin_python_toolbox.management.engine.MarvinData')
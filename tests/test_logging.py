@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2017] [B2W Digital]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import json
+import logging
+
+import pytest
+
+from marvin_python_toolbox import _logging
+from marvin_python_toolbox._logging import get_logger, enable_queue_logging
+
+
+@pytest.fixture
+def namespace(request):
+    namespace = 'test_logging_{}'.format(request.node.name)
+    yield namespace
+
+    namespace_logger = logging.getLogger(namespace)
+    for handler in list(namespace_logger.handlers):
+        handler.close()
+        namespace_logger.removeHandler(handler)
+    _logging._configured_namespaces.discard(namespace)
+    _logging._queued_namespaces.discard(namespace)
+
+
+def _read_log(log_dir, namespace):
+    with open(os.path.join(str(log_dir), '{}.{}.log'.format(namespace, os.getpid()))) as f:
+        return f.read()
+
+
+def test_get_logger_is_idempotent(namespace, tmpdir):
+    logger = get_logger('action', namespace=namespace, log_dir=str(tmpdir))
+    other = get_logger('action', namespace=namespace, log_dir=str(tmpdir), log_level=logging.INFO)
+    get_logger('other', namespace=namespace, log_dir=str(tmpdir))
+
+    assert logger is other
+    assert logger.level == logging.INFO
+    assert logger.handlers == []
+
+    handlers = logging.getLogger(namespace).handlers
+    assert [type(handler) for handler in handlers] == [logging.StreamHandler, logging.FileHandler]
+
+    logger.info('once')
+    handlers[1].flush()
+    assert _read_log(tmpdir, namespace).count('once') == 1
+
+
+def test_queue_logging(namespace, tmpdir):
+    logger = get_logger('action', namespace=namespace, log_dir=str(tmpdir), log_level=logging.INFO)
+
+    assert enable_queue_logging(namespace) is True
+    assert enable_queue_logging(namespace) is True
+
+    handlers = logging.getLogger(namespace).handlers
+    assert len(handlers) == 1
+    assert [type(handler) for handler in handlers[0].handlers] == [logging.StreamHandler, logging.FileHandler]
+
+    logger.info('queued %s', 1)
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        logger.exception('failed')
+
+    # stops the listener after writing the pending records
+    handlers[0].close()
+
+    log = _read_log(tmpdir, namespace)
+    assert '{}.action - INFO - queued 1'.format(namespace) in log
+    assert 'ValueError: boom' in log
+
+
+def test_queue_logging_from_env(namespace, tmpdir, monkeypatch):
+    monkeypatch.setenv('{}_LOG_QUEUE'.format(namespace.upper()), 'true')
+    get_logger('action', namespace=namespace, log_dir=str(tmpdir))
+
+    handlers = logging.getLogger(namespace).handlers
+    assert len(handlers) == 1
+    assert isinstance(handlers[0], _logging.QueueHandler)
+
+
+def test_json_format(namespace, tmpdir):
+    logger = get_logger('action', namespace=namespace, log_dir=str(tmpdir), log_level=logging.INFO, log_format='json')
+
+    logger.info('step %s finished', 'Predictor', extra={'step': 'Predictor', 'request_id': 'abc', 'duration': 0.5})
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        logger.exception('failed')
+    logging.getLogger(namespace).handlers[1].flush()
+
+    lines = [json.loads(line) for line in _read_log(tmpdir, namespace).splitlines()]
+
+    assert len(lines) == 2
+    assert isinstance(lines[0].pop('time'), float)
+    assert lines[0] == {'level': 'INFO', 'logger': '{}.action'.format(namespace), 'message': 'step Predictor finished',
+                        'step': 'Predictor', 'request_id': 'abc', 'duration': 0.5}
+    assert lines[1]['message'] == 'failed'
+    assert 'ValueError: boom' in lines[1]['exception']
+
+
+def test_invalid_log_format(namespace, tmpdir):
+    with pytest.raises(ValueError):
+        get_logger('action', namespace=namespace, log_dir=str(tmpdir), log_format='xml')